@@ -0,0 +1,36 @@
+"""Message history keys
+
+Deleting a session or message cascades in the database, and history is
+paged by (session_id, created_at, id).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:13:11.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('messages_session_id_fkey', 'messages', type_='foreignkey')
+    op.create_foreign_key('messages_session_id_fkey', 'messages', 'chat_sessions', ['session_id'], ['id'], ondelete='CASCADE')
+    op.drop_constraint('evaluations_message_id_fkey', 'evaluations', type_='foreignkey')
+    op.create_foreign_key('evaluations_message_id_fkey', 'evaluations', 'messages', ['message_id'], ['id'], ondelete='CASCADE')
+    op.create_index('ix_messages_session_created_id', 'messages', ['session_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_session_created_id', table_name='messages')
+    op.drop_constraint('evaluations_message_id_fkey', 'evaluations', type_='foreignkey')
+    op.create_foreign_key('evaluations_message_id_fkey', 'evaluations', 'messages', ['message_id'], ['id'])
+    op.drop_constraint('messages_session_id_fkey', 'messages', type_='foreignkey')
+    op.create_foreign_key('messages_session_id_fkey', 'messages', 'chat_sessions', ['session_id'], ['id'])
@@ -0,0 +1,81 @@
+"""Usage rollups
+
+Hourly and daily usage per user/provider/model, filled from the
+responses already stored on messages. The same aggregation as
+``scripts/rollup_usage.py backfill``.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:13:12.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of the rebuild query as of this revision
+BACKFILL_SQL = """
+INSERT INTO usage_rollups (
+    id, user_id, granularity, bucket_start, provider, model, requests, successes, errors,
+    cache_hits, prompt_tokens, completion_tokens, total_tokens, cost, latency_total
+)
+SELECT
+    gen_random_uuid(),
+    s.user_id,
+    g.granularity,
+    date_trunc(g.granularity, m.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+    r->>'provider',
+    r->>'model',
+    count(*),
+    count(*) FILTER (WHERE r->>'status' = 'ok'),
+    count(*) FILTER (WHERE r->>'status' IN ('error', 'timeout')),
+    count(*) FILTER (WHERE billed IS FALSE),
+    coalesce(sum((r->'usage'->>'prompt_tokens')::bigint) FILTER (WHERE billed), 0),
+    coalesce(sum((r->'usage'->>'completion_tokens')::bigint) FILTER (WHERE billed), 0),
+    coalesce(sum((r->'usage'->>'total_tokens')::bigint) FILTER (WHERE billed), 0),
+    coalesce(sum((r->>'cost')::float) FILTER (WHERE billed), 0),
+    coalesce(sum((r->>'latency')::float) FILTER (WHERE r->>'status' = 'ok'), 0)
+FROM messages m
+JOIN chat_sessions s ON s.id = m.session_id
+CROSS JOIN (VALUES ('hour'), ('day')) AS g(granularity)
+CROSS JOIN LATERAL json_array_elements(coalesce(m.responses, '[]'::json)) AS r
+CROSS JOIN LATERAL (SELECT NOT coalesce((r->>'cached')::boolean, false) AS billed) AS b
+GROUP BY 2, 3, 4, 5, 6
+"""
+
+
+def upgrade() -> None:
+    op.create_table('usage_rollups',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('provider', sa.String(length=50), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('requests', sa.Integer(), nullable=False),
+    sa.Column('successes', sa.Integer(), nullable=False),
+    sa.Column('errors', sa.Integer(), nullable=False),
+    sa.Column('cache_hits', sa.Integer(), nullable=False),
+    sa.Column('prompt_tokens', sa.BigInteger(), nullable=False),
+    sa.Column('completion_tokens', sa.BigInteger(), nullable=False),
+    sa.Column('total_tokens', sa.BigInteger(), nullable=False),
+    sa.Column('cost', sa.Float(), nullable=False),
+    sa.Column('latency_total', sa.Float(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'granularity', 'bucket_start', 'provider', 'model', name='uq_usage_rollups_bucket')
+    )
+    op.execute(BACKFILL_SQL)
+
+
+def downgrade() -> None:
+    op.drop_table('usage_rollups')
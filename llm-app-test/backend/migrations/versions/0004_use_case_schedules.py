@@ -0,0 +1,30 @@
+"""Use case schedules
+
+Targets to run a use case against on its schedule, and the index the
+scheduler polls changed use cases through.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:13:13.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('use_cases', sa.Column('targets', sa.JSON(), nullable=True))
+    op.create_index('ix_use_cases_updated_at_id', 'use_cases', ['updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_use_cases_updated_at_id', table_name='use_cases')
+    op.drop_column('use_cases', 'targets')
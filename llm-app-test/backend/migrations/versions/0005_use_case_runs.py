@@ -0,0 +1,52 @@
+"""Use case runs
+
+Append-only execution history. Entries already in
+use_cases.execution_history are moved here afterwards, in batches and
+while the API is serving, by ``python -m scripts.migrate_usecase_history``.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 12:13:14.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('use_case_runs',
+    sa.Column('use_case_id', sa.UUID(), nullable=False),
+    sa.Column('provider', sa.String(length=50), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('fired_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('latency', sa.Float(), nullable=True),
+    sa.Column('ttft', sa.Float(), nullable=True),
+    sa.Column('prompt_tokens', sa.Integer(), nullable=True),
+    sa.Column('completion_tokens', sa.Integer(), nullable=True),
+    sa.Column('total_tokens', sa.Integer(), nullable=True),
+    sa.Column('cost', sa.Float(), nullable=True),
+    sa.Column('output', sa.Text(), nullable=True),
+    sa.Column('output_hash', sa.String(length=64), nullable=True),
+    sa.Column('score', sa.Float(), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['use_case_id'], ['use_cases.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_use_case_runs_use_case_created_id', 'use_case_runs', ['use_case_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_use_case_runs_use_case_created_id', table_name='use_case_runs')
+    op.drop_table('use_case_runs')
@@ -0,0 +1,57 @@
+"""Use case dataset jobs
+
+Checkpointed runs of a use case over an uploaded dataset; their runs
+point back at the job and dataset row.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 12:13:15.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('use_case_jobs',
+    sa.Column('use_case_id', sa.UUID(), nullable=False),
+    sa.Column('dataset', sa.String(length=500), nullable=False),
+    sa.Column('targets', sa.JSON(), nullable=True),
+    sa.Column('params', sa.JSON(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('rows_total', sa.Integer(), nullable=True),
+    sa.Column('rows_done', sa.Integer(), nullable=False),
+    sa.Column('rows_per_second', sa.Float(), nullable=True),
+    sa.Column('eta_seconds', sa.Float(), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['use_case_id'], ['use_cases.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_use_case_jobs_use_case_id'), 'use_case_jobs', ['use_case_id'], unique=False)
+    op.add_column('use_case_runs', sa.Column('job_id', sa.UUID(), nullable=True))
+    op.add_column('use_case_runs', sa.Column('row_index', sa.Integer(), nullable=True))
+    op.create_foreign_key('use_case_runs_job_id_fkey', 'use_case_runs', 'use_case_jobs', ['job_id'], ['id'], ondelete='CASCADE')
+    op.create_index('ix_use_case_runs_job_row', 'use_case_runs', ['job_id', 'row_index'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_use_case_runs_job_row', table_name='use_case_runs')
+    op.drop_constraint('use_case_runs_job_id_fkey', 'use_case_runs', type_='foreignkey')
+    op.drop_column('use_case_runs', 'row_index')
+    op.drop_column('use_case_runs', 'job_id')
+    op.drop_index(op.f('ix_use_case_jobs_use_case_id'), table_name='use_case_jobs')
+    op.drop_table('use_case_jobs')
@@ -0,0 +1,46 @@
+"""Message search
+
+Full-text search over messages. Each message gets its session owner's
+user_id, backfilled from chat_sessions before it becomes NOT NULL, and a
+generated search_vector that Postgres fills in for existing rows while
+adding the column; the table is locked and rewritten meanwhile.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 12:13:16.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('messages', sa.Column('user_id', sa.UUID(), nullable=True))
+    op.execute(
+        "UPDATE messages AS m SET user_id = s.user_id "
+        "FROM chat_sessions AS s WHERE s.id = m.session_id"
+    )
+    op.alter_column('messages', 'user_id', nullable=False)
+    op.create_foreign_key('messages_user_id_fkey', 'messages', 'users', ['user_id'], ['id'])
+    op.add_column('messages', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("to_tsvector('simple'::regconfig, content) || array_to_tsvector(array_remove(ARRAY['@' || user_id::text], NULL))", persisted=True), nullable=True))
+    op.create_index('ix_messages_search_vector', 'messages', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_chat_sessions_tags', 'chat_sessions', ['tags'], unique=False, postgresql_using='gin')
+    op.create_index('ix_chat_sessions_user_id', 'chat_sessions', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chat_sessions_user_id', table_name='chat_sessions')
+    op.drop_index('ix_chat_sessions_tags', table_name='chat_sessions', postgresql_using='gin')
+    op.drop_index('ix_messages_search_vector', table_name='messages', postgresql_using='gin')
+    op.drop_column('messages', 'search_vector')
+    op.drop_constraint('messages_user_id_fkey', 'messages', type_='foreignkey')
+    op.drop_column('messages', 'user_id')
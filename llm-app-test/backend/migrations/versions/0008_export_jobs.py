@@ -0,0 +1,50 @@
+"""Export jobs
+
+Background chat history exports, and the index exports and cascading
+deletes use to find a message's evaluations.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 12:13:17.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('export_jobs',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('session_id', sa.UUID(), nullable=True),
+    sa.Column('format', sa.String(length=10), nullable=False),
+    sa.Column('compress', sa.Boolean(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('path', sa.String(length=500), nullable=True),
+    sa.Column('rows_done', sa.Integer(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['session_id'], ['chat_sessions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_export_jobs_user_id'), 'export_jobs', ['user_id'], unique=False)
+    op.create_index('ix_evaluations_message_id', 'evaluations', ['message_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_evaluations_message_id', table_name='evaluations')
+    op.drop_index(op.f('ix_export_jobs_user_id'), table_name='export_jobs')
+    op.drop_table('export_jobs')
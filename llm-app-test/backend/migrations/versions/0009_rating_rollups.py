@@ -0,0 +1,82 @@
+"""Rating rollups
+
+Daily and all-time rating histograms per user/provider/dimension,
+filled from the existing evaluations. The same aggregation as
+``scripts/rollup_ratings.py backfill``; existing ratings are bucketed by
+their created_at, as they have no rated_at.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 12:13:18.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of the rebuild query as of this revision
+BACKFILL_SQL = """
+INSERT INTO rating_rollups (
+    id, user_id, granularity, bucket_start, provider, dimension,
+    rated_1, rated_2, rated_3, rated_4, rated_5
+)
+SELECT
+    gen_random_uuid(),
+    e.user_id,
+    g.granularity,
+    CASE WHEN g.granularity = 'day'
+        THEN date_trunc('day', e.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+        ELSE CAST('1970-01-01 00:00:00+00' AS timestamptz)
+    END,
+    e.provider,
+    d.dimension,
+    count(*) FILTER (WHERE d.value = 1),
+    count(*) FILTER (WHERE d.value = 2),
+    count(*) FILTER (WHERE d.value = 3),
+    count(*) FILTER (WHERE d.value = 4),
+    count(*) FILTER (WHERE d.value = 5)
+FROM evaluations e
+CROSS JOIN LATERAL (VALUES
+    ('usefulness', e.usefulness_rating),
+    ('accuracy', e.accuracy_rating),
+    ('creativity', e.creativity_rating)
+) AS d(dimension, value)
+CROSS JOIN (VALUES ('day'), ('all')) AS g(granularity)
+WHERE d.value IS NOT NULL
+GROUP BY 2, 3, 4, 5, 6
+"""
+
+
+def upgrade() -> None:
+    op.add_column('evaluations', sa.Column('rated_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_table('rating_rollups',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('provider', sa.String(length=50), nullable=False),
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('rated_1', sa.Integer(), nullable=False),
+    sa.Column('rated_2', sa.Integer(), nullable=False),
+    sa.Column('rated_3', sa.Integer(), nullable=False),
+    sa.Column('rated_4', sa.Integer(), nullable=False),
+    sa.Column('rated_5', sa.Integer(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'granularity', 'bucket_start', 'provider', 'dimension', name='uq_rating_rollups_bucket')
+    )
+    op.execute(BACKFILL_SQL)
+
+
+def downgrade() -> None:
+    op.drop_table('rating_rollups')
+    op.drop_column('evaluations', 'rated_at')
@@ -0,0 +1,45 @@
+"""Context checkpoints
+
+Stored token counts per message and running summaries of the turns
+that no longer fit a model's context window. token_counts starts empty;
+messages are counted the first time a prompt needs them.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 12:13:19.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('messages', sa.Column('token_counts', sa.JSON(), nullable=True))
+    op.create_table('context_checkpoints',
+    sa.Column('session_id', sa.UUID(), nullable=False),
+    sa.Column('provider', sa.String(length=50), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=False),
+    sa.Column('summary_tokens', sa.Integer(), nullable=False),
+    sa.Column('through_created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('through_message_id', sa.UUID(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['session_id'], ['chat_sessions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('session_id', 'provider', 'model', name='uq_context_checkpoints_thread')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('context_checkpoints')
+    op.drop_column('messages', 'token_counts')
@@ -0,0 +1,82 @@
+"""Measure event-loop lag during a login storm.
+
+Runs a 10 ms heartbeat on the event loop while a burst of concurrent
+password verifications is processed, first inline (the old behaviour)
+and then through the bounded hashing pool.
+
+Usage (from the backend directory):
+    python -m scripts.bench_login_storm --logins 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from src.core.security import (
+    get_hash_queue_depth,
+    get_password_hash,
+    shutdown_password_hashing,
+    verify_password,
+    verify_password_async,
+)
+
+HEARTBEAT = 0.01
+
+
+async def heartbeat(lags: List[float], stop: asyncio.Event) -> None:
+    """Record how late each 10 ms tick fires."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT)
+        lags.append(time.perf_counter() - start - HEARTBEAT)
+
+
+async def storm(logins: int, hashed: str, offload: bool) -> None:
+    lags: List[float] = []
+    max_depth = 0
+    stop = asyncio.Event()
+    probe = asyncio.create_task(heartbeat(lags, stop))
+
+    async def login() -> None:
+        if offload:
+            await verify_password_async("correct horse", hashed)
+        else:
+            verify_password("correct horse", hashed)
+
+    async def sample_depth() -> None:
+        nonlocal max_depth
+        while not stop.is_set():
+            max_depth = max(max_depth, get_hash_queue_depth())
+            await asyncio.sleep(HEARTBEAT)
+
+    sampler = asyncio.create_task(sample_depth())
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await asyncio.gather(probe, sampler)
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{'offloaded' if offload else 'inline':>9}: "
+        f"{logins} logins in {elapsed:.2f}s | "
+        f"loop lag mean {statistics.mean(lags_ms):.1f} ms, "
+        f"p99 {p99:.1f} ms, max {lags_ms[-1]:.1f} ms | "
+        f"max queue depth {max_depth}"
+    )
+
+
+async def main(logins: int) -> None:
+    hashed = get_password_hash("correct horse")
+    await storm(logins, hashed, offload=False)
+    await storm(logins, hashed, offload=True)
+    shutdown_password_hashing()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    asyncio.run(main(parser.parse_args().logins))
@@ -0,0 +1,117 @@
+"""Measure how long a new API worker takes to import and to become ready.
+
+Every run starts a fresh interpreter, as a new pod would. The import
+phase times ``import src.main`` and ranks top-level packages by their
+share of it (from ``-X importtime``); the ready phase starts uvicorn and
+times it until ``GET /health`` answers, which includes the lifespan
+startup. The ready phase needs the database and Redis from settings.
+
+Usage (from the backend directory):
+    python -m scripts.bench_startup --runs 5
+    python -m scripts.bench_startup --skip-ready
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import src.main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure_import() -> Tuple[float, Dict[str, float]]:
+    """Seconds to import the app, and seconds spent per top-level package."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SNIPPET],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    packages: Dict[str, float] = defaultdict(float)
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, _, name = line[len("import time:") :].split("|")
+        if not own.strip().isdigit():
+            continue  # Header row
+        packages[name.strip().split(".")[0]] += int(own) / 1e6
+    return float(completed.stdout.strip().splitlines()[-1]), packages
+
+
+def measure_ready(port: int, timeout: float) -> float:
+    """Seconds from process start until the health check succeeds."""
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(
+                    f"uvicorn exited with status {server.returncode}; run it directly to see why"
+                )
+            try:
+                url = f"http://127.0.0.1:{port}/health"
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"Not ready after {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def describe(samples: List[float]) -> str:
+    return (
+        f"median {statistics.median(samples) * 1e3:7.1f} ms  "
+        f"min {min(samples) * 1e3:7.1f} ms  max {max(samples) * 1e3:7.1f} ms"
+    )
+
+
+def main(runs: int, top: int, port: int, timeout: float, skip_ready: bool) -> int:
+    imports: List[float] = []
+    packages: Dict[str, float] = defaultdict(float)
+    for _ in range(runs):
+        elapsed, by_package = measure_import()
+        imports.append(elapsed)
+        for name, seconds in by_package.items():
+            packages[name] += seconds / runs
+    print(f"import src.main  {describe(imports)}")
+    for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<24} {seconds * 1e3:7.1f} ms")
+
+    if not skip_ready:
+        ready = [measure_ready(port, timeout) for _ in range(runs)]
+        print(f"ready (/health)  {describe(ready)}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest packages to list")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for readiness")
+    parser.add_argument("--skip-ready", action="store_true", help="Only measure import time")
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.top, args.port, args.timeout, args.skip_ready))
@@ -0,0 +1,74 @@
+"""Serve a fake OpenAI-compatible provider that injects latency and errors.
+
+Streams a short chat completion after a configurable time to first
+token. A share of requests can be made slow or fail with a 503, so
+circuit breakers, adaptive timeouts, hedging and retry budgets can be
+exercised locally.
+
+Usage (from the backend directory):
+    python -m scripts.fake_provider --ttft 0.2 --slow-rate 0.1 --slow-ttft 5
+    OPENAI_BASE_URL=http://127.0.0.1:8099/v1 uvicorn src.main:app
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from aiohttp import web
+
+WORDS = ["Hello", " from", " the", " fake", " provider"]
+
+
+def make_app(args: argparse.Namespace) -> web.Application:
+    async def completions(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        if random.random() < args.error_rate:
+            return web.json_response(
+                {"error": {"message": "Injected failure", "type": "server_error"}}, status=503
+            )
+
+        slow = random.random() < args.slow_rate
+        delay = (args.slow_ttft if slow else args.ttft) + random.uniform(0, args.jitter)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await asyncio.sleep(delay)
+        for word in WORDS:
+            chunk = {
+                "id": "fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await asyncio.sleep(args.token_interval)
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--ttft", type=float, default=0.2, help="Seconds to the first token")
+    parser.add_argument(
+        "--jitter", type=float, default=0.05, help="Random extra seconds per request"
+    )
+    parser.add_argument(
+        "--slow-rate", type=float, default=0.0, help="Share of requests that are slow"
+    )
+    parser.add_argument(
+        "--slow-ttft", type=float, default=5.0, help="Seconds to the first token when slow"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of requests failing with 503"
+    )
+    parser.add_argument("--token-interval", type=float, default=0.01, help="Seconds between tokens")
+    args = parser.parse_args()
+    web.run_app(make_app(args), host=args.host, port=args.port)
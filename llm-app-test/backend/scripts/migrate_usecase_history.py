@@ -0,0 +1,86 @@
+"""Move UseCase.execution_history entries into the use_case_runs table.
+
+Each use case's entries are inserted as runs and its JSON list is cleared
+in the same transaction, so the migration can be interrupted and re-run
+safely. Entries keep their original timestamp where one was recorded.
+
+Usage (from the backend directory):
+    python -m scripts.migrate_usecase_history --batch 200
+    python -m scripts.migrate_usecase_history --dry-run
+"""
+
+import argparse
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+
+from src.config.database import AsyncSessionLocal, engine
+from src.models.usecase import UseCase
+from src.services.usecase.manager import build_run, record_runs
+
+
+def parse_time(value: Any) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def to_run(use_case: UseCase, entry: Dict[str, Any]) -> Dict[str, Any]:
+    run = build_run(
+        use_case.id,
+        {
+            "provider": entry.get("provider") or "unknown",
+            "model": entry.get("model") or "unknown",
+            "content": entry.get("content") or entry.get("output") or "",
+            **{k: entry.get(k) for k in ("status", "error", "latency", "ttft", "usage", "cost")},
+        },
+        use_case.expected_output,
+        parse_time(entry.get("fired_at")),
+    )
+    if entry.get("score") is not None:
+        run["score"] = entry["score"]
+    created_at = parse_time(entry.get("created_at") or entry.get("executed_at")) or run["fired_at"]
+    if created_at is not None:
+        run["created_at"] = created_at
+    return run
+
+
+async def main(batch: int, dry_run: bool) -> None:
+    moved_cases = moved_runs = 0
+    after = None
+    while True:
+        async with AsyncSessionLocal() as db:
+            query = select(UseCase).filter(func.json_array_length(UseCase.execution_history) > 0)
+            if after is not None:
+                query = query.filter(UseCase.id > after)
+            use_cases = (await db.execute(query.order_by(UseCase.id).limit(batch))).scalars().all()
+            if not use_cases:
+                break
+            for use_case in use_cases:
+                runs = [to_run(use_case, entry) for entry in use_case.execution_history]
+                # A bulk INSERT needs every row to name the same columns
+                stamped = [run for run in runs if "created_at" in run]
+                await record_runs(db, stamped)
+                await record_runs(db, [run for run in runs if "created_at" not in run])
+                use_case.execution_history = []
+                moved_runs += len(runs)
+            moved_cases += len(use_cases)
+            after = use_cases[-1].id
+            if dry_run:
+                await db.rollback()
+            else:
+                await db.commit()
+        print(f"{moved_cases} use cases, {moved_runs} runs")
+    await engine.dispose()
+    print(f"{'Would move' if dry_run else 'Moved'} {moved_runs} runs from {moved_cases} use cases")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=200, help="Use cases per transaction")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch, args.dry_run))
@@ -0,0 +1,45 @@
+"""Rebuild or verify the rating statistics rollups.
+
+``backfill`` recomputes the daily and all-time rating histograms from
+the evaluations table; ``check`` compares the two and exits non-zero on
+any mismatch.
+
+Usage (from the backend directory):
+    python -m scripts.rollup_ratings backfill
+    python -m scripts.rollup_ratings check --user <uuid>
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Optional
+from uuid import UUID
+
+from src.config.database import AsyncSessionLocal, engine
+from src.services.evaluation.ratings import backfill, check_consistency
+
+
+async def main(command: str, user_id: Optional[UUID]) -> int:
+    try:
+        async with AsyncSessionLocal() as db:
+            if command == "backfill":
+                rows = await backfill(db, user_id=user_id)
+                print(f"Rebuilt {rows} rollup rows")
+                return 0
+            mismatches = await check_consistency(db, user_id=user_id)
+    finally:
+        await engine.dispose()
+
+    for mismatch in mismatches:
+        print(json.dumps(mismatch, default=str))
+    print(f"{len(mismatches)} mismatched buckets", file=sys.stderr)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("backfill", "check"))
+    parser.add_argument("--user", type=UUID, help="Limit to one user id")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.command, args.user)))
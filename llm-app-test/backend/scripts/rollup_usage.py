@@ -0,0 +1,52 @@
+"""Rebuild or verify the dashboard usage rollups.
+
+``backfill`` recomputes the hourly and daily rollups from the raw
+responses stored on each message; ``check`` compares the two and exits
+non-zero on any mismatch.
+
+Usage (from the backend directory):
+    python -m scripts.rollup_usage backfill --since 2024-01-01
+    python -m scripts.rollup_usage check --user <uuid>
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+
+from src.config.database import AsyncSessionLocal, engine
+from src.services.dashboard.rollup import backfill, check_consistency
+
+
+def parse_since(value: str) -> datetime:
+    since = datetime.fromisoformat(value)
+    return since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+
+
+async def main(command: str, since: Optional[datetime], user_id: Optional[UUID]) -> int:
+    try:
+        async with AsyncSessionLocal() as db:
+            if command == "backfill":
+                rows = await backfill(db, since=since, user_id=user_id)
+                print(f"Rebuilt {rows} rollup rows")
+                return 0
+            mismatches = await check_consistency(db, since=since, user_id=user_id)
+    finally:
+        await engine.dispose()
+
+    for mismatch in mismatches:
+        print(json.dumps(mismatch, default=str))
+    print(f"{len(mismatches)} mismatched buckets", file=sys.stderr)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("backfill", "check"))
+    parser.add_argument("--since", type=parse_since, help="ISO date; defaults to all history")
+    parser.add_argument("--user", type=UUID, help="Limit to one user id")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.command, args.since, args.user)))
@@ -0,0 +1,101 @@
+"""Backfill automatic evaluation metrics for stored chat history.
+
+Messages are read in id order, scored in a pool of worker processes and
+written back page by page. Progress lines print the last stored message
+id; pass it as --after to resume an interrupted run.
+
+Usage (from the backend directory):
+    python -m scripts.score_history --workers 8 --batch 1000
+    python -m scripts.score_history --since 2024-01-01 --after <uuid>
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Deque, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+
+from src.config.database import AsyncSessionLocal, engine
+from src.models.chat import Message
+from src.services.evaluation.auto_evaluation import store_scores
+from src.services.evaluation.metrics import score_batch
+
+
+def parse_since(value: str) -> datetime:
+    since = datetime.fromisoformat(value)
+    return since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+
+
+async def _read_page(after: Optional[UUID], since: Optional[datetime], size: int) -> List[Any]:
+    query = select(Message.id, Message.user_id, Message.responses)
+    if after is not None:
+        query = query.filter(Message.id > after)
+    if since is not None:
+        query = query.filter(Message.created_at >= since)
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(query.order_by(Message.id).limit(size))).all()
+
+
+async def _store(page: Sequence[Any], scores: Sequence[Any]) -> int:
+    async with AsyncSessionLocal() as db:
+        scored = await store_scores(db, [(row.id, row.user_id) for row in page], scores)
+        await db.commit()
+    return scored
+
+
+async def main(workers: int, batch: int, since: Optional[datetime], after: Optional[UUID]) -> int:
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    messages = responses = 0
+    pending: Deque[Tuple[Sequence[Any], "asyncio.Future[Any]"]] = deque()
+
+    async def store_oldest() -> None:
+        nonlocal messages, responses
+        page, future = pending.popleft()
+        responses += await _store(page, await future)
+        messages += len(page)
+        rate = messages / (time.perf_counter() - started)
+        print(f"Scored {messages} messages ({rate:.0f}/s) through {page[-1].id}", flush=True)
+
+    # Spawned workers import only the NumPy scoring code, never a
+    # database connection inherited from this process
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            while True:
+                page = await _read_page(after, since, batch)
+                if not page:
+                    break
+                after = page[-1].id
+                future = loop.run_in_executor(
+                    pool, score_batch, [row.responses or [] for row in page]
+                )
+                pending.append((page, future))
+                # Keep every worker busy without reading ahead unboundedly;
+                # pages are stored in order so the printed id is a safe resume point
+                if len(pending) >= workers * 2:
+                    await store_oldest()
+            while pending:
+                await store_oldest()
+    finally:
+        await engine.dispose()
+
+    print(f"Scored {responses} responses on {messages} messages", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--batch", type=int, default=1000, help="Messages per page")
+    parser.add_argument("--since", type=parse_since, help="ISO date; defaults to all history")
+    parser.add_argument("--after", type=UUID, help="Resume after this message id")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.workers, args.batch, args.since, args.after)))
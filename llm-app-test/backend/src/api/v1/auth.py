@@ -1,19 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from src.config.database import get_db
-from src.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
 from src.core.deps import get_current_user
+from src.core.security import (
+    create_access_token,
+    create_refresh_token,
+    get_password_hash_async,
+    verify_password_async,
+)
 from src.models.user import User
 from src.schemas.user import (
-    UserCreate, 
-    User as UserSchema, 
-    UserLogin, 
-    TokenResponse,
     ApiKeysUpdate,
-    PasswordChange
+    PasswordChange,
+    TokenResponse,
 )
+from src.schemas.user import User as UserSchema
+from src.schemas.user import UserCreate
+from src.services.auth_service import invalidate_user
 
 router = APIRouter()
 
@@ -31,23 +37,23 @@ async def register(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
-    
+
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
         name=user_data.name,
     )
-    
+
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
-    
+
     # Create tokens
     access_token = create_access_token(subject=str(db_user.id))
     refresh_token = create_refresh_token(subject=str(db_user.id))
-    
+
     return TokenResponse(
         token=access_token,
         user=UserSchema.from_orm(db_user),
@@ -63,24 +69,24 @@ async def login(
     # Get user by email
     result = await db.execute(select(User).filter(User.email == form_data.username))
     user = result.scalar_one_or_none()
-    
-    if not user or not verify_password(form_data.password, user.hashed_password):
+
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user",
         )
-    
+
     # Create tokens
     access_token = create_access_token(subject=str(user.id))
     refresh_token = create_refresh_token(subject=str(user.id))
-    
+
     return TokenResponse(
         token=access_token,
         user=UserSchema.from_orm(user),
@@ -104,18 +110,19 @@ async def update_api_keys(
     """Update user API keys."""
     # Update API keys (in a real app, these should be encrypted)
     updated_keys = current_user.api_keys.copy()
-    
+
     if api_keys.openai is not None:
         updated_keys["openai"] = api_keys.openai
     if api_keys.google is not None:
         updated_keys["google"] = api_keys.google
     if api_keys.anthropic is not None:
         updated_keys["anthropic"] = api_keys.anthropic
-    
+
     current_user.api_keys = updated_keys
     await db.commit()
     await db.refresh(current_user)
-    
+    await invalidate_user(current_user.id)
+
     return UserSchema.from_orm(current_user)
 
 
@@ -126,19 +133,22 @@ async def change_password(
     db: AsyncSession = Depends(get_db),
 ):
     """Change user password."""
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await verify_password_async(
+        password_data.current_password, current_user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect current password",
         )
-    
-    current_user.hashed_password = get_password_hash(password_data.new_password)
+
+    current_user.hashed_password = await get_password_hash_async(password_data.new_password)
     await db.commit()
-    
+    await invalidate_user(current_user.id)
+
     return {"message": "Password updated successfully"}
 
 
 @router.post("/logout")
 async def logout():
     """Logout user (client should remove token)."""
-    return {"message": "Successfully logged out"}
\ No newline at end of file
+    return {"message": "Successfully logged out"}
@@ -1,13 +1,49 @@
-from fastapi import APIRouter, Depends
-from src.core.deps import get_current_user
-from src.models.user import User
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import get_db
+from src.config.settings import settings
+from src.core.deps import enforce_rate_limits, get_current_principal, get_current_user_id
+from src.models.chat import ChatSession, ExportJob
+from src.schemas.chat import (
+    ExportCreate,
+)
+from src.schemas.chat import ExportJob as ExportJobSchema
+from src.schemas.chat import MessageCreate, MessagePage, MessageSearchPage
+from src.schemas.user import Principal as PrincipalSchema
+from src.services import chat_service, export_service
+from src.services.auth_service import load_api_keys
+from src.services.chat_context import build_contexts, claim_summary
+from src.services.llm.tokens import check_budget
+from src.tasks.chat_tasks import export_history, summarize_context
+from src.utils.pagination import decode_cursor, decode_rank_cursor
 
 router = APIRouter()
 
 
+async def _ensure_session_owner(db: AsyncSession, session_id: UUID, user_id: UUID) -> None:
+    """404 unless the chat session exists and belongs to the user."""
+    result = await db.execute(
+        select(ChatSession.id).filter(
+            ChatSession.id == session_id,
+            ChatSession.user_id == user_id,
+        )
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat session not found",
+        )
+
+
 @router.get("/sessions")
 async def get_chat_sessions(
-    current_user: User = Depends(get_current_user),
+    current_user: PrincipalSchema = Depends(get_current_principal),
 ):
     """Get user's chat sessions."""
     return {"message": "Chat sessions endpoint - to be implemented"}
@@ -15,25 +51,239 @@ async def get_chat_sessions(
 
 @router.post("/sessions")
 async def create_chat_session(
-    current_user: User = Depends(get_current_user),
+    current_user: PrincipalSchema = Depends(get_current_principal),
 ):
     """Create a new chat session."""
     return {"message": "Create chat session endpoint - to be implemented"}
 
 
-@router.get("/sessions/{session_id}/messages")
+@router.get("/search", response_model=MessageSearchPage)
+async def search_messages(
+    q: str = Query(..., min_length=1, max_length=500),
+    tags: Optional[List[str]] = Query(None),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, gt=0),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Search the user's chat history, ranked and highlighted.
+
+    ``tags`` may be repeated; only sessions with every tag are searched.
+    """
+    if cursor:
+        try:
+            decode_rank_cursor(cursor)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc),
+            )
+
+    items, next_cursor = await chat_service.search_messages(
+        db,
+        user_id,
+        q,
+        tags=tags,
+        cursor=cursor,
+        limit=limit,
+    )
+    return MessageSearchPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/sessions/{session_id}/messages", response_model=MessagePage)
 async def get_messages(
-    session_id: str,
-    current_user: User = Depends(get_current_user),
+    session_id: UUID,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, gt=0),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    include_responses: bool = False,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Get messages for a chat session."""
-    return {"message": "Get messages endpoint - to be implemented"}
+    """Get messages for a chat session, one keyset page at a time.
+
+    ``format=ndjson`` streams everything after ``cursor`` instead of a page.
+    """
+    await _ensure_session_owner(db, session_id, user_id)
+
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc),
+            )
+
+    descending = order == "desc"
+    if format == "ndjson":
+        return StreamingResponse(
+            chat_service.stream_messages(
+                session_id,
+                cursor=cursor,
+                descending=descending,
+                include_responses=include_responses,
+            ),
+            media_type="application/x-ndjson",
+        )
+
+    items, next_cursor = await chat_service.list_messages(
+        db,
+        session_id,
+        cursor=cursor,
+        limit=limit,
+        descending=descending,
+        include_responses=include_responses,
+    )
+    return MessagePage(items=items, next_cursor=next_cursor)
 
 
 @router.post("/sessions/{session_id}/messages")
 async def send_message(
-    session_id: str,
-    current_user: User = Depends(get_current_user),
+    session_id: UUID,
+    message: MessageCreate,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Send a message to multiple LLMs and stream their tokens as SSE."""
+    await _ensure_session_owner(db, session_id, user_id)
+
+    targets = [(target.provider, target.model) for target in message.targets]
+    windows = await build_contexts(
+        db, session_id, targets, message.content, max_tokens=message.max_tokens
+    )
+    contexts = {target: window.messages for target, window in windows.items()}
+    try:
+        check_budget(
+            targets,
+            [{"role": "user", "content": message.content}],
+            message.max_tokens,
+            contexts=contexts,
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        )
+
+    rate_limit_headers = await enforce_rate_limits(
+        user_id, (target.provider for target in message.targets)
+    )
+
+    # Turns that no longer fit are summarized off the request path; this
+    # turn goes out without them and later turns start from the summary.
+    # One summary per thread is queued at a time
+    if settings.CHAT_CONTEXT_SUMMARY_ENABLED:
+        for (provider, model), window in windows.items():
+            if window.overflow is not None and await claim_summary(session_id, provider, model):
+                summarize_context.delay(
+                    str(session_id), provider, model, str(window.overflow[1]), str(user_id)
+                )
+
+    # The request-scoped db session is closed before the body streams,
+    # so the stream persists through its own session
+    events = chat_service.stream_message(
+        session_id,
+        message.content,
+        targets,
+        params={"temperature": message.temperature, "max_tokens": message.max_tokens},
+        api_keys=await load_api_keys(db, user_id),
+        timeout=message.timeout,
+        deadline=message.deadline,
+        user_id=user_id,
+        use_cache=message.use_cache,
+        contexts=contexts,
+    )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **rate_limit_headers},
+    )
+
+
+@router.get("/sessions/{session_id}/export")
+async def export_session(
+    session_id: UUID,
+    export_format: str = Query("json", alias="format", pattern="^(json|csv)$"),
+    gzip: bool = False,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Download a session with its responses and evaluations as JSON or CSV.
+
+    The body is streamed from a server-side cursor with chunked encoding.
+    """
+    await _ensure_session_owner(db, session_id, user_id)
+
+    filename = export_service.export_filename(export_format, gzip, f"session-{session_id}")
+    return StreamingResponse(
+        export_service.stream_export(user_id, session_id, export_format, compress=gzip),
+        media_type="application/gzip" if gzip else export_service.MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/exports", response_model=ExportJobSchema, status_code=status.HTTP_202_ACCEPTED)
+async def create_export(
+    export: ExportCreate,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Export the whole account, or one session, in the background."""
+    if export.session_id is not None:
+        await _ensure_session_owner(db, export.session_id, user_id)
+
+    job = ExportJob(
+        user_id=user_id,
+        session_id=export.session_id,
+        format=export.format,
+        compress=export.gzip,
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    export_history.delay(str(job.id))
+    return job
+
+
+async def _get_export(db: AsyncSession, job_id: UUID, user_id: UUID) -> ExportJob:
+    job = await db.get(ExportJob, job_id)
+    if job is None or job.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export not found",
+        )
+    return job
+
+
+@router.get("/exports/{job_id}", response_model=ExportJobSchema)
+async def get_export(
+    job_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Send a message to multiple LLMs."""
-    return {"message": "Send message endpoint - to be implemented"}
\ No newline at end of file
+    """Get an export job's status."""
+    return await _get_export(db, job_id, user_id)
+
+
+@router.get("/exports/{job_id}/download")
+async def download_export(
+    job_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Download a completed export."""
+    job = await _get_export(db, job_id, user_id)
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export is {job.status}",
+        )
+
+    return FileResponse(
+        export_service.export_path(job.path),
+        media_type="application/gzip" if job.compress else export_service.MEDIA_TYPES[job.format],
+        filename=export_service.export_filename(job.format, job.compress, f"export-{job.id}"),
+    )
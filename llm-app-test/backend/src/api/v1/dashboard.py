@@ -1,29 +1,42 @@
-from fastapi import APIRouter, Depends
-from src.core.deps import get_current_user
-from src.models.user import User
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import get_db
+from src.core.deps import get_current_user_id
+from src.schemas.dashboard import CostAnalysis, DashboardStats, UsageMetrics
+from src.services.dashboard import statistics
 
 router = APIRouter()
 
 
-@router.get("/stats")
+@router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
-    current_user: User = Depends(get_current_user),
+    days: int = Query(30, gt=0, le=366),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get dashboard statistics."""
-    return {"message": "Dashboard stats endpoint - to be implemented"}
+    return await statistics.get_stats(db, user_id, days)
 
 
-@router.get("/usage")
+@router.get("/usage", response_model=UsageMetrics)
 async def get_usage_metrics(
-    current_user: User = Depends(get_current_user),
+    days: int = Query(7, gt=0, le=366),
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get usage metrics."""
-    return {"message": "Usage metrics endpoint - to be implemented"}
+    return await statistics.get_usage(db, user_id, days, granularity)
 
 
-@router.get("/costs")
+@router.get("/costs", response_model=CostAnalysis)
 async def get_cost_analysis(
-    current_user: User = Depends(get_current_user),
+    days: int = Query(30, gt=0, le=366),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get cost analysis."""
-    return {"message": "Cost analysis endpoint - to be implemented"}
\ No newline at end of file
+    return await statistics.get_costs(db, user_id, days)
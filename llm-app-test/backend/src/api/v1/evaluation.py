@@ -1,29 +1,88 @@
-from fastapi import APIRouter, Depends
-from src.core.deps import get_current_user
-from src.models.user import User
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import get_db
+from src.config.settings import settings
+from src.core.deps import get_current_principal, get_current_user_id
+from src.schemas.evaluation import Evaluation, EvaluationStats, RatingBatch, RatingCreate
+from src.schemas.user import Principal as PrincipalSchema
+from src.services.evaluation import ratings
 
 router = APIRouter()
 
 
-@router.post("/rate")
+def _is_empty(rating: RatingCreate) -> bool:
+    given = [getattr(rating, f"{dimension}_rating") for dimension in ratings.DIMENSIONS]
+    return all(value is None for value in given) and rating.feedback is None
+
+
+@router.post("/rate", response_model=Evaluation)
 async def rate_response(
-    current_user: User = Depends(get_current_user),
+    rating: RatingCreate,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
     """Rate an LLM response."""
-    return {"message": "Rate response endpoint - to be implemented"}
+    if _is_empty(rating):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No rating or feedback given",
+        )
+
+    evaluation = await ratings.rate_response(db, user_id, rating)
+    if evaluation is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Message not found",
+        )
+    return evaluation
+
+
+@router.post("/rate/batch", response_model=List[Evaluation])
+async def rate_responses(
+    batch: RatingBatch,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Rate many LLM responses in one transaction; all are stored or none."""
+    if len(batch.ratings) > settings.RATING_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.RATING_BATCH_MAX} ratings per batch",
+        )
+    empty = [index for index, rating in enumerate(batch.ratings) if _is_empty(rating)]
+    if empty:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No rating or feedback given at positions {empty}",
+        )
+
+    evaluations, missing = await ratings.rate_responses(db, user_id, batch.ratings)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Messages not found: {', '.join(str(message_id) for message_id in missing)}",
+        )
+    return evaluations
 
 
-@router.get("/stats")
+@router.get("/stats", response_model=EvaluationStats)
 async def get_evaluation_stats(
-    current_user: User = Depends(get_current_user),
+    days: Optional[int] = Query(None, gt=0, le=366),
+    provider: Optional[str] = None,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Get evaluation statistics."""
-    return {"message": "Evaluation stats endpoint - to be implemented"}
+    """Get rating statistics per provider and dimension, all time or for recent days."""
+    return await ratings.get_rating_stats(db, user_id, days, provider)
 
 
 @router.get("/history")
 async def get_evaluation_history(
-    current_user: User = Depends(get_current_user),
+    current_user: PrincipalSchema = Depends(get_current_principal),
 ):
     """Get evaluation history."""
-    return {"message": "Evaluation history endpoint - to be implemented"}
\ No newline at end of file
+    return {"message": "Evaluation history endpoint - to be implemented"}
@@ -1,29 +1,83 @@
-from fastapi import APIRouter, Depends
-from src.core.deps import get_current_user
-from src.models.user import User
+import time
+from typing import List
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import get_db
+from src.core.deps import enforce_rate_limits, get_current_principal, get_current_user_id
+from src.schemas.llm import LLMQueryRequest, LLMQueryResponse, LLMResponse, ProviderHealth
+from src.schemas.user import Principal as PrincipalSchema
+from src.services.auth_service import load_api_keys
+from src.services.llm.coordinator import LLMCoordinator
+from src.services.llm.resilience import resilience
+from src.services.llm.tokens import check_budget
 
 router = APIRouter()
 
 
 @router.get("/providers")
 async def get_providers(
-    current_user: User = Depends(get_current_user),
+    current_user: PrincipalSchema = Depends(get_current_principal),
 ):
     """Get available LLM providers and models."""
     return {"message": "LLM providers endpoint - to be implemented"}
 
 
+@router.get("/health", response_model=List[ProviderHealth])
+async def get_provider_health(
+    current_user: PrincipalSchema = Depends(get_current_principal),
+):
+    """Circuit breaker state, latency and retry counters of this worker's provider calls."""
+    return resilience.snapshot()
+
+
 @router.post("/test-connection")
 async def test_connection(
-    current_user: User = Depends(get_current_user),
+    current_user: PrincipalSchema = Depends(get_current_principal),
 ):
     """Test LLM provider connections."""
     return {"message": "Test connection endpoint - to be implemented"}
 
 
-@router.post("/query")
+@router.post("/query", response_model=LLMQueryResponse)
 async def query_llms(
-    current_user: User = Depends(get_current_user),
+    query: LLMQueryRequest,
+    response: Response,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
     """Query multiple LLMs simultaneously."""
-    return {"message": "Query LLMs endpoint - to be implemented"}
\ No newline at end of file
+    targets = [(target.provider, target.model) for target in query.targets]
+    try:
+        check_budget(targets, [{"role": "user", "content": query.prompt}], query.max_tokens)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        )
+
+    response.headers.update(await enforce_rate_limits(user_id, (t.provider for t in query.targets)))
+
+    coordinator = LLMCoordinator(
+        api_keys=await load_api_keys(db, user_id),
+        timeout=query.timeout,
+        deadline=query.deadline,
+        user_id=user_id,
+        use_cache=query.use_cache,
+        hedge=query.hedge,
+    )
+
+    start = time.perf_counter()
+    results = await coordinator.query(
+        targets,
+        prompt=query.prompt,
+        params={"temperature": query.temperature, "max_tokens": query.max_tokens},
+        wait_for=query.wait_for,
+    )
+
+    return LLMQueryResponse(
+        results=[LLMResponse.model_validate(result) for result in results],
+        latency=time.perf_counter() - start,
+    )
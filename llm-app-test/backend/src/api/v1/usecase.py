@@ -1,13 +1,55 @@
-from fastapi import APIRouter, Depends
-from src.core.deps import get_current_user
-from src.models.user import User
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import get_db
+from src.core.deps import enforce_rate_limits, get_current_principal, get_current_user_id
+from src.models.usecase import UseCase, UseCaseJob
+from src.schemas.llm import LLMTarget
+from src.schemas.usecase import (
+    UseCaseExecute,
+)
+from src.schemas.usecase import UseCaseJob as UseCaseJobSchema
+from src.schemas.usecase import UseCaseJobCreate
+from src.schemas.usecase import UseCaseRun as UseCaseRunSchema
+from src.schemas.usecase import UseCaseRunPage
+from src.schemas.user import Principal as PrincipalSchema
+from src.services.auth_service import load_api_keys
+from src.services.usecase import manager
+from src.services.usecase.dataset import resolve_dataset
+from src.services.usecase.executor import execute_once
+from src.tasks.usecase_tasks import run_dataset
+from src.utils.pagination import decode_cursor
 
 router = APIRouter()
 
 
+async def _get_use_case(db: AsyncSession, use_case_id: UUID, user_id: UUID) -> UseCase:
+    use_case = await manager.get_owned_use_case(db, use_case_id, user_id)
+    if use_case is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Use case not found",
+        )
+    return use_case
+
+
+def _resolve_targets(use_case: UseCase, targets: Optional[List[LLMTarget]]) -> List[dict]:
+    resolved = [target.model_dump() for target in targets] if targets else use_case.targets
+    if not resolved:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No targets given and the use case has none configured",
+        )
+    return resolved
+
+
 @router.get("/")
 async def get_use_cases(
-    current_user: User = Depends(get_current_user),
+    current_user: PrincipalSchema = Depends(get_current_principal),
 ):
     """Get user's use cases."""
     return {"message": "Use cases endpoint - to be implemented"}
@@ -15,7 +57,7 @@ async def get_use_cases(
 
 @router.post("/")
 async def create_use_case(
-    current_user: User = Depends(get_current_user),
+    current_user: PrincipalSchema = Depends(get_current_principal),
 ):
     """Create a new use case."""
     return {"message": "Create use case endpoint - to be implemented"}
@@ -24,16 +66,152 @@ async def create_use_case(
 @router.put("/{use_case_id}")
 async def update_use_case(
     use_case_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: PrincipalSchema = Depends(get_current_principal),
 ):
     """Update a use case."""
     return {"message": "Update use case endpoint - to be implemented"}
 
 
-@router.post("/{use_case_id}/execute")
+@router.post("/{use_case_id}/execute", response_model=List[UseCaseRunSchema])
 async def execute_use_case(
-    use_case_id: str,
-    current_user: User = Depends(get_current_user),
+    use_case_id: UUID,
+    execution: UseCaseExecute,
+    response: Response,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Execute a use case."""
-    return {"message": "Execute use case endpoint - to be implemented"}
\ No newline at end of file
+    """Execute a use case once against every target."""
+    use_case = await _get_use_case(db, use_case_id, user_id)
+    targets = _resolve_targets(use_case, execution.targets)
+    response.headers.update(await enforce_rate_limits(user_id, (t["provider"] for t in targets)))
+
+    try:
+        return await execute_once(
+            use_case,
+            await load_api_keys(db, user_id),
+            [(target["provider"], target["model"]) for target in targets],
+            execution.variables,
+            params={"temperature": execution.temperature, "max_tokens": execution.max_tokens},
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        )
+
+
+@router.post(
+    "/{use_case_id}/jobs",
+    response_model=UseCaseJobSchema,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_use_case_job(
+    use_case_id: UUID,
+    job_in: UseCaseJobCreate,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Run a use case over every row of an uploaded dataset in the background."""
+    use_case = await _get_use_case(db, use_case_id, user_id)
+    targets = _resolve_targets(use_case, job_in.targets)
+    try:
+        resolve_dataset(job_in.dataset)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        )
+
+    job = UseCaseJob(
+        use_case_id=use_case.id,
+        dataset=job_in.dataset,
+        targets=targets,
+        params={"temperature": job_in.temperature, "max_tokens": job_in.max_tokens},
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    run_dataset.delay(str(job.id))
+    return job
+
+
+async def _get_job(db: AsyncSession, use_case_id: UUID, job_id: UUID, user_id: UUID) -> UseCaseJob:
+    await _get_use_case(db, use_case_id, user_id)
+    job = await db.get(UseCaseJob, job_id)
+    if job is None or job.use_case_id != use_case_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+    return job
+
+
+@router.get("/{use_case_id}/jobs/{job_id}", response_model=UseCaseJobSchema)
+async def get_use_case_job(
+    use_case_id: UUID,
+    job_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get a dataset job's status, progress and ETA."""
+    return await _get_job(db, use_case_id, job_id, user_id)
+
+
+@router.post(
+    "/{use_case_id}/jobs/{job_id}/resume",
+    response_model=UseCaseJobSchema,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def resume_use_case_job(
+    use_case_id: UUID,
+    job_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Resume a failed job from its last checkpoint."""
+    job = await _get_job(db, use_case_id, job_id, user_id)
+    if job.status == "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Job already completed",
+        )
+
+    # A job still owned by a live worker is left alone by the claim
+    run_dataset.delay(str(job.id))
+    return job
+
+
+@router.get("/{use_case_id}/runs", response_model=UseCaseRunPage)
+async def get_use_case_runs(
+    use_case_id: UUID,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, gt=0),
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    since: Optional[datetime] = None,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get a use case's execution history, newest first."""
+    await _get_use_case(db, use_case_id, user_id)
+
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc),
+            )
+
+    items, next_cursor = await manager.list_runs(
+        db,
+        use_case_id,
+        cursor=cursor,
+        limit=limit,
+        provider=provider,
+        model=model,
+        since=since,
+    )
+    return UseCaseRunPage(items=items, next_cursor=next_cursor)
@@ -1,21 +1,115 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+from uuid import uuid4
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
 from src.config.settings import settings
+from src.utils.metrics import Counter, Gauge, Histogram, registry
+
+logger = logging.getLogger(__name__)
 
 # Convert sync postgresql URL to async
 DATABASE_URL = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
 
+
+class PoolStats:
+    """Process-local counters for connection pool checkouts."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.connects = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_total += seconds
+        if seconds > self.wait_max:
+            self.wait_max = seconds
+
+
+pool_stats = PoolStats()
+
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_CONNECTS = Counter("db_pool_connects_total", "New database connections opened")
+DB_POOL_CONNECTIONS = Gauge("db_pool_connections", "Pooled connections by state", ("state",))
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            waited = time.perf_counter() - start
+            pool_stats.record_wait(waited)
+            DB_POOL_WAIT_SECONDS.observe(waited)
+
+
+def _engine_options() -> Dict[str, Any]:
+    """Build engine keyword arguments for the configured pool mode.
+
+    ``queue`` keeps a sized pool of warm asyncpg connections with
+    prepared statement caching. ``pgbouncer`` keeps the pool but turns
+    statement caching off, since PgBouncer in transaction mode may hand
+    each transaction a different server connection. ``null`` opens a
+    fresh connection per session, for short-lived scripts and workers
+    that run a new event loop per job.
+    """
+    mode = settings.DATABASE_POOL_MODE
+    if mode == "null":
+        return {"poolclass": NullPool}
+
+    options: Dict[str, Any] = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+    }
+    if mode == "pgbouncer":
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            # Unnamed statements can collide across pooled server connections
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    elif mode == "queue":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+        }
+    else:
+        raise ValueError(f"Unknown DATABASE_POOL_MODE '{mode}'")
+    return options
+
+
 # Create async engine
 engine = create_async_engine(
     DATABASE_URL,
     echo=settings.DEBUG,
-    pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    pool_pre_ping=True,
-    poolclass=None if settings.DEBUG else NullPool,
+    **_engine_options(),
 )
 
+
+@event.listens_for(engine.sync_engine, "connect")
+def _count_connect(dbapi_connection, connection_record):
+    pool_stats.connects += 1
+    DB_POOL_CONNECTS.inc()
+
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -35,4 +129,50 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+
+async def warm_up_pool() -> None:
+    """Open pooled connections at startup so first requests skip the handshake."""
+    count = min(settings.DATABASE_POOL_WARMUP, settings.DATABASE_POOL_SIZE)
+    if settings.DATABASE_POOL_MODE == "null" or count <= 0:
+        return
+
+    connections = [engine.connect() for _ in range(count)]
+    try:
+        await asyncio.gather(*(conn.start() for conn in connections))
+    finally:
+        await asyncio.gather(*(conn.close() for conn in connections), return_exceptions=True)
+    logger.info("Warmed up %d database connections", count)
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Return checkout counters and current pool occupancy."""
+    stats: Dict[str, Any] = {
+        "mode": settings.DATABASE_POOL_MODE,
+        "checkouts": pool_stats.checkouts,
+        "connects": pool_stats.connects,
+        "wait_total": pool_stats.wait_total,
+        "wait_max": pool_stats.wait_max,
+        "wait_avg": pool_stats.wait_total / pool_stats.checkouts if pool_stats.checkouts else 0.0,
+    }
+    pool = engine.pool
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    return stats
+
+
+def _collect_pool_connections() -> None:
+    pool = engine.pool
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        DB_POOL_CONNECTIONS.set(pool.checkedout(), "checked_out")
+        DB_POOL_CONNECTIONS.set(pool.checkedin(), "idle")
+        DB_POOL_CONNECTIONS.set(max(pool.overflow(), 0), "overflow")
+
+
+registry.add_collector(_collect_pool_connections)
@@ -0,0 +1,86 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from src.config.settings import settings
+
+# One pooled client per provider, shared by every adapter instance
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+# Clients private to a short-lived event loop (see scoped_http_clients)
+_scoped_clients: ContextVar[Optional[Dict[str, httpx.AsyncClient]]] = ContextVar(
+    "scoped_http_clients", default=None
+)
+
+
+def _client_options(provider: str) -> Dict[str, Any]:
+    """Merge the global HTTP defaults with a provider's overrides."""
+    options: Dict[str, Any] = {
+        "max_connections": settings.HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        "keepalive_expiry": settings.HTTP_KEEPALIVE_EXPIRY,
+        "http2": settings.HTTP2_ENABLED,
+        "connect_timeout": settings.HTTP_CONNECT_TIMEOUT,
+    }
+    options.update(settings.LLM_HTTP_OVERRIDES.get(provider, {}))
+    return options
+
+
+def _create_client(provider: str) -> httpx.AsyncClient:
+    options = _client_options(provider)
+    return httpx.AsyncClient(
+        http2=options["http2"],
+        limits=httpx.Limits(
+            max_connections=options["max_connections"],
+            max_keepalive_connections=options["max_keepalive_connections"],
+            keepalive_expiry=options["keepalive_expiry"],
+        ),
+        # Read timeouts are owned by the fan-out coordinator
+        timeout=httpx.Timeout(None, connect=options["connect_timeout"]),
+    )
+
+
+def init_http_clients(*providers: str) -> None:
+    """Create the pooled clients up front (called from the app lifespan)."""
+    for provider in providers:
+        if provider not in _clients:
+            _clients[provider] = _create_client(provider)
+
+
+def get_http_client(provider: str) -> httpx.AsyncClient:
+    """Return the shared client for a provider, creating it on first use."""
+    clients = _scoped_clients.get()
+    if clients is None:
+        clients = _clients
+    client = clients.get(provider)
+    if client is None or client.is_closed:
+        client = clients[provider] = _create_client(provider)
+    return client
+
+
+@asynccontextmanager
+async def scoped_http_clients() -> AsyncIterator[None]:
+    """Give everything awaited inside the block its own clients, closed on exit.
+
+    Pooled connections belong to the event loop that opened them, so code
+    that runs on a throwaway loop (a Celery job) must not touch the
+    process-wide clients.
+    """
+    clients: Dict[str, httpx.AsyncClient] = {}
+    token = _scoped_clients.set(clients)
+    try:
+        yield
+    finally:
+        _scoped_clients.reset(token)
+        while clients:
+            _, client = clients.popitem()
+            await client.aclose()
+
+
+async def close_http_clients() -> None:
+    """Close every pooled client and drop its connections."""
+    while _clients:
+        _, client = _clients.popitem()
+        await client.aclose()
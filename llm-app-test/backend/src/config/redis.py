@@ -1,14 +1,103 @@
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Optional
+
 import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+from redis.asyncio.connection import ConnectionPool
+
 from src.config.settings import settings
+from src.utils.metrics import Histogram
+
+REDIS_COMMAND_SECONDS = Histogram(
+    "redis_command_duration_seconds",
+    "Redis round-trip time per command; pipelines count as one PIPELINE",
+    ("command",),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0),
+)
+
+# Pools private to a short-lived event loop (see scoped_redis), by client
+_scoped_pools: ContextVar[Optional[Dict[int, ConnectionPool]]] = ContextVar(
+    "scoped_redis_pools", default=None
+)
+
+
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_SECONDS.observe(time.perf_counter() - start, "PIPELINE")
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client that records the latency of every command it sends.
+
+    Inside ``scoped_redis`` it talks through a pool of its own, so one
+    module-level client serves every event loop.
+    """
+
+    @property
+    def connection_pool(self) -> ConnectionPool:
+        pools = _scoped_pools.get()
+        if pools is None:
+            return self._connection_pool
+        pool = pools.get(id(self))
+        if pool is None:
+            shared = self._connection_pool
+            pool = pools[id(self)] = shared.__class__(
+                connection_class=shared.connection_class,
+                max_connections=shared.max_connections,
+                **shared.connection_kwargs,
+            )
+        return pool
+
+    @connection_pool.setter
+    def connection_pool(self, pool: ConnectionPool) -> None:
+        self._connection_pool = pool
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.observe(time.perf_counter() - start, args[0])
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> Pipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
 
 # Create Redis client
-redis_client = redis.from_url(
+redis_client = InstrumentedRedis.from_url(
     settings.REDIS_URL,
     encoding="utf-8",
     decode_responses=True,
 )
 
 
+@asynccontextmanager
+async def scoped_redis() -> AsyncIterator[None]:
+    """Give everything awaited inside the block its own Redis connections.
+
+    Connections belong to the event loop that opened them, so code on a
+    throwaway loop must not reuse the process-wide pool while another
+    loop is using it.
+    """
+    pools: Dict[int, ConnectionPool] = {}
+    token = _scoped_pools.set(pools)
+    try:
+        yield
+    finally:
+        _scoped_pools.reset(token)
+        while pools:
+            _, pool = pools.popitem()
+            await pool.disconnect()
+
+
 async def get_redis():
     """Dependency to get Redis client."""
-    return redis_client
\ No newline at end of file
+    return redis_client
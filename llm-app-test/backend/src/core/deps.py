@@ -1,11 +1,18 @@
-from typing import Optional
+from typing import Dict, Iterable
+from uuid import UUID
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+
 from src.config.database import get_db
+from src.config.settings import settings
 from src.core.security import verify_token
 from src.models.user import User
-from sqlalchemy import select
+from src.schemas.user import Principal as PrincipalSchema
+from src.services.auth_service import get_principal
+from src.services.llm.rate_limiter import rate_limiter
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -20,26 +27,64 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
     user_id = verify_token(token)
     if user_id is None:
         raise credentials_exception
-    
+
     result = await db.execute(select(User).filter(User.id == user_id))
     user = result.scalar_one_or_none()
-    
+
     if user is None:
         raise credentials_exception
-    
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user",
         )
-    
+
     return user
 
 
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+) -> PrincipalSchema:
+    """Get a cached snapshot of the current user for read-only endpoints.
+
+    Endpoints that modify the user must use ``get_current_user`` instead,
+    which returns a row attached to the request's database session.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    user_id = verify_token(token)
+    if user_id is None:
+        raise credentials_exception
+
+    principal = await get_principal(user_id)
+    if principal is None:
+        raise credentials_exception
+
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user",
+        )
+
+    return principal
+
+
+async def get_current_user_id(
+    principal: PrincipalSchema = Depends(get_current_principal),
+) -> UUID:
+    """Get the current user's id without touching the database on a cache hit."""
+    return principal.id
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -61,4 +106,44 @@ async def get_current_superuser(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+async def enforce_rate_limits(
+    user_id: UUID,
+    providers: Iterable[str] = (),
+) -> Dict[str, str]:
+    """Apply the per-user, per-user-per-provider and global per-provider limits.
+
+    A request denied by any limit spends none of them: tokens already
+    taken from the other buckets are refunded. Returns the rate limit
+    headers of the tightest limit, or raises 429.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return {}
+
+    buckets = [(f"user:{user_id}", settings.RATE_LIMIT_PER_MINUTE)]
+    for provider in sorted(set(providers)):
+        limit = settings.RATE_LIMIT_PROVIDER_PER_MINUTE.get(
+            provider, settings.RATE_LIMIT_PER_MINUTE
+        )
+        buckets.append((f"user:{user_id}:provider:{provider}", limit))
+        if provider in settings.RATE_LIMIT_PROVIDER_GLOBAL_PER_MINUTE:
+            buckets.append(
+                (f"provider:{provider}", settings.RATE_LIMIT_PROVIDER_GLOBAL_PER_MINUTE[provider])
+            )
+
+    results = []
+    for key, limit in buckets:
+        result = await rate_limiter.hit(key, limit)
+        if not result.allowed:
+            for spent, _ in buckets[: len(results)]:
+                rate_limiter.refund(spent)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers=result.headers,
+            )
+        results.append(result)
+
+    return min(results, key=lambda result: result.remaining).headers
@@ -1,45 +1,100 @@
+import logging
 import time
 import uuid
-import logging
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.metrics import Histogram
 
 logger = logging.getLogger(__name__)
 
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to the last response byte, per route template",
+    ("method", "route", "status"),
+)
+HTTP_FIRST_BYTE_SECONDS = Histogram(
+    "http_request_first_byte_seconds",
+    "Time to the first response body byte, per route template",
+    ("method", "route"),
+)
+
+
+class RequestLoggingMiddleware:
+    """Middleware for logging requests and responses.
+
+    Written as plain ASGI rather than on ``BaseHTTPMiddleware`` so response
+    bodies pass straight through without an extra task and memory stream,
+    which keeps streamed (SSE) responses flowing. Time to first byte is taken
+    at the first non-empty body chunk rather than at the headers, which a
+    streaming response sends immediately; time to last byte at the final
+    body chunk. Both are also recorded per route template, so path
+    parameters do not multiply the metric series.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging requests and responses."""
-    
-    async def dispatch(self, request: Request, call_next):
-        # Generate request ID
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Generate request ID (exposed as request.state.request_id)
         request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
-        
+        scope.setdefault("state", {})["request_id"] = request_id
+        request_id_header = (b"x-request-id", request_id.encode("latin-1"))
+
         # Start timer
-        start_time = time.time()
-        
+        start_time = time.perf_counter()
+        status_code = 500
+        first_byte: Optional[float] = None
+        last_byte: Optional[float] = None
+
         # Log request
         logger.info(
-            f"Request started: {request.method} {request.url.path} "
-            f"[ID: {request_id}]"
-        )
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate duration
-        duration = time.time() - start_time
-        
-        # Add request ID to response headers
-        response.headers["X-Request-ID"] = request_id
-        
-        # Log response
-        logger.info(
-            f"Request completed: {request.method} {request.url.path} "
-            f"[ID: {request_id}] "
-            f"[Status: {response.status_code}] "
-            f"[Duration: {duration:.3f}s]"
+            "Request started: %s %s [ID: %s]",
+            scope["method"],
+            scope["path"],
+            request_id,
         )
-        
-        return response
\ No newline at end of file
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, first_byte, last_byte
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Add request ID to response headers
+                message["headers"] = [*message.get("headers", ()), request_id_header]
+            elif message["type"] == "http.response.body":
+                if first_byte is None and message.get("body"):
+                    first_byte = time.perf_counter()
+                if not message.get("more_body"):
+                    last_byte = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_time = last_byte or time.perf_counter()
+            route = scope.get("route")
+            template = route.path if route is not None else "<unmatched>"
+            HTTP_REQUEST_SECONDS.observe(
+                end_time - start_time, scope["method"], template, str(status_code)
+            )
+            HTTP_FIRST_BYTE_SECONDS.observe(
+                (first_byte or end_time) - start_time, scope["method"], template
+            )
+
+            # Log response
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Request completed: %s %s [ID: %s] [Status: %d] "
+                    "[TTFB: %.3fs] [Duration: %.3fs]",
+                    scope["method"],
+                    scope["path"],
+                    request_id,
+                    status_code,
+                    (first_byte or end_time) - start_time,
+                    end_time - start_time,
+                )
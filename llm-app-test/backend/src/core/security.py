@@ -1,11 +1,26 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Any, Callable, Optional, TypeVar, Union
+
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+
 from src.config.settings import settings
+from src.utils.metrics import Gauge, registry
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
+# bcrypt takes ~100-300 ms of CPU per call, so it runs off the event loop
+_hash_executor: Optional[Executor] = None
+_hash_pending = 0
+
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth", "Password hashing calls waiting for a free worker"
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
@@ -17,6 +32,59 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash",
+            )
+    return _hash_executor
+
+
+async def _run_hashing(func: Callable[..., T], *args: Any) -> T:
+    global _hash_pending
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash on the bounded hashing pool."""
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate a password hash on the bounded hashing pool."""
+    return await _run_hashing(get_password_hash, password)
+
+
+def get_hash_queue_depth() -> int:
+    """Number of hashing calls waiting for a free worker."""
+    return max(0, _hash_pending - settings.PASSWORD_HASH_WORKERS)
+
+
+def _collect_hash_queue_depth() -> None:
+    PASSWORD_HASH_QUEUE_DEPTH.set(get_hash_queue_depth())
+
+
+registry.add_collector(_collect_hash_queue_depth)
+
+
+def shutdown_password_hashing() -> None:
+    """Stop the hashing pool (called on application shutdown)."""
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
 def create_access_token(
     subject: Union[str, Any],
     expires_delta: Optional[timedelta] = None,
@@ -25,10 +93,8 @@ def create_access_token(
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-        )
-    
+        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
     to_encode = {"exp": expire, "sub": str(subject), "type": "access"}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
@@ -43,7 +109,7 @@ def create_refresh_token(
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    
+
     to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
@@ -57,4 +123,4 @@ def verify_token(token: str, token_type: str = "access") -> Optional[str]:
             return None
         return payload.get("sub")
     except JWTError:
-        return None
\ No newline at end of file
+        return None
@@ -1,12 +1,22 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+import asyncio
 import logging
+import secrets
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException, status
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-from src.api.v1 import auth, chat, llm, evaluation, dashboard, usecase
+from src.api.v1 import auth, chat, dashboard, evaluation, llm, usecase
+from src.config.database import engine, get_pool_stats, warm_up_pool
+from src.config.http import close_http_clients, init_http_clients
 from src.config.settings import settings
-from src.config.database import engine, Base
 from src.core.middleware import RequestLoggingMiddleware
+from src.core.security import shutdown_password_hashing
+from src.services.auth_service import listen_for_invalidations
+from src.services.llm import PROVIDERS, preload_sdks
+from src.utils import metrics
 
 # Configure logging
 logging.basicConfig(
@@ -21,15 +31,30 @@ async def lifespan(app: FastAPI):
     """Handle application startup and shutdown events."""
     # Startup
     logger.info("Starting up application...")
-    # Create database tables
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("Database tables created")
-    
+    # The schema is managed by `alembic upgrade head`, run once per deploy
+    await warm_up_pool()
+    # Open the pooled provider transports shared by all LLM adapters
+    init_http_clients(*PROVIDERS)
+    # Keep this worker's user cache in step with invalidations from others
+    invalidation_listener = asyncio.create_task(listen_for_invalidations())
+    # Provider SDKs load in the background while the worker already serves
+    if settings.LLM_PRELOAD_SDKS:
+        asyncio.get_running_loop().run_in_executor(None, preload_sdks)
+    # Loop lag sampling, and snapshots the other workers aggregate in /metrics
+    background = [invalidation_listener]
+    if settings.METRICS_ENABLED:
+        background.append(asyncio.create_task(metrics.monitor_event_loop()))
+        background.append(asyncio.create_task(metrics.publish_metrics()))
+
     yield
-    
+
     # Shutdown
     logger.info("Shutting down application...")
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    shutdown_password_hashing()
+    await close_http_clients()
     await engine.dispose()
 
 
@@ -80,16 +105,35 @@ async def health_check():
         "status": "healthy",
         "service": settings.APP_NAME,
         "version": settings.APP_VERSION,
+        "database_pool": get_pool_stats(),
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """Metrics of every worker of this server, in the Prometheus text format."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if settings.METRICS_TOKEN and not secrets.compare_digest(
+        (authorization or "").encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
-    
+
     uvicorn.run(
         "src.main:app",
         host="0.0.0.0",
         port=8000,
         reload=settings.DEBUG,
         log_level="info",
-    )
\ No newline at end of file
+    )
@@ -1,6 +1,19 @@
+from src.models.chat import ChatSession, ContextCheckpoint, ExportJob, Message
+from src.models.evaluation import Evaluation, RatingRollup
+from src.models.usage import UsageRollup
+from src.models.usecase import UseCase, UseCaseJob, UseCaseRun
 from src.models.user import User
-from src.models.chat import ChatSession, Message
-from src.models.evaluation import Evaluation
-from src.models.usecase import UseCase
 
-__all__ = ["User", "ChatSession", "Message", "Evaluation", "UseCase"]
\ No newline at end of file
+__all__ = [
+    "User",
+    "ChatSession",
+    "Message",
+    "ExportJob",
+    "ContextCheckpoint",
+    "Evaluation",
+    "RatingRollup",
+    "UseCase",
+    "UseCaseRun",
+    "UseCaseJob",
+    "UsageRollup",
+]
@@ -1,32 +1,152 @@
-from sqlalchemy import Column, String, Text, ForeignKey, JSON, ARRAY
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
+
 from src.config.database import Base
 from src.models.base import BaseModel
 
+# Text search configuration for message content. 'simple' does no
+# stemming or stop words, so it behaves the same for every language.
+SEARCH_CONFIG = "simple"
+
+
+def owner_lexeme(user_id) -> str:
+    """Lexeme that ties a message's search vector to its owner.
+
+    The parser never produces a lexeme starting with '@', so this cannot
+    collide with message text.
+    """
+    return f"@{user_id}"
+
 
 class ChatSession(Base, BaseModel):
     __tablename__ = "chat_sessions"
-    
+    __table_args__ = (
+        Index("ix_chat_sessions_user_id", "user_id"),
+        Index("ix_chat_sessions_tags", "tags", postgresql_using="gin"),
+    )
+
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     title = Column(String(255), nullable=False)
     tags = Column(ARRAY(String), default=[])
-    
+
     # Relationships
     user = relationship("User", back_populates="chat_sessions")
-    messages = relationship("Message", back_populates="session", cascade="all, delete-orphan")
+    # History is read page by page through chat_service; never load it implicitly
+    messages = relationship(
+        "Message",
+        back_populates="session",
+        cascade="all, delete-orphan",
+        lazy="raise_on_sql",
+        passive_deletes=True,
+    )
 
 
 class Message(Base, BaseModel):
     __tablename__ = "messages"
-    
-    session_id = Column(UUID(as_uuid=True), ForeignKey("chat_sessions.id"), nullable=False)
+    __table_args__ = (
+        # Keyset pagination over a session's history
+        Index("ix_messages_session_created_id", "session_id", "created_at", "id"),
+        # Full-text search; queries AND in the owner lexeme, so GIN only
+        # walks the user's own postings however common the term is
+        Index("ix_messages_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+    session_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("chat_sessions.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    # Owner of the session, copied onto each message for search
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     content = Column(Text, nullable=False)
     type = Column(String(20), nullable=False)  # 'user' or 'assistant'
-    
+    # Maintained by Postgres on every insert and update: the content's
+    # lexemes plus owner_lexeme(user_id)
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                f"to_tsvector('{SEARCH_CONFIG}'::regconfig, content)"
+                " || array_to_tsvector(array_remove(ARRAY['@' || user_id::text], NULL))",
+                persisted=True,
+            ),
+        )
+    )
+
     # Store LLM responses as JSON
     responses = Column(JSON, default=[])
-    
+    # Per tokenizer: {"content": n, "<provider>/<model>": n per response}, so
+    # building a prompt from history never re-tokenizes it
+    token_counts = deferred(Column(JSON, nullable=True))
+
     # Relationships
     session = relationship("ChatSession", back_populates="messages")
-    evaluations = relationship("Evaluation", back_populates="message", cascade="all, delete-orphan")
\ No newline at end of file
+    evaluations = relationship(
+        "Evaluation",
+        back_populates="message",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class ExportJob(Base, BaseModel):
+    """A chat history export written to UPLOAD_DIR by a worker."""
+
+    __tablename__ = "export_jobs"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    # A single session, or the whole account when null
+    session_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("chat_sessions.id", ondelete="CASCADE"),
+        nullable=True,
+    )
+    format = Column(String(10), nullable=False)  # json or csv
+    compress = Column(Boolean, default=False, nullable=False)  # gzip
+    # pending, running, completed, failed
+    status = Column(String(20), default="pending", nullable=False)
+    error = Column(Text, nullable=True)
+    path = Column(String(500), nullable=True)  # Relative to UPLOAD_DIR once completed
+    rows_done = Column(Integer, default=0, nullable=False)
+    size_bytes = Column(Integer, nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Last progress of a running job
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class ContextCheckpoint(Base, BaseModel):
+    """Running summary of the turns that no longer fit one model's context window.
+
+    Prompts for later turns start from the summary and only read the
+    messages after ``through_created_at``/``through_message_id``.
+    """
+
+    __tablename__ = "context_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("session_id", "provider", "model", name="uq_context_checkpoints_thread"),
+    )
+
+    session_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("chat_sessions.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    summary = Column(Text, nullable=False)
+    summary_tokens = Column(Integer, default=0, nullable=False)
+    # Last message folded into the summary
+    through_created_at = Column(DateTime(timezone=True), nullable=False)
+    through_message_id = Column(UUID(as_uuid=True), nullable=False)
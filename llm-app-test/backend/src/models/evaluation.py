@@ -1,28 +1,86 @@
-from sqlalchemy import Column, String, Integer, Float, Text, ForeignKey, JSON
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
+
 from src.config.database import Base
 from src.models.base import BaseModel
 
 
 class Evaluation(Base, BaseModel):
     __tablename__ = "evaluations"
-    
+    __table_args__ = (
+        # Exports and cascading deletes look evaluations up by message
+        Index("ix_evaluations_message_id", "message_id"),
+    )
+
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    message_id = Column(UUID(as_uuid=True), ForeignKey("messages.id"), nullable=False)
+    message_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("messages.id", ondelete="CASCADE"),
+        nullable=False,
+    )
     provider = Column(String(50), nullable=False)
-    
+
     # Ratings
     usefulness_rating = Column(Integer, nullable=True)
     accuracy_rating = Column(Integer, nullable=True)
     creativity_rating = Column(Integer, nullable=True)
-    
+    rated_at = Column(DateTime(timezone=True), nullable=True)  # Rollup bucket of the ratings
+
     # Feedback
     feedback = Column(Text, nullable=True)
-    
+
     # Auto-evaluation metrics
     auto_metrics = Column(JSON, default={})
-    
+
     # Relationships
     user = relationship("User", back_populates="evaluations")
-    message = relationship("Message", back_populates="evaluations")
\ No newline at end of file
+    message = relationship("Message", back_populates="evaluations")
+
+
+class RatingRollup(Base, BaseModel):
+    """Histogram of a user's ratings for one provider and dimension per bucket.
+
+    Ratings are on a 1-5 scale, so five counters hold the exact
+    distribution: mean, variance and percentiles all follow from them, and
+    buckets merge by adding counters.
+    """
+
+    __tablename__ = "rating_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id",
+            "granularity",
+            "bucket_start",
+            "provider",
+            "dimension",
+            name="uq_rating_rollups_bucket",
+        ),
+    )
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    granularity = Column(String(10), nullable=False)  # 'day' or 'all'
+    bucket_start = Column(DateTime(timezone=True), nullable=False)  # UTC; the epoch for 'all'
+    provider = Column(String(50), nullable=False)
+    dimension = Column(String(20), nullable=False)  # usefulness, accuracy or creativity
+
+    # Ratings at each level; a changed rating moves one count between levels
+    rated_1 = Column(Integer, default=0, nullable=False)
+    rated_2 = Column(Integer, default=0, nullable=False)
+    rated_3 = Column(Integer, default=0, nullable=False)
+    rated_4 = Column(Integer, default=0, nullable=False)
+    rated_5 = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,51 @@
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+from src.config.database import Base
+from src.models.base import BaseModel
+
+
+class UsageRollup(Base, BaseModel):
+    """Pre-aggregated LLM usage for one user/provider/model per time bucket."""
+
+    __tablename__ = "usage_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id",
+            "granularity",
+            "bucket_start",
+            "provider",
+            "model",
+            name="uq_usage_rollups_bucket",
+        ),
+    )
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    granularity = Column(String(10), nullable=False)  # 'hour' or 'day'
+    bucket_start = Column(DateTime(timezone=True), nullable=False)  # UTC
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+
+    # Counters, only ever incremented
+    requests = Column(Integer, default=0, nullable=False)
+    successes = Column(Integer, default=0, nullable=False)
+    errors = Column(Integer, default=0, nullable=False)
+    cache_hits = Column(Integer, default=0, nullable=False)
+    prompt_tokens = Column(BigInteger, default=0, nullable=False)
+    completion_tokens = Column(BigInteger, default=0, nullable=False)
+    total_tokens = Column(BigInteger, default=0, nullable=False)
+    cost = Column(Float, default=0.0, nullable=False)  # Estimated USD
+    latency_total = Column(Float, default=0.0, nullable=False)  # Seconds, over successes
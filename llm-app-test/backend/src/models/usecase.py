@@ -1,24 +1,123 @@
-from sqlalchemy import Column, String, Text, Boolean, ForeignKey, JSON
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
+
 from src.config.database import Base
 from src.models.base import BaseModel
 
 
 class UseCase(Base, BaseModel):
     __tablename__ = "use_cases"
-    
+    __table_args__ = (
+        # The scheduler polls for changed use cases in (updated_at, id) order
+        Index("ix_use_cases_updated_at_id", "updated_at", "id"),
+    )
+
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     prompt_template = Column(Text, nullable=False)
     expected_output = Column(Text, nullable=True)
     evaluation_criteria = Column(JSON, default={})
+    targets = Column(JSON, default=[])  # [{"provider": ..., "model": ...}]
     schedule = Column(String(100), nullable=True)  # Cron expression
     is_active = Column(Boolean, default=True, nullable=False)
-    
-    # Execution history
+
+    # Legacy execution history; runs are stored in use_case_runs and old
+    # entries are moved there by scripts/migrate_usecase_history.py
     execution_history = Column(JSON, default=[])
-    
+
     # Relationships
-    user = relationship("User", back_populates="use_cases")
\ No newline at end of file
+    user = relationship("User", back_populates="use_cases")
+    # Read page by page through the usecase manager; never load it implicitly
+    runs = relationship(
+        "UseCaseRun",
+        back_populates="use_case",
+        cascade="all, delete-orphan",
+        lazy="raise_on_sql",
+        passive_deletes=True,
+    )
+
+
+class UseCaseRun(Base, BaseModel):
+    """One append-only execution of a use case against one provider/model."""
+
+    __tablename__ = "use_case_runs"
+    __table_args__ = (
+        Index("ix_use_case_runs_use_case_created_id", "use_case_id", "created_at", "id"),
+        Index("ix_use_case_runs_job_row", "job_id", "row_index"),
+    )
+
+    use_case_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("use_cases.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    # Set for runs produced by a dataset job
+    job_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("use_case_jobs.id", ondelete="CASCADE"),
+        nullable=True,
+    )
+    row_index = Column(Integer, nullable=True)  # Zero-based dataset row
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False)  # 'ok', 'error', 'timeout' or 'cancelled'
+    error = Column(Text, nullable=True)
+    fired_at = Column(DateTime(timezone=True), nullable=True)  # Schedule window, if scheduled
+
+    # Metrics
+    latency = Column(Float, nullable=True)
+    ttft = Column(Float, nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    total_tokens = Column(Integer, nullable=True)
+    cost = Column(Float, nullable=True)  # Estimated USD
+
+    # Output
+    output = Column(Text, nullable=True)
+    output_hash = Column(String(64), nullable=True)  # sha256, to spot changed outputs
+    score = Column(Float, nullable=True)  # Agreement with expected_output, 0-1
+
+    # Relationships
+    use_case = relationship("UseCase", back_populates="runs")
+
+
+class UseCaseJob(Base, BaseModel):
+    """A use case run over every row of an uploaded dataset."""
+
+    __tablename__ = "use_case_jobs"
+
+    use_case_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("use_cases.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    dataset = Column(String(500), nullable=False)  # Path relative to UPLOAD_DIR
+    targets = Column(JSON, default=[])  # [{"provider": ..., "model": ...}]
+    params = Column(JSON, default={})
+    status = Column(
+        String(20), default="pending", nullable=False
+    )  # pending, running, completed, failed
+    error = Column(Text, nullable=True)
+
+    # Progress; rows_done is the checkpoint a resumed job starts from
+    rows_total = Column(Integer, nullable=True)
+    rows_done = Column(Integer, default=0, nullable=False)
+    rows_per_second = Column(Float, nullable=True)
+    eta_seconds = Column(Float, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
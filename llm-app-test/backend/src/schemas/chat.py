@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from src.schemas.llm import LLMTarget
+
+
+class MessageCreate(BaseModel):
+    content: str = Field(..., min_length=1)
+    targets: List[LLMTarget] = Field(..., min_length=1)
+    temperature: Optional[float] = Field(None, ge=0, le=2)
+    max_tokens: Optional[int] = Field(None, gt=0)
+    timeout: Optional[float] = Field(None, gt=0)  # Per-provider, in seconds
+    deadline: Optional[float] = Field(None, gt=0)  # Whole stream, in seconds
+    use_cache: Optional[bool] = None  # None caches temperature 0 only; True also sampled
+
+
+class Message(BaseModel):
+    id: UUID
+    session_id: UUID
+    content: str
+    type: str
+    created_at: datetime
+    responses: Optional[List[Dict[str, Any]]] = None  # Omitted from list views by default
+
+    class Config:
+        from_attributes = True
+
+
+class MessagePage(BaseModel):
+    items: List[Message]
+    next_cursor: Optional[str] = None  # Pass back as ``cursor`` for the next page
+
+
+class MessageSearchHit(BaseModel):
+    id: UUID
+    session_id: UUID
+    type: str
+    created_at: datetime
+    rank: float
+    headline: str  # Matching fragments, terms wrapped in <mark></mark>
+
+    class Config:
+        from_attributes = True
+
+
+class MessageSearchPage(BaseModel):
+    items: List[MessageSearchHit]
+    next_cursor: Optional[str] = None  # Pass back as ``cursor`` for the next page
+
+
+class ExportCreate(BaseModel):
+    format: str = Field("json", pattern="^(json|csv)$")
+    gzip: bool = False
+    session_id: Optional[UUID] = None  # The whole account when omitted
+
+
+class ExportJob(BaseModel):
+    id: UUID
+    session_id: Optional[UUID] = None
+    format: str
+    compress: bool
+    status: str
+    error: Optional[str] = None
+    rows_done: int
+    size_bytes: Optional[int] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
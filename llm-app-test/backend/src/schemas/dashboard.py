@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class UsageTotals(BaseModel):
+    requests: int = 0
+    successes: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    cost: float = 0.0  # Estimated USD
+    latency_total: float = 0.0
+    success_rate: Optional[float] = None
+    avg_latency: Optional[float] = None  # Seconds, over successful calls
+
+
+class ProviderUsage(UsageTotals):
+    provider: str
+
+
+class UsagePoint(ProviderUsage):
+    bucket_start: datetime
+
+
+class DashboardStats(BaseModel):
+    days: int
+    totals: UsageTotals
+    providers: List[ProviderUsage]
+    cache_savings: Dict[str, float]
+
+
+class UsageMetrics(BaseModel):
+    days: int
+    granularity: str
+    series: List[UsagePoint]
+
+
+class ModelCost(BaseModel):
+    provider: str
+    model: str
+    cost: float
+    total_tokens: int
+
+
+class DailyCost(BaseModel):
+    bucket_start: datetime
+    cost: float
+
+
+class CostAnalysis(BaseModel):
+    days: int
+    total_cost: float
+    models: List[ModelCost]
+    daily: List[DailyCost]
+    cache_savings: Dict[str, float]
@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class RatingCreate(BaseModel):
+    message_id: UUID
+    provider: str
+    model: Optional[str] = None  # Which of the provider's responses, when several
+    usefulness_rating: Optional[int] = Field(None, ge=1, le=5)
+    accuracy_rating: Optional[int] = Field(None, ge=1, le=5)
+    creativity_rating: Optional[int] = Field(None, ge=1, le=5)
+    feedback: Optional[str] = None
+
+
+class RatingBatch(BaseModel):
+    ratings: List[RatingCreate] = Field(..., min_length=1)
+
+
+class Evaluation(BaseModel):
+    id: UUID
+    message_id: UUID
+    provider: str
+    usefulness_rating: Optional[int] = None
+    accuracy_rating: Optional[int] = None
+    creativity_rating: Optional[int] = None
+    feedback: Optional[str] = None
+    auto_metrics: Optional[Dict[str, Any]] = None
+    created_at: datetime
+    rated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class RatingSummary(BaseModel):
+    count: int
+    mean: Optional[float] = None
+    variance: Optional[float] = None  # Sample variance
+    stddev: Optional[float] = None
+    percentiles: Dict[str, Optional[int]]  # Nearest rank: p25, p50, p75, p90
+    histogram: List[int]  # Ratings of 1 to 5
+
+
+class ProviderRatings(BaseModel):
+    provider: str
+    dimensions: Dict[str, RatingSummary]
+
+
+class EvaluationStats(BaseModel):
+    days: Optional[int] = None  # None for all time
+    providers: List[ProviderRatings]
@@ -0,0 +1,59 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class LLMTarget(BaseModel):
+    provider: str
+    model: str
+
+
+class LLMQueryRequest(BaseModel):
+    prompt: str
+    targets: List[LLMTarget] = Field(..., min_length=1)
+    temperature: Optional[float] = Field(None, ge=0, le=2)
+    max_tokens: Optional[int] = Field(None, gt=0)
+    timeout: Optional[float] = Field(None, gt=0)  # Per-provider, in seconds
+    deadline: Optional[float] = Field(None, gt=0)  # Whole query, in seconds
+    wait_for: Optional[int] = Field(None, gt=0)  # Return after N successes
+    use_cache: Optional[bool] = None  # None caches temperature 0 only; True also sampled
+    hedge: Optional[bool] = None  # Defaults to LLM_HEDGE_ENABLED
+
+
+class ProviderHealth(BaseModel):
+    provider: str
+    model: str
+    state: str  # Circuit breaker: 'closed', 'open' or 'half_open'
+    p95_ttft: Optional[float] = None  # Seconds, over recent calls
+    first_token_timeout: Optional[float] = None  # Adaptive, in seconds
+    retry_budget: float
+    calls: int
+    successes: int
+    failures: int
+    rejected: int
+    first_token_timeouts: int
+    retries: int
+    retries_denied: int
+    hedges: int
+    hedge_wins: int
+
+
+class LLMResponse(BaseModel):
+    provider: str
+    model: str
+    content: str
+    status: str
+    error: Optional[str] = None
+    ttft: Optional[float] = None
+    latency: Optional[float] = None
+    usage: Dict[str, int] = {}
+    cost: Optional[float] = None
+    cached: bool = False
+
+    class Config:
+        from_attributes = True
+
+
+class LLMQueryResponse(BaseModel):
+    results: List[LLMResponse]
+    latency: float
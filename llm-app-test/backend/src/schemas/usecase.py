@@ -0,0 +1,68 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from src.schemas.llm import LLMTarget
+
+
+class UseCaseExecute(BaseModel):
+    variables: Dict[str, Any] = {}  # Values for {{ placeholders }} in the template
+    targets: Optional[List[LLMTarget]] = None  # Defaults to the use case's targets
+    temperature: Optional[float] = Field(None, ge=0, le=2)
+    max_tokens: Optional[int] = Field(None, gt=0)
+
+
+class UseCaseJobCreate(BaseModel):
+    dataset: str  # CSV or JSONL path relative to UPLOAD_DIR
+    targets: Optional[List[LLMTarget]] = None  # Defaults to the use case's targets
+    temperature: Optional[float] = Field(None, ge=0, le=2)
+    max_tokens: Optional[int] = Field(None, gt=0)
+
+
+class UseCaseRun(BaseModel):
+    id: UUID
+    use_case_id: UUID
+    provider: str
+    model: str
+    status: str
+    error: Optional[str] = None
+    fired_at: Optional[datetime] = None
+    latency: Optional[float] = None
+    ttft: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+    cost: Optional[float] = None
+    output: Optional[str] = None
+    output_hash: Optional[str] = None
+    score: Optional[float] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class UseCaseRunPage(BaseModel):
+    items: List[UseCaseRun]
+    next_cursor: Optional[str] = None  # Pass back as ``cursor`` for the next page
+
+
+class UseCaseJob(BaseModel):
+    id: UUID
+    use_case_id: UUID
+    dataset: str
+    targets: List[Dict[str, str]]
+    status: str
+    error: Optional[str] = None
+    rows_total: Optional[int] = None
+    rows_done: int
+    rows_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,7 +1,8 @@
-from typing import Optional, Dict, Any
+from datetime import datetime
+from typing import Any, Dict, Optional
 from uuid import UUID
+
 from pydantic import BaseModel, EmailStr
-from datetime import datetime
 
 
 class UserBase(BaseModel):
@@ -35,10 +36,11 @@ class UserInDB(UserBase):
         from_attributes = True
 
 
-class User(UserBase):
+class Principal(UserBase):
+    """The cached identity of a request; never carries the user's API keys."""
+
     id: UUID
     is_superuser: bool
-    api_keys: Dict[str, Any] = {}
     settings: Dict[str, Any] = {}
     created_at: datetime
     updated_at: datetime
@@ -47,6 +49,10 @@ class User(UserBase):
         from_attributes = True
 
 
+class User(Principal):
+    api_keys: Dict[str, Any] = {}
+
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -71,4 +77,4 @@ class ApiKeysUpdate(BaseModel):
 
 class PasswordChange(BaseModel):
     current_password: str
-    new_password: str
\ No newline at end of file
+    new_password: str
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import logging
+from typing import Dict, Optional, Union
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import AsyncSessionLocal
+from src.config.redis import redis_client
+from src.config.settings import settings
+from src.models.user import User
+from src.schemas.user import Principal as PrincipalSchema
+from src.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_KEY = "user:principal:{}"
+# Bumped on every invalidation; a cached principal is only trusted while
+# it carries the current version, so a load that raced an invalidation
+# cannot put a stale snapshot back
+VERSION_KEY = "user:principal:version:{}"
+INVALIDATION_CHANNEL = "user:principal:invalidate"
+
+# First tier: per-process, evicted through Redis pub/sub on invalidation
+_principals = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+# Local evictions so far; loads that saw an eviction start are not kept
+_evictions = 0
+
+
+def _evict(user_id: Optional[str] = None) -> None:
+    global _evictions
+    _evictions += 1
+    if user_id is None:
+        _principals.clear()
+    else:
+        _principals.pop(user_id)
+
+
+async def _load_principal(user_id: UUID) -> Optional[PrincipalSchema]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).filter(User.id == user_id))
+        user = result.scalar_one_or_none()
+    return PrincipalSchema.model_validate(user) if user is not None else None
+
+
+async def get_principal(user_id: str) -> Optional[PrincipalSchema]:
+    """Resolve a user snapshot from the local LRU, then Redis, then Postgres."""
+    principal = _principals.get(user_id)
+    if principal is not None:
+        return principal
+
+    try:
+        user_uuid = UUID(user_id)
+    except ValueError:
+        return None
+
+    evictions = _evictions
+    key = PRINCIPAL_KEY.format(user_id)
+    try:
+        version, cached = await redis_client.mget(VERSION_KEY.format(user_id), key)
+    except RedisError as exc:
+        logger.warning("Principal cache read failed: %s", exc)
+        version, cached = None, None
+    version = int(version or 0)
+
+    entry = json.loads(cached) if cached is not None else None
+    if entry is not None and entry.get("version") == version:
+        principal = PrincipalSchema.model_validate(entry["principal"])
+    else:
+        principal = await _load_principal(user_uuid)
+        if principal is None:
+            return None
+        entry = {"version": version, "principal": principal.model_dump(mode="json")}
+        try:
+            await redis_client.set(key, json.dumps(entry), ex=settings.USER_CACHE_REDIS_TTL)
+        except RedisError as exc:
+            logger.warning("Principal cache write failed: %s", exc)
+
+    if evictions == _evictions:
+        _principals.set(user_id, principal)
+    return principal
+
+
+async def load_api_keys(db: AsyncSession, user_id: UUID) -> Dict[str, str]:
+    """The user's provider API keys, read from Postgres for the call that needs them."""
+    result = await db.execute(select(User.api_keys).filter(User.id == user_id))
+    return result.scalar_one_or_none() or {}
+
+
+async def invalidate_user(user_id: Union[str, UUID]) -> None:
+    """Drop a cached principal in this process, in Redis and in every other worker."""
+    user_id = str(user_id)
+    _evict(user_id)
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.incr(VERSION_KEY.format(user_id))
+            pipe.delete(PRINCIPAL_KEY.format(user_id))
+            pipe.publish(INVALIDATION_CHANNEL, user_id)
+            await pipe.execute()
+    except RedisError as exc:
+        logger.warning("Principal cache invalidation failed for %s: %s", user_id, exc)
+
+
+async def deactivate_user(db: AsyncSession, user: User) -> None:
+    """Deactivate a user and make every worker forget the cached principal."""
+    user.is_active = False
+    await db.commit()
+    await invalidate_user(user.id)
+
+
+async def listen_for_invalidations() -> None:
+    """Evict local principals as other workers publish invalidations."""
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Anything published while we were not subscribed is lost
+            _evict()
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    _evict(message["data"])
+        except RedisError as exc:
+            logger.warning("Principal invalidation listener lost Redis: %s", exc)
+            _evict()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
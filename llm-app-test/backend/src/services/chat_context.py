@@ -0,0 +1,382 @@
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import AsyncSessionLocal
+from src.config.redis import redis_client
+from src.config.settings import settings
+from src.models.chat import ContextCheckpoint, Message
+from src.services.llm.coordinator import LLMCoordinator
+from src.services.llm.pricing import model_price
+from src.services.llm.tokens import MESSAGE_OVERHEAD, token_counter, tokenizer_for
+
+logger = logging.getLogger(__name__)
+
+Target = Tuple[str, str]
+ChatMessages = List[Dict[str, str]]
+Position = Tuple[datetime, UUID]
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+SUMMARY_LOCK_KEY = "chat:summary:{}:{}:{}"
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a user and an "
+    "assistant. Merge the new turns into the existing summary. Keep facts, "
+    "decisions, names, numbers and open questions; drop small talk. Reply "
+    "with the updated summary only."
+)
+
+
+def _answers(responses: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    return [r for r in responses or [] if r.get("status") == "ok" and r.get("content")]
+
+
+def count_message_tokens(
+    content: str,
+    responses: Optional[List[Dict[str, Any]]],
+    models: Iterable[str],
+    counts: Optional[Dict[str, Dict[str, int]]] = None,
+) -> Dict[str, Dict[str, int]]:
+    """Token counts of a turn under each model's tokenizer, for Message.token_counts.
+
+    Tokenizers already present in ``counts`` are not counted again.
+    """
+    counts = dict(counts or {})
+    answers = _answers(responses)
+    for model in models:
+        name = tokenizer_for(model).name
+        if name in counts:
+            continue
+        texts = [content] + [answer["content"] for answer in answers]
+        keys = ["content"] + [f"{answer['provider']}/{answer['model']}" for answer in answers]
+        counts[name] = dict(zip(keys, token_counter.count_batch(model, texts)))
+    return counts
+
+
+def _turn(row: Any, provider: str, model: str) -> Optional[Tuple[ChatMessages, List[str]]]:
+    # A target's thread continues from its own answer, else from the first
+    # answer that succeeded; turns nobody answered are left out
+    if row.type == "assistant":
+        return [{"role": "assistant", "content": row.content}], ["content"]
+    answers = _answers(row.responses)
+    answer = next(
+        (a for a in answers if a.get("provider") == provider and a.get("model") == model),
+        answers[0] if answers else None,
+    )
+    if answer is None:
+        return None
+    return (
+        [
+            {"role": "user", "content": row.content},
+            {"role": "assistant", "content": answer["content"]},
+        ],
+        ["content", f"{answer['provider']}/{answer['model']}"],
+    )
+
+
+@dataclass
+class ContextWindow:
+    """The prompt for one target, and where its history stopped fitting."""
+
+    messages: ChatMessages
+    history_tokens: int = 0
+    turns: int = 0
+    # Newest message after the checkpoint that did not fit, once at least
+    # CHAT_CONTEXT_SUMMARY_MARGIN tokens did not; it and older ones are due
+    # to be folded into the summary
+    overflow: Optional[Position] = None
+
+
+@dataclass
+class _Thread:
+    provider: str
+    model: str
+    tokenizer: str
+    budget: int
+    checkpoint: Optional[ContextCheckpoint]
+    used: int = 0
+    turns: List[ChatMessages] = field(default_factory=list)
+    overflow: Optional[Position] = None
+    overflow_tokens: int = 0
+    done: bool = False
+
+
+async def build_contexts(
+    db: AsyncSession,
+    session_id: UUID,
+    targets: Sequence[Target],
+    content: str,
+    max_tokens: Optional[int] = None,
+) -> Dict[Target, ContextWindow]:
+    """Build each target's prompt for a new turn from the session history.
+
+    History is read newest first, a page at a time, and only until every
+    target's window is full, plus the summary margin, or its checkpoint is
+    reached; token counts come from Message.token_counts. A turn therefore
+    costs about one window of reads however long the session is.
+    """
+    targets = list(dict.fromkeys((provider, model) for provider, model in targets))
+    checkpoints = {
+        (checkpoint.provider, checkpoint.model): checkpoint
+        for checkpoint in (
+            await db.execute(
+                select(ContextCheckpoint).filter(
+                    ContextCheckpoint.session_id == session_id,
+                    tuple_(ContextCheckpoint.provider, ContextCheckpoint.model).in_(targets),
+                )
+            )
+        ).scalars()
+    }
+
+    new_turn = [{"role": "user", "content": content}]
+    reserve = max_tokens or settings.LLM_PREFLIGHT_COMPLETION_TOKENS
+    threads: Dict[Target, _Thread] = {}
+    for provider, model in targets:
+        checkpoint = checkpoints.get((provider, model))
+        fixed = token_counter.count_messages(model, new_turn)
+        if checkpoint is not None:
+            fixed += checkpoint.summary_tokens + MESSAGE_OVERHEAD
+        budget = settings.CHAT_CONTEXT_MAX_TOKENS
+        price = model_price(model)
+        if price is not None and price.context_window:
+            budget = min(budget, price.context_window - reserve - fixed)
+        threads[(provider, model)] = _Thread(
+            provider, model, tokenizer_for(model).name, budget, checkpoint
+        )
+
+    # Nothing at or before the oldest checkpoint is needed by any target
+    floor: Optional[Position] = None
+    if all(thread.checkpoint is not None for thread in threads.values()):
+        floor = min(
+            (t.checkpoint.through_created_at, t.checkpoint.through_message_id)
+            for t in threads.values()
+        )
+
+    position = tuple_(Message.created_at, Message.id)
+    recounted: Dict[UUID, Dict[str, Dict[str, int]]] = {}
+    before: Optional[Position] = None
+    while not all(thread.done for thread in threads.values()):
+        query = select(
+            Message.id,
+            Message.created_at,
+            Message.type,
+            Message.content,
+            Message.responses,
+            Message.token_counts,
+        ).filter(Message.session_id == session_id)
+        if before is not None:
+            query = query.filter(position < tuple_(*before))
+        if floor is not None:
+            query = query.filter(position > tuple_(*floor))
+        query = query.order_by(Message.created_at.desc(), Message.id.desc())
+        rows = (await db.execute(query.limit(settings.CHAT_CONTEXT_PAGE))).all()
+
+        for row in rows:
+            counts = row.token_counts or {}
+            for thread in threads.values():
+                if thread.done:
+                    continue
+                checkpoint = thread.checkpoint
+                if checkpoint is not None and (row.created_at, row.id) <= (
+                    checkpoint.through_created_at,
+                    checkpoint.through_message_id,
+                ):
+                    thread.done = True
+                    continue
+                turn = _turn(row, thread.provider, thread.model)
+                if turn is None:
+                    continue
+
+                messages, keys = turn
+                if any(key not in counts.get(thread.tokenizer, {}) for key in keys):
+                    # Stored before this tokenizer was in use; counted once and kept
+                    counts = count_message_tokens(
+                        row.content,
+                        row.responses,
+                        [thread.model],
+                        {name: value for name, value in counts.items() if name != thread.tokenizer},
+                    )
+                    recounted[row.id] = counts
+                tokens = sum(counts[thread.tokenizer][key] for key in keys)
+                tokens += MESSAGE_OVERHEAD * len(messages)
+                if thread.overflow is not None or thread.used + tokens > thread.budget:
+                    # Read on only until the overflow is worth a summary
+                    thread.overflow = thread.overflow or (row.created_at, row.id)
+                    thread.overflow_tokens += tokens
+                    thread.done = thread.overflow_tokens >= settings.CHAT_CONTEXT_SUMMARY_MARGIN
+                    continue
+                thread.used += tokens
+                thread.turns.append(messages)
+
+        if len(rows) < settings.CHAT_CONTEXT_PAGE:
+            break
+        before = (rows[-1].created_at, rows[-1].id)
+
+    if recounted:
+        await db.execute(
+            update(Message),
+            [
+                {"id": message_id, "token_counts": counts}
+                for message_id, counts in recounted.items()
+            ],
+        )
+        await db.commit()
+
+    windows: Dict[Target, ContextWindow] = {}
+    for target, thread in threads.items():
+        messages: ChatMessages = []
+        if thread.checkpoint is not None:
+            summary = SUMMARY_PREFIX + thread.checkpoint.summary
+            messages.append({"role": "system", "content": summary})
+        for turn in reversed(thread.turns):
+            messages.extend(turn)
+        messages.extend(new_turn)
+        overflow = thread.overflow
+        if thread.overflow_tokens < settings.CHAT_CONTEXT_SUMMARY_MARGIN:
+            overflow = None
+        windows[target] = ContextWindow(messages, thread.used, len(thread.turns), overflow)
+    return windows
+
+
+async def claim_summary(session_id: UUID, provider: str, model: str) -> bool:
+    """Whether no summary of this thread is queued yet; if so, one now is.
+
+    The claim lapses after CHAT_CONTEXT_SUMMARY_LOCK seconds, or when the
+    summary finishes, so a lost task only delays the next one.
+    """
+    key = SUMMARY_LOCK_KEY.format(session_id, provider, model)
+    try:
+        return bool(
+            await redis_client.set(key, "1", nx=True, ex=settings.CHAT_CONTEXT_SUMMARY_LOCK)
+        )
+    except Exception as exc:
+        logger.warning("Summary claim failed, queueing anyway: %s", exc)
+        return True
+
+
+async def release_summary(session_id: UUID, provider: str, model: str) -> None:
+    try:
+        await redis_client.delete(SUMMARY_LOCK_KEY.format(session_id, provider, model))
+    except Exception as exc:
+        logger.warning("Could not release summary claim: %s", exc)
+
+
+async def summarize_thread(
+    session_id: UUID,
+    provider: str,
+    model: str,
+    through_message_id: UUID,
+    user_id: UUID,
+    api_keys: Optional[Dict[str, str]] = None,
+) -> bool:
+    """Fold the turns up to ``through_message_id`` into a target's checkpoint.
+
+    At most CHAT_CONTEXT_MAX_TOKENS of history is summarized per call, so
+    a long session that predates its checkpoint catches up over several
+    turns. Returns whether the checkpoint advanced.
+
+    The summary call shows up in the LLM metrics but not in the usage
+    rollups, which must stay rebuildable from ``messages`` alone.
+    """
+    async with AsyncSessionLocal() as db:
+        checkpoint = (
+            await db.execute(
+                select(ContextCheckpoint).filter(
+                    ContextCheckpoint.session_id == session_id,
+                    ContextCheckpoint.provider == provider,
+                    ContextCheckpoint.model == model,
+                )
+            )
+        ).scalar_one_or_none()
+        through_at = (
+            await db.execute(
+                select(Message.created_at).filter(
+                    Message.id == through_message_id, Message.session_id == session_id
+                )
+            )
+        ).scalar_one_or_none()
+        if through_at is None:
+            return False
+        start: Optional[Position] = None
+        if checkpoint is not None:
+            start = (checkpoint.through_created_at, checkpoint.through_message_id)
+            if start >= (through_at, through_message_id):
+                return False
+
+        position = tuple_(Message.created_at, Message.id)
+        query = select(
+            Message.id, Message.created_at, Message.type, Message.content, Message.responses
+        ).filter(
+            Message.session_id == session_id, position <= tuple_(through_at, through_message_id)
+        )
+        if start is not None:
+            query = query.filter(position > tuple_(*start))
+        query = query.order_by(Message.created_at, Message.id)
+        query = query.limit(settings.CHAT_CONTEXT_PAGE * 10)
+        rows = (await db.execute(query)).all()
+
+    lines: List[str] = []
+    used = 0
+    last: Optional[Position] = None
+    for row in rows:
+        turn = _turn(row, provider, model)
+        if turn is not None:
+            text = "\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in turn[0])
+            tokens = token_counter.count(model, text)
+            if lines and used + tokens > settings.CHAT_CONTEXT_MAX_TOKENS:
+                break
+            lines.append(text)
+            used += tokens
+        last = (row.created_at, row.id)
+    if not lines:
+        return False
+
+    prompt = ""
+    if checkpoint is not None:
+        prompt += f"Summary so far:\n{checkpoint.summary}\n\n"
+    prompt += "New turns:\n" + "\n\n".join(lines)
+    summary_model = settings.CHAT_CONTEXT_SUMMARY_MODELS.get(provider, model)
+    coordinator = LLMCoordinator(api_keys=api_keys, user_id=user_id, use_cache=False)
+    result = (
+        await coordinator.query(
+            [(provider, summary_model)],
+            messages=[
+                {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                {"role": "user", "content": prompt},
+            ],
+            params={"max_tokens": settings.CHAT_CONTEXT_SUMMARY_TOKENS},
+        )
+    )[0]
+    if result.status != "ok" or not result.content.strip():
+        logger.warning(
+            "Summary for session %s %s/%s failed: %s", session_id, provider, model, result.error
+        )
+        return False
+
+    summary = result.content.strip()
+    values = {
+        "summary": summary,
+        "summary_tokens": token_counter.count(model, SUMMARY_PREFIX + summary),
+        "through_created_at": last[0],
+        "through_message_id": last[1],
+    }
+    statement = insert(ContextCheckpoint).values(
+        session_id=session_id, provider=provider, model=model, **values
+    )
+    # Only ever moves forward, so a slower concurrent summary of fewer
+    # turns cannot replace a newer one
+    statement = statement.on_conflict_do_update(
+        constraint="uq_context_checkpoints_thread",
+        set_={**values, "updated_at": datetime.now(timezone.utc)},
+        where=tuple_(ContextCheckpoint.through_created_at, ContextCheckpoint.through_message_id)
+        < tuple_(last[0], last[1]),
+    )
+    async with AsyncSessionLocal() as db:
+        advanced = (await db.execute(statement)).rowcount > 0
+        await db.commit()
+    return advanced
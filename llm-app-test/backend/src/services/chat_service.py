@@ -0,0 +1,298 @@
+import asyncio
+import json
+import logging
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import cast, func, select, tuple_
+from sqlalchemy.dialects.postgresql import TSQUERY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import AsyncSessionLocal
+from src.config.settings import settings
+from src.models.chat import SEARCH_CONFIG, ChatSession, Message, owner_lexeme
+from src.schemas.chat import Message as MessageSchema
+from src.schemas.chat import MessageSearchHit
+from src.services.chat_context import count_message_tokens
+from src.services.dashboard.rollup import record_results
+from src.services.llm.base import LLMResult
+from src.services.llm.coordinator import LLMCoordinator
+from src.utils.pagination import (
+    decode_cursor,
+    decode_rank_cursor,
+    encode_cursor,
+    encode_rank_cursor,
+)
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def _history_query(
+    session_id: UUID,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool,
+    include_responses: bool,
+):
+    columns = [Message.id, Message.session_id, Message.content, Message.type, Message.created_at]
+    if include_responses:
+        columns.append(Message.responses)
+
+    # Row comparison on (created_at, id) walks ix_messages_session_created_id
+    position = tuple_(Message.created_at, Message.id)
+    query = select(*columns).filter(Message.session_id == session_id)
+    if cursor:
+        after = tuple_(*decode_cursor(cursor))
+        query = query.filter(position < after if descending else position > after)
+    if descending:
+        query = query.order_by(Message.created_at.desc(), Message.id.desc())
+    else:
+        query = query.order_by(Message.created_at, Message.id)
+    return query.limit(limit)
+
+
+async def list_messages(
+    db: AsyncSession,
+    session_id: UUID,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    descending: bool = False,
+    include_responses: bool = False,
+) -> Tuple[List[MessageSchema], Optional[str]]:
+    """Return one page of a session's history and the cursor for the next."""
+    limit = min(limit or settings.MESSAGE_PAGE_SIZE, settings.MESSAGE_PAGE_MAX)
+
+    # Fetch one extra row to learn whether another page exists
+    result = await db.execute(
+        _history_query(session_id, cursor, limit + 1, descending, include_responses)
+    )
+    rows = result.all()
+    items = [MessageSchema.model_validate(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return items, next_cursor
+
+
+async def stream_messages(
+    session_id: UUID,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    include_responses: bool = False,
+) -> AsyncIterator[str]:
+    """Stream the rest of a session's history as NDJSON, one page in memory at a time.
+
+    Every page is its own short query, so no transaction or server-side
+    cursor is held open while a slow client reads.
+    """
+    while True:
+        async with AsyncSessionLocal() as db:
+            items, cursor = await list_messages(
+                db,
+                session_id,
+                cursor=cursor,
+                limit=settings.MESSAGE_PAGE_MAX,
+                descending=descending,
+                include_responses=include_responses,
+            )
+        for item in items:
+            yield item.model_dump_json(exclude_none=True) + "\n"
+        if cursor is None:
+            return
+
+
+async def search_messages(
+    db: AsyncSession,
+    user_id: UUID,
+    query: str,
+    tags: Optional[List[str]] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[MessageSearchHit], Optional[str]]:
+    """Full-text search over a user's messages, best matches first.
+
+    ``query`` uses web search syntax: quoted phrases, ``or`` and ``-term``.
+    Only sessions carrying every tag in ``tags`` are searched.
+    """
+    limit = min(limit or settings.MESSAGE_PAGE_SIZE, settings.MESSAGE_PAGE_MAX)
+
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    rank = func.ts_rank_cd(Message.search_vector, tsquery)
+    matches = select(
+        Message.id,
+        Message.session_id,
+        Message.type,
+        Message.created_at,
+        rank.label("rank"),
+    ).filter(
+        # GIN intersects the term and owner postings, so the scan never
+        # touches other users' matches; user_id re-checks on the heap
+        Message.search_vector.op("@@")(
+            tsquery.op("&&")(cast(f"'{owner_lexeme(user_id)}'", TSQUERY))
+        ),
+        Message.user_id == user_id,
+        # A query of only stop characters parses to nothing; match nothing
+        func.numnode(tsquery) > 0,
+    )
+    if tags:
+        tagged = select(ChatSession.id).filter(
+            ChatSession.user_id == user_id,
+            ChatSession.tags.contains(tags),
+        )
+        matches = matches.filter(Message.session_id.in_(tagged))
+    if cursor:
+        matches = matches.filter(
+            tuple_(rank, Message.created_at, Message.id) < tuple_(*decode_rank_cursor(cursor))
+        )
+    # Fetch one extra row to learn whether another page exists
+    page = (
+        matches.order_by(rank.desc(), Message.created_at.desc(), Message.id.desc())
+        .limit(limit + 1)
+        .subquery()
+    )
+
+    # Headlines are expensive, so build them for the page's rows only
+    result = await db.execute(
+        select(
+            page,
+            func.ts_headline(
+                SEARCH_CONFIG,
+                Message.content,
+                tsquery,
+                "StartSel=<mark>, StopSel=</mark>, MaxFragments=2",
+            ).label("headline"),
+        )
+        .join(Message, Message.id == page.c.id)
+        .order_by(page.c.rank.desc(), page.c.created_at.desc(), page.c.id.desc())
+    )
+    rows = result.all()
+    items = [MessageSearchHit.model_validate(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_rank_cursor(last.rank, last.created_at, last.id)
+    return items, next_cursor
+
+
+async def save_message(
+    session_id: UUID,
+    content: str,
+    results: List[LLMResult],
+    user_id: Optional[UUID] = None,
+) -> Message:
+    """Persist a user turn together with every provider's final response."""
+    # One timestamp for the row and its rollup buckets, so a backfill
+    # from the raw history lands in exactly the same buckets
+    now = datetime.now(timezone.utc)
+    responses = [asdict(result) for result in results]
+    async with AsyncSessionLocal() as db:
+        owner = user_id
+        if owner is None:
+            owner = (
+                select(ChatSession.user_id).filter(ChatSession.id == session_id).scalar_subquery()
+            )
+        message = Message(
+            session_id=session_id,
+            user_id=owner,
+            content=content,
+            type="user",
+            responses=responses,
+            token_counts=count_message_tokens(
+                content, responses, {result.model for result in results}
+            ),
+            created_at=now,
+        )
+        db.add(message)
+        if user_id is not None:
+            await record_results(db, user_id, results, now)
+        await db.commit()
+        return message
+
+
+async def stream_message(
+    session_id: UUID,
+    content: str,
+    targets: Sequence[Tuple[str, str]],
+    params: Dict[str, Any],
+    api_keys: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    user_id: Optional[UUID] = None,
+    use_cache: Optional[bool] = None,
+    contexts: Optional[Dict[Tuple[str, str], List[Dict[str, str]]]] = None,
+) -> AsyncIterator[str]:
+    """Multiplex every provider's token stream into one SSE stream.
+
+    Deltas pass through a bounded queue, so a slow client pauses the
+    provider reads instead of piling tokens up in memory. The message row
+    is written once, after the last provider has finished. ``contexts``
+    holds each target's prompt with history, from ``build_contexts``.
+    """
+    queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=settings.CHAT_STREAM_BUFFER)
+    coordinator = LLMCoordinator(
+        api_keys=api_keys,
+        timeout=timeout,
+        deadline=deadline,
+        user_id=user_id,
+        use_cache=use_cache,
+    )
+    results: List[LLMResult] = []
+
+    async def on_delta(result: LLMResult, delta: str) -> None:
+        await queue.put(("delta", result, delta))
+
+    async def produce() -> None:
+        try:
+            async for result in coordinator.iter_results(
+                targets, prompt=content, params=params, on_delta=on_delta, contexts=contexts
+            ):
+                await queue.put(("result", result, None))
+        except Exception:
+            logger.exception("Chat fan-out failed for session %s", session_id)
+        await queue.put(_END)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            kind, result, delta = item
+            if kind == "delta":
+                yield format_sse(
+                    "delta",
+                    {"provider": result.provider, "model": result.model, "delta": delta},
+                )
+            else:
+                results.append(result)
+                yield format_sse(
+                    "result",
+                    {
+                        "provider": result.provider,
+                        "model": result.model,
+                        "status": result.status,
+                        "error": result.error,
+                        "ttft": result.ttft,
+                        "latency": result.latency,
+                        "usage": result.usage,
+                        "cost": result.cost,
+                        "cached": result.cached,
+                    },
+                )
+
+        message = await save_message(session_id, content, results, user_id=user_id)
+        yield format_sse("done", {"message_id": str(message.id)})
+    finally:
+        # The client went away: stop paying for tokens nobody will read
+        if not producer.done():
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
@@ -0,0 +1,251 @@
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.usage import UsageRollup
+from src.services.llm.base import LLMResult
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("hour", "day")
+
+COUNTERS = (
+    "requests",
+    "successes",
+    "errors",
+    "cache_hits",
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "cost",
+    "latency_total",
+)
+
+# Aggregate the raw per-provider responses stored on each message into
+# rollup rows. Shared by the backfill and the consistency check so both
+# agree with record_results on what is counted: tokens and cost only for
+# calls that were actually billed, latency only for successful ones.
+RAW_ROLLUP_SQL = """
+SELECT
+    s.user_id AS user_id,
+    CAST(:granularity AS varchar) AS granularity,
+    date_trunc(:granularity, m.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS bucket_start,
+    r->>'provider' AS provider,
+    r->>'model' AS model,
+    count(*) AS requests,
+    count(*) FILTER (WHERE r->>'status' = 'ok') AS successes,
+    count(*) FILTER (WHERE r->>'status' IN ('error', 'timeout')) AS errors,
+    count(*) FILTER (WHERE billed IS FALSE) AS cache_hits,
+    coalesce(sum((r->'usage'->>'prompt_tokens')::bigint) FILTER (WHERE billed), 0) AS prompt_tokens,
+    coalesce(sum((r->'usage'->>'completion_tokens')::bigint) FILTER (WHERE billed), 0)
+        AS completion_tokens,
+    coalesce(sum((r->'usage'->>'total_tokens')::bigint) FILTER (WHERE billed), 0) AS total_tokens,
+    coalesce(sum((r->>'cost')::float) FILTER (WHERE billed), 0) AS cost,
+    coalesce(sum((r->>'latency')::float) FILTER (WHERE r->>'status' = 'ok'), 0) AS latency_total
+FROM messages m
+JOIN chat_sessions s ON s.id = m.session_id
+CROSS JOIN LATERAL json_array_elements(coalesce(m.responses, '[]'::json)) AS r
+CROSS JOIN LATERAL (SELECT NOT coalesce((r->>'cached')::boolean, false) AS billed) AS b
+WHERE m.created_at >= :since AND (CAST(:user_id AS uuid) IS NULL OR s.user_id = :user_id)
+GROUP BY 1, 2, 3, 4, 5
+"""
+
+RollupKey = Tuple[UUID, str, datetime, str, str]
+
+# asyncpg binds at most 32767 parameters in one statement
+MAX_BIND_PARAMS = 32767
+
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its UTC hour or day."""
+    at = at.astimezone(timezone.utc)
+    if granularity == "hour":
+        return at.replace(minute=0, second=0, microsecond=0)
+    return at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _result_counters(result: LLMResult) -> Dict[str, Any]:
+    # Cache hits carry the original call's usage; only count what was billed
+    billed = not result.cached
+    usage = result.usage or {}
+    return {
+        "requests": 1,
+        "successes": int(result.status == "ok"),
+        "errors": int(result.status in ("error", "timeout")),
+        "cache_hits": int(result.cached),
+        "prompt_tokens": usage.get("prompt_tokens", 0) if billed else 0,
+        "completion_tokens": usage.get("completion_tokens", 0) if billed else 0,
+        "total_tokens": usage.get("total_tokens", 0) if billed else 0,
+        "cost": (result.cost or 0.0) if billed else 0.0,
+        "latency_total": (result.latency or 0.0) if result.status == "ok" else 0.0,
+    }
+
+
+async def record_results(
+    db: AsyncSession,
+    user_id: UUID,
+    results: Iterable[LLMResult],
+    at: datetime,
+) -> None:
+    """Add a batch of provider results to the hourly and daily rollups.
+
+    Runs in the caller's transaction, so the counters commit or roll back
+    together with the message that holds the raw responses.
+    """
+    rows: Dict[RollupKey, Dict[str, Any]] = {}
+    for result in results:
+        counters = _result_counters(result)
+        for granularity in GRANULARITIES:
+            key = (
+                user_id,
+                granularity,
+                bucket_start(at, granularity),
+                result.provider,
+                result.model,
+            )
+            row = rows.get(key)
+            if row is None:
+                rows[key] = dict(counters)
+            else:
+                for name, value in counters.items():
+                    row[name] += value
+    if not rows:
+        return
+
+    # A stable row order keeps concurrent upserts from deadlocking
+    values = [
+        dict(zip(("user_id", "granularity", "bucket_start", "provider", "model"), key), **counters)
+        for key, counters in sorted(rows.items(), key=lambda item: item[0][1:])
+    ]
+    statement = insert(UsageRollup).values(values)
+    statement = statement.on_conflict_do_update(
+        constraint="uq_usage_rollups_bucket",
+        set_={
+            name: getattr(UsageRollup, name) + getattr(statement.excluded, name)
+            for name in COUNTERS
+        },
+    )
+    await db.execute(statement)
+
+
+async def insert_rows(db: AsyncSession, model: Any, rows: List[Dict[str, Any]]) -> None:
+    """Bulk insert ``rows`` in as few statements as the bind-parameter limit allows."""
+    # Every column may be bound per row, defaults such as the id included
+    size = max(1, MAX_BIND_PARAMS // len(model.__table__.columns))
+    for start in range(0, len(rows), size):
+        await db.execute(insert(model).values(rows[start : start + size]))
+
+
+def _aligned_since(since: Optional[datetime]) -> datetime:
+    # Whole days, so no rebuilt bucket mixes old and recomputed counts
+    return bucket_start(since or datetime(1970, 1, 1, tzinfo=timezone.utc), "day")
+
+
+async def _raw_rollups(
+    db: AsyncSession,
+    since: datetime,
+    user_id: Optional[UUID],
+) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    for granularity in GRANULARITIES:
+        result = await db.execute(
+            text(RAW_ROLLUP_SQL),
+            {"granularity": granularity, "since": since, "user_id": user_id},
+        )
+        rows.extend(dict(row) for row in result.mappings())
+    return rows
+
+
+async def backfill(
+    db: AsyncSession,
+    since: Optional[datetime] = None,
+    user_id: Optional[UUID] = None,
+) -> int:
+    """Rebuild rollups from the raw message history; returns rows written.
+
+    Live writers are blocked for the duration, so a message committed
+    concurrently is counted exactly once: either here or by its own upsert.
+    """
+    since = _aligned_since(since)
+    await db.execute(text("LOCK TABLE usage_rollups IN SHARE ROW EXCLUSIVE MODE"))
+
+    query = delete(UsageRollup).where(UsageRollup.bucket_start >= since)
+    if user_id is not None:
+        query = query.where(UsageRollup.user_id == user_id)
+    await db.execute(query)
+
+    rows = await _raw_rollups(db, since, user_id)
+    await insert_rows(db, UsageRollup, rows)
+    await db.commit()
+    logger.info("Rebuilt %d usage rollup rows since %s", len(rows), since.isoformat())
+    return len(rows)
+
+
+def _differs(expected: Any, actual: Any) -> bool:
+    if isinstance(expected, float) or isinstance(actual, float):
+        return not math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-6)
+    return expected != actual
+
+
+async def check_consistency(
+    db: AsyncSession,
+    since: Optional[datetime] = None,
+    user_id: Optional[UUID] = None,
+) -> List[Dict[str, Any]]:
+    """Compare rollups with the raw message history.
+
+    Returns one entry per bucket whose counters disagree, with the
+    expected (raw) and actual (rollup) values; empty when consistent.
+    """
+    since = _aligned_since(since)
+    expected: Dict[RollupKey, Dict[str, Any]] = {}
+    for row in await _raw_rollups(db, since, user_id):
+        key = (
+            row["user_id"],
+            row["granularity"],
+            row["bucket_start"],
+            row["provider"],
+            row["model"],
+        )
+        expected[key] = {name: row[name] for name in COUNTERS}
+
+    query = select(UsageRollup).where(UsageRollup.bucket_start >= since)
+    if user_id is not None:
+        query = query.where(UsageRollup.user_id == user_id)
+    actual: Dict[RollupKey, Dict[str, Any]] = {}
+    for rollup in (await db.execute(query)).scalars():
+        key = (
+            rollup.user_id,
+            rollup.granularity,
+            rollup.bucket_start,
+            rollup.provider,
+            rollup.model,
+        )
+        actual[key] = {name: getattr(rollup, name) for name in COUNTERS}
+
+    zero = dict.fromkeys(COUNTERS, 0)
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys(), key=lambda k: (str(k[0]),) + k[1:]):
+        want, got = expected.get(key, zero), actual.get(key, zero)
+        diff = {
+            name: (want[name], got[name]) for name in COUNTERS if _differs(want[name], got[name])
+        }
+        if diff:
+            user, granularity, start, provider, model = key
+            mismatches.append(
+                {
+                    "user_id": str(user),
+                    "granularity": granularity,
+                    "bucket_start": start.isoformat(),
+                    "provider": provider,
+                    "model": model,
+                    "diff": diff,
+                }
+            )
+    return mismatches
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.usage import UsageRollup
+from src.services.dashboard.rollup import COUNTERS, bucket_start
+from src.services.llm.cache import response_cache
+
+
+def _since(days: int, granularity: str = "day") -> datetime:
+    return bucket_start(datetime.now(timezone.utc) - timedelta(days=days), granularity)
+
+
+def _sums() -> List[Any]:
+    return [func.coalesce(func.sum(getattr(UsageRollup, name)), 0).label(name) for name in COUNTERS]
+
+
+def _totals(row: Dict[str, Any]) -> Dict[str, Any]:
+    totals = {name: row.get(name) or 0 for name in COUNTERS}
+    totals["success_rate"] = (
+        totals["successes"] / totals["requests"] if totals["requests"] else None
+    )
+    totals["avg_latency"] = (
+        totals["latency_total"] / totals["successes"] if totals["successes"] else None
+    )
+    return totals
+
+
+async def get_stats(db: AsyncSession, user_id: UUID, days: int) -> Dict[str, Any]:
+    """Headline totals and a per-provider breakdown from the daily rollups."""
+    query = (
+        select(UsageRollup.provider, *_sums())
+        .where(
+            UsageRollup.user_id == user_id,
+            UsageRollup.granularity == "day",
+            UsageRollup.bucket_start >= _since(days),
+        )
+        .group_by(UsageRollup.provider)
+        .order_by(UsageRollup.provider)
+    )
+    providers = [dict(row) for row in (await db.execute(query)).mappings()]
+    overall = {name: sum(row[name] for row in providers) for name in COUNTERS}
+    return {
+        "days": days,
+        "totals": _totals(overall),
+        "providers": [dict(_totals(row), provider=row["provider"]) for row in providers],
+        "cache_savings": await response_cache.get_savings(str(user_id)),
+    }
+
+
+async def get_usage(
+    db: AsyncSession,
+    user_id: UUID,
+    days: int,
+    granularity: str,
+) -> Dict[str, Any]:
+    """Time series of usage per provider, one point per bucket."""
+    query = (
+        select(UsageRollup.bucket_start, UsageRollup.provider, *_sums())
+        .where(
+            UsageRollup.user_id == user_id,
+            UsageRollup.granularity == granularity,
+            UsageRollup.bucket_start >= _since(days, granularity),
+        )
+        .group_by(UsageRollup.bucket_start, UsageRollup.provider)
+        .order_by(UsageRollup.bucket_start, UsageRollup.provider)
+    )
+    series = [
+        dict(_totals(row), bucket_start=row["bucket_start"], provider=row["provider"])
+        for row in (await db.execute(query)).mappings()
+    ]
+    return {"days": days, "granularity": granularity, "series": series}
+
+
+async def get_costs(db: AsyncSession, user_id: UUID, days: int) -> Dict[str, Any]:
+    """Spend per provider/model and per day from the daily rollups."""
+    scope = (
+        UsageRollup.user_id == user_id,
+        UsageRollup.granularity == "day",
+        UsageRollup.bucket_start >= _since(days),
+    )
+    cost = func.coalesce(func.sum(UsageRollup.cost), 0).label("cost")
+    tokens = func.coalesce(func.sum(UsageRollup.total_tokens), 0).label("total_tokens")
+
+    by_model = await db.execute(
+        select(UsageRollup.provider, UsageRollup.model, cost, tokens)
+        .where(*scope)
+        .group_by(UsageRollup.provider, UsageRollup.model)
+        .order_by(cost.desc())
+    )
+    daily = await db.execute(
+        select(UsageRollup.bucket_start, cost)
+        .where(*scope)
+        .group_by(UsageRollup.bucket_start)
+        .order_by(UsageRollup.bucket_start)
+    )
+    models = [dict(row) for row in by_model.mappings()]
+    return {
+        "days": days,
+        "total_cost": sum(row["cost"] for row in models),
+        "models": models,
+        "daily": [dict(row) for row in daily.mappings()],
+        "cache_savings": await response_cache.get_savings(str(user_id)),
+    }
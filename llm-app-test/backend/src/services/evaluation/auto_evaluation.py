@@ -0,0 +1,92 @@
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.chat import Message
+from src.models.evaluation import Evaluation
+from src.services.evaluation.metrics import Scores, score_batch
+
+_WORD = re.compile(r"\w+")
+
+
+def _terms(text: str) -> Set[str]:
+    return set(_WORD.findall(text.lower()))
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    union = a | b
+    return len(a & b) / len(union) if union else 1.0
+
+
+def term_overlap(text: str, reference: str) -> float:
+    """Share of distinct terms two texts have in common, 0-1."""
+    return _jaccard(_terms(text), _terms(reference))
+
+
+async def store_scores(
+    db: AsyncSession,
+    messages: Sequence[Tuple[UUID, UUID]],
+    scores: Sequence[Scores],
+) -> int:
+    """Merge automatic metrics into the evaluations of many messages.
+
+    ``messages`` holds (message_id, user_id) pairs in the order of
+    ``scores``. Existing evaluations are loaded with one query and new
+    ones bulk-inserted; the caller commits. Returns responses scored.
+    Messages without scores get no evaluation rows.
+    """
+    pairs = [(message, found) for message, found in zip(messages, scores) if found]
+    if not pairs:
+        return 0
+    message_ids = [message_id for (message_id, _), _ in pairs]
+    existing = await db.execute(select(Evaluation).filter(Evaluation.message_id.in_(message_ids)))
+    by_target: Dict[Tuple[UUID, str, Optional[str]], Evaluation] = {
+        (
+            evaluation.message_id,
+            evaluation.provider,
+            (evaluation.auto_metrics or {}).get("model"),
+        ): evaluation
+        for evaluation in existing.scalars()
+    }
+
+    created: List[Dict[str, Any]] = []
+    scored = 0
+    for (message_id, user_id), message_scores in pairs:
+        for (provider, model), metrics in message_scores.items():
+            scored += 1
+            # A rating stored before any scoring run has no model recorded yet
+            evaluation = by_target.get((message_id, provider, model)) or by_target.pop(
+                (message_id, provider, None), None
+            )
+            if evaluation is None:
+                created.append(
+                    {
+                        "user_id": user_id,
+                        "message_id": message_id,
+                        "provider": provider,
+                        "auto_metrics": metrics,
+                    }
+                )
+            else:
+                evaluation.auto_metrics = dict(evaluation.auto_metrics or {}, **metrics)
+    if created:
+        await db.execute(insert(Evaluation), created)
+    return scored
+
+
+async def score_messages(db: AsyncSession, message_ids: Sequence[UUID]) -> int:
+    """Score and store the responses of the given messages; returns how many."""
+    result = await db.execute(
+        select(Message.id, Message.user_id, Message.responses).filter(Message.id.in_(message_ids))
+    )
+    rows = result.all()
+    if not rows:
+        return 0
+    scores = score_batch([row.responses or [] for row in rows])
+    scored = await store_scores(db, [(row.id, row.user_id) for row in rows], scores)
+    if scored:
+        await db.commit()
+    return scored
@@ -0,0 +1,120 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Character n-grams work the same for every language, including ones
+# written without spaces between words
+NGRAM = 3
+_BITS = 21  # Every Unicode code point fits in 21 bits
+
+Scores = Dict[Tuple[str, str], Dict[str, Any]]
+
+
+def ngram_codes(text: str) -> np.ndarray:
+    """Character trigrams of the normalized text, each packed into one integer."""
+    normalized = " ".join(text.lower().split())
+    points = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if 0 < len(points) < NGRAM:
+        points = np.pad(points, (0, NGRAM - len(points)))
+    codes = np.zeros(max(len(points) - NGRAM + 1, 0), dtype=np.uint64)
+    for offset in range(NGRAM):
+        codes = (codes << np.uint64(_BITS)) | points[offset : len(points) - NGRAM + 1 + offset]
+    return codes
+
+
+def similarity_matrix(texts: Sequence[str]) -> np.ndarray:
+    """Pairwise cosine similarity of TF-IDF weighted trigram vectors.
+
+    The vocabulary is just the trigrams of these texts, so the whole
+    matrix comes from one small dense product and needs no fitted model.
+    """
+    count = len(texts)
+    codes = [ngram_codes(text) for text in texts]
+    sizes = np.array([len(c) for c in codes], dtype=np.int64)
+    if not sizes.sum():
+        return np.zeros((count, count))
+
+    vocabulary, inverse = np.unique(np.concatenate(codes), return_inverse=True)
+    width = len(vocabulary)
+    documents = np.repeat(np.arange(count), sizes)
+    counts = np.bincount(documents * width + inverse.ravel(), minlength=count * width)
+    counts = counts.reshape(count, width).astype(np.float64)
+
+    # Sublinear term frequency and smoothed inverse document frequency
+    present = counts > 0
+    weights = np.zeros_like(counts)
+    np.log(counts, out=weights, where=present)
+    weights[present] += 1.0
+    weights *= np.log((1 + count) / (1 + present.sum(axis=0))) + 1.0
+
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    unit = np.divide(weights, norms, out=np.zeros_like(weights), where=norms > 0)
+    return np.clip(unit @ unit.T, 0.0, 1.0)
+
+
+def _number(value: Any, digits: int = 4) -> Optional[float]:
+    # NaN and inf (missing or zero inputs) are stored as null
+    value = float(value)
+    return round(value, digits) if math.isfinite(value) else None
+
+
+def _column(responses: Sequence[Dict[str, Any]], read) -> np.ndarray:
+    values = [read(response) for response in responses]
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+
+def score_responses(responses: List[Dict[str, Any]]) -> Scores:
+    """Automatic metrics for each successful response of one turn.
+
+    ``agreement`` is the mean similarity to the other providers' answers,
+    a reference-free signal of consensus; ``similarity`` has each pair.
+    Length and latency are also scored relative to the turn's other
+    responses. Answers with no content are not scored.
+    """
+    answered = [r for r in responses if r.get("status") == "ok" and r.get("content")]
+    if not answered:
+        return {}
+    keys = [f"{r['provider']}/{r['model']}" for r in answered]
+    count = len(answered)
+
+    similarity = similarity_matrix([r.get("content") or "" for r in answered])
+    lengths = np.array([len(r.get("content") or "") for r in answered], dtype=np.float64)
+    latency = _column(answered, lambda r: r.get("latency") or None)
+    ttft = _column(answered, lambda r: r.get("ttft"))
+    completion = _column(
+        answered, lambda r: (r.get("usage") or {}).get("completion_tokens") or None
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        agreement = (similarity.sum(axis=1) - similarity.diagonal()) / (count - 1)
+        spread = lengths.std()
+        length_z = (lengths - lengths.mean()) / spread if spread else np.zeros(count)
+        chars_per_second = lengths / latency
+        tokens_per_second = completion / latency
+        chars_per_token = lengths / completion
+        fastest = np.nanmin(latency) if np.isfinite(latency).any() else np.nan
+        latency_ratio = latency / fastest
+
+    scores: Scores = {}
+    for i, response in enumerate(answered):
+        scores[(response["provider"], response["model"])] = {
+            "model": response["model"],
+            "length": int(lengths[i]),
+            "latency": response.get("latency"),
+            "ttft": _number(ttft[i]),
+            "completion_tokens": int(completion[i]) if np.isfinite(completion[i]) else None,
+            "chars_per_second": _number(chars_per_second[i]),
+            "tokens_per_second": _number(tokens_per_second[i]),
+            "chars_per_token": _number(chars_per_token[i]),
+            "length_z": _number(length_z[i]),
+            "latency_ratio": _number(latency_ratio[i]),
+            "agreement": _number(agreement[i]) if count > 1 else None,
+            "similarity": {keys[j]: _number(similarity[i, j]) for j in range(count) if j != i},
+        }
+    return scores
+
+
+def score_batch(batch: Sequence[List[Dict[str, Any]]]) -> List[Scores]:
+    """Score the responses of many turns; safe to run in a worker process."""
+    return [score_responses(list(responses or [])) for responses in batch]
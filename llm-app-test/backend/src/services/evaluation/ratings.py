@@ -0,0 +1,337 @@
+import logging
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.chat import Message
+from src.models.evaluation import Evaluation, RatingRollup
+from src.schemas.evaluation import RatingCreate
+from src.services.dashboard.rollup import bucket_start, insert_rows
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ("usefulness", "accuracy", "creativity")
+SCALE = range(1, 6)
+LEVELS = tuple(f"rated_{level}" for level in SCALE)
+PERCENTILES = (25, 50, 75, 90)
+ALL_TIME = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Rebuild rating rollups from the evaluations table; shared by the
+# backfill and the consistency check
+RAW_ROLLUP_SQL = """
+SELECT
+    e.user_id AS user_id,
+    g.granularity AS granularity,
+    CASE WHEN g.granularity = 'day'
+        THEN date_trunc('day', coalesce(e.rated_at, e.created_at) AT TIME ZONE 'UTC')
+            AT TIME ZONE 'UTC'
+        ELSE CAST('1970-01-01 00:00:00+00' AS timestamptz)
+    END AS bucket_start,
+    e.provider AS provider,
+    d.dimension AS dimension,
+    count(*) FILTER (WHERE d.value = 1) AS rated_1,
+    count(*) FILTER (WHERE d.value = 2) AS rated_2,
+    count(*) FILTER (WHERE d.value = 3) AS rated_3,
+    count(*) FILTER (WHERE d.value = 4) AS rated_4,
+    count(*) FILTER (WHERE d.value = 5) AS rated_5
+FROM evaluations e
+CROSS JOIN LATERAL (VALUES
+    ('usefulness', e.usefulness_rating),
+    ('accuracy', e.accuracy_rating),
+    ('creativity', e.creativity_rating)
+) AS d(dimension, value)
+CROSS JOIN (VALUES ('day'), ('all')) AS g(granularity)
+WHERE d.value IS NOT NULL AND (CAST(:user_id AS uuid) IS NULL OR e.user_id = :user_id)
+GROUP BY 1, 2, 3, 4, 5
+"""
+
+RollupKey = Tuple[str, str, datetime, str]
+Deltas = Dict[RollupKey, Dict[str, int]]
+
+
+def _ratings(evaluation: Evaluation) -> Dict[str, Optional[int]]:
+    return {dimension: getattr(evaluation, f"{dimension}_rating") for dimension in DIMENSIONS}
+
+
+def count_ratings(
+    deltas: Deltas,
+    provider: str,
+    ratings: Dict[str, Optional[int]],
+    at: datetime,
+    sign: int,
+) -> None:
+    """Add (sign 1) or retract (sign -1) ratings in the buckets for ``at``."""
+    for dimension, value in ratings.items():
+        if value is None:
+            continue
+        for granularity, start in (("day", bucket_start(at, "day")), ("all", ALL_TIME)):
+            key = (provider, granularity, start, dimension)
+            deltas.setdefault(key, dict.fromkeys(LEVELS, 0))[f"rated_{value}"] += sign
+
+
+async def record_rating_deltas(db: AsyncSession, user_id: UUID, deltas: Deltas) -> None:
+    """Apply histogram deltas in one upsert, in the caller's transaction."""
+    rows = {key: delta for key, delta in deltas.items() if any(delta.values())}
+    if not rows:
+        return
+
+    # A stable row order keeps concurrent upserts from deadlocking
+    values = [
+        dict(
+            zip(("provider", "granularity", "bucket_start", "dimension"), key),
+            user_id=user_id,
+            **delta,
+        )
+        for key, delta in sorted(rows.items())
+    ]
+    statement = insert(RatingRollup).values(values)
+    statement = statement.on_conflict_do_update(
+        constraint="uq_rating_rollups_bucket",
+        set_={
+            level: getattr(RatingRollup, level) + getattr(statement.excluded, level)
+            for level in LEVELS
+        },
+    )
+    await db.execute(statement)
+
+
+def _match(candidates: Sequence[Evaluation], model: Optional[str]) -> Optional[Evaluation]:
+    # The evaluation the scorer keyed by model, else one not tied to a model yet
+    def model_of(evaluation: Evaluation) -> Optional[str]:
+        return (evaluation.auto_metrics or {}).get("model")
+
+    if model:
+        keyed = next((e for e in candidates if model_of(e) == model), None)
+        if keyed is not None:
+            return keyed
+    unkeyed = next((e for e in candidates if not model_of(e)), None)
+    if unkeyed is None and not model and candidates:
+        return candidates[0]
+    return unkeyed
+
+
+async def rate_responses(
+    db: AsyncSession,
+    user_id: UUID,
+    items: Sequence[RatingCreate],
+) -> Tuple[List[Evaluation], List[UUID]]:
+    """Store a batch of the user's ratings and update the rollups once.
+
+    Dimensions left as None keep their previous rating; later items for
+    the same response apply on top of earlier ones. Nothing is written
+    unless the user owns every message; the second value lists those
+    they do not.
+    """
+    message_ids = {item.message_id for item in items}
+    owned = set(
+        (
+            await db.execute(
+                select(Message.id).filter(Message.id.in_(message_ids), Message.user_id == user_id)
+            )
+        ).scalars()
+    )
+    missing = sorted(message_ids - owned, key=str)
+    if missing:
+        return [], missing
+
+    # Locked in id order, so concurrent re-ratings neither both retract the
+    # old values nor deadlock on each other
+    pairs = {(item.message_id, item.provider) for item in items}
+    result = await db.execute(
+        select(Evaluation)
+        .filter(
+            Evaluation.message_id.in_(message_ids),
+            tuple_(Evaluation.message_id, Evaluation.provider).in_(pairs),
+        )
+        .order_by(Evaluation.id)
+        .with_for_update()
+    )
+    candidates: Dict[Tuple[UUID, str], List[Evaluation]] = {}
+    for evaluation in sorted(result.scalars(), key=lambda e: e.created_at):
+        candidates.setdefault((evaluation.message_id, evaluation.provider), []).append(evaluation)
+
+    now = datetime.now(timezone.utc)
+    deltas: Deltas = {}
+    touched: Dict[int, Evaluation] = {}
+    rated: List[Evaluation] = []
+    for item in items:
+        key = (item.message_id, item.provider)
+        evaluation = _match(candidates.get(key, []), item.model)
+        if evaluation is None:
+            evaluation = Evaluation(
+                user_id=user_id,
+                message_id=item.message_id,
+                provider=item.provider,
+                auto_metrics={"model": item.model} if item.model else {},
+            )
+            db.add(evaluation)
+            candidates.setdefault(key, []).append(evaluation)
+        elif id(evaluation) not in touched:
+            # Taken out of the bucket it was last rated in, once per batch
+            old_at = evaluation.rated_at or evaluation.created_at
+            count_ratings(deltas, item.provider, _ratings(evaluation), old_at, -1)
+        touched[id(evaluation)] = evaluation
+
+        for dimension in DIMENSIONS:
+            value = getattr(item, f"{dimension}_rating")
+            if value is not None:
+                setattr(evaluation, f"{dimension}_rating", value)
+        if item.feedback is not None:
+            evaluation.feedback = item.feedback
+        evaluation.rated_at = now
+        rated.append(evaluation)
+
+    for evaluation in touched.values():
+        count_ratings(deltas, evaluation.provider, _ratings(evaluation), now, 1)
+
+    # The flush sends new evaluations as one multi-row INSERT and the
+    # changed ones as one batched UPDATE
+    await db.flush()
+    await record_rating_deltas(db, user_id, deltas)
+    await db.commit()
+    return rated, []
+
+
+async def rate_response(
+    db: AsyncSession, user_id: UUID, item: RatingCreate
+) -> Optional[Evaluation]:
+    """Store one rating; returns None when the message does not belong to the user."""
+    rated, missing = await rate_responses(db, user_id, [item])
+    return None if missing else rated[0]
+
+
+def summarize(histogram: List[int]) -> Dict[str, Any]:
+    """Count, mean, sample variance and nearest-rank percentiles of a 1-5 histogram."""
+    count = sum(histogram)
+    summary: Dict[str, Any] = {
+        "count": count,
+        "mean": None,
+        "variance": None,
+        "stddev": None,
+        "percentiles": {f"p{p}": None for p in PERCENTILES},
+        "histogram": histogram,
+    }
+    if count == 0:
+        return summary
+
+    mean = sum(level * n for level, n in zip(SCALE, histogram)) / count
+    summary["mean"] = mean
+    if count > 1:
+        squares = sum(n * (level - mean) ** 2 for level, n in zip(SCALE, histogram))
+        summary["variance"] = squares / (count - 1)
+        summary["stddev"] = math.sqrt(summary["variance"])
+    for p in PERCENTILES:
+        rank = max(1, math.ceil(p / 100 * count))
+        seen = 0
+        for level, n in zip(SCALE, histogram):
+            seen += n
+            if seen >= rank:
+                summary["percentiles"][f"p{p}"] = level
+                break
+    return summary
+
+
+async def get_rating_stats(
+    db: AsyncSession,
+    user_id: UUID,
+    days: Optional[int] = None,
+    provider: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Rating statistics per provider and dimension from the rollups.
+
+    All-time stats read one row per provider and dimension; a ``days``
+    window sums that many daily rows, independent of how many
+    evaluations they hold.
+    """
+    query = select(
+        RatingRollup.provider,
+        RatingRollup.dimension,
+        *[
+            func.coalesce(func.sum(getattr(RatingRollup, level)), 0).label(level)
+            for level in LEVELS
+        ],
+    ).where(RatingRollup.user_id == user_id)
+    if days is None:
+        query = query.where(RatingRollup.granularity == "all")
+    else:
+        since = bucket_start(datetime.now(timezone.utc) - timedelta(days=days), "day")
+        query = query.where(RatingRollup.granularity == "day", RatingRollup.bucket_start >= since)
+    if provider is not None:
+        query = query.where(RatingRollup.provider == provider)
+    query = query.group_by(RatingRollup.provider, RatingRollup.dimension).order_by(
+        RatingRollup.provider
+    )
+
+    providers: Dict[str, Dict[str, Any]] = {}
+    for row in (await db.execute(query)).mappings():
+        dimensions = providers.setdefault(row["provider"], {})
+        dimensions[row["dimension"]] = summarize([int(row[level]) for level in LEVELS])
+    return {
+        "days": days,
+        "providers": [
+            {"provider": name, "dimensions": dimensions} for name, dimensions in providers.items()
+        ],
+    }
+
+
+async def _raw_rollups(db: AsyncSession, user_id: Optional[UUID]) -> List[Dict[str, Any]]:
+    result = await db.execute(text(RAW_ROLLUP_SQL), {"user_id": user_id})
+    return [dict(row) for row in result.mappings()]
+
+
+async def backfill(db: AsyncSession, user_id: Optional[UUID] = None) -> int:
+    """Rebuild rating rollups from the evaluations; returns rows written."""
+    await db.execute(text("LOCK TABLE rating_rollups IN SHARE ROW EXCLUSIVE MODE"))
+    query = delete(RatingRollup)
+    if user_id is not None:
+        query = query.where(RatingRollup.user_id == user_id)
+    await db.execute(query)
+
+    rows = await _raw_rollups(db, user_id)
+    await insert_rows(db, RatingRollup, rows)
+    await db.commit()
+    logger.info("Rebuilt %d rating rollup rows", len(rows))
+    return len(rows)
+
+
+async def check_consistency(
+    db: AsyncSession, user_id: Optional[UUID] = None
+) -> List[Dict[str, Any]]:
+    """Compare rating rollups with the evaluations; returns mismatched buckets."""
+
+    def key(row: Any) -> Tuple[Any, ...]:
+        return (
+            row["user_id"],
+            row["granularity"],
+            row["bucket_start"],
+            row["provider"],
+            row["dimension"],
+        )
+
+    expected = {
+        key(row): [row[level] for level in LEVELS] for row in await _raw_rollups(db, user_id)
+    }
+    query = select(RatingRollup)
+    if user_id is not None:
+        query = query.where(RatingRollup.user_id == user_id)
+    actual: Dict[Tuple[Any, ...], List[int]] = {}
+    for rollup in (await db.execute(query)).scalars():
+        counts = [getattr(rollup, level) for level in LEVELS]
+        # A bucket whose ratings all moved elsewhere is left at zero
+        if any(counts):
+            actual[key(rollup.__dict__)] = counts
+
+    return [
+        {
+            "key": list(bucket),
+            "expected": expected.get(bucket, [0] * len(LEVELS)),
+            "actual": actual.get(bucket, [0] * len(LEVELS)),
+        }
+        for bucket in sorted(set(expected) | set(actual), key=str)
+        if expected.get(bucket) != actual.get(bucket)
+    ]
@@ -0,0 +1,342 @@
+import csv
+import io
+import json
+import logging
+import os
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import JSON, and_, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import AsyncSessionLocal
+from src.config.settings import settings
+from src.models.chat import ChatSession, ExportJob, Message
+from src.models.evaluation import Evaluation
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("json", "csv")
+MEDIA_TYPES = {"json": "application/json", "csv": "text/csv"}
+
+CSV_COLUMNS = [
+    "session_id",
+    "session_title",
+    "message_id",
+    "created_at",
+    "type",
+    "content",
+    "provider",
+    "model",
+    "response",
+    "status",
+    "error",
+    "latency",
+    "ttft",
+    "total_tokens",
+    "cost",
+    "usefulness_rating",
+    "accuracy_rating",
+    "creativity_rating",
+    "feedback",
+]
+
+
+def _export_query(user_id: UUID, session_id: Optional[UUID]):
+    # Evaluations are aggregated per message in the database, so each
+    # exported row is self-contained and nothing is joined in Python
+    evaluation = func.json_build_object(
+        "provider",
+        Evaluation.provider,
+        "usefulness_rating",
+        Evaluation.usefulness_rating,
+        "accuracy_rating",
+        Evaluation.accuracy_rating,
+        "creativity_rating",
+        Evaluation.creativity_rating,
+        "feedback",
+        Evaluation.feedback,
+        "auto_metrics",
+        Evaluation.auto_metrics,
+        "created_at",
+        Evaluation.created_at,
+    )
+    evaluations = (
+        select(
+            func.json_agg(
+                aggregate_order_by(evaluation, Evaluation.created_at, Evaluation.id), type_=JSON
+            )
+        )
+        .where(Evaluation.message_id == Message.id)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            Message.session_id,
+            ChatSession.title.label("session_title"),
+            ChatSession.tags.label("session_tags"),
+            ChatSession.created_at.label("session_created_at"),
+            Message.id,
+            Message.type,
+            Message.content,
+            Message.responses,
+            Message.created_at,
+            evaluations.label("evaluations"),
+        )
+        .join(ChatSession, ChatSession.id == Message.session_id)
+        .filter(ChatSession.user_id == user_id)
+    )
+    if session_id is not None:
+        query = query.filter(Message.session_id == session_id)
+    # Session by session, each in history order along ix_messages_session_created_id
+    return query.order_by(Message.session_id, Message.created_at, Message.id)
+
+
+async def _partitions(
+    db: AsyncSession,
+    user_id: UUID,
+    session_id: Optional[UUID],
+) -> AsyncIterator[Sequence[Any]]:
+    """Yield export rows in batches from a server-side cursor."""
+    # A consistent snapshot for the whole export, however long it takes
+    await db.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY"))
+    result = await db.stream(
+        _export_query(user_id, session_id).execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+    )
+    async for partition in result.partitions():
+        yield partition
+
+
+def _default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+
+async def encode_json(partitions: AsyncIterator[Sequence[Any]]) -> AsyncIterator[str]:
+    """Encode rows as one JSON document, grouped by session, a batch at a time."""
+    yield '{"exported_at":' + _dumps(datetime.now(timezone.utc)) + ',"sessions":['
+    current = None
+    first = True
+    async for rows in partitions:
+        parts: List[str] = []
+        for row in rows:
+            if row.session_id != current:
+                if current is not None:
+                    parts.append("]},")
+                current = row.session_id
+                first = True
+                header = {
+                    "id": row.session_id,
+                    "title": row.session_title,
+                    "tags": row.session_tags or [],
+                    "created_at": row.session_created_at,
+                }
+                # Leave the object open for its messages
+                parts.append(_dumps(header)[:-1] + ',"messages":[')
+            if not first:
+                parts.append(",")
+            first = False
+            parts.append(
+                _dumps(
+                    {
+                        "id": row.id,
+                        "type": row.type,
+                        "content": row.content,
+                        "created_at": row.created_at,
+                        "responses": row.responses or [],
+                        "evaluations": row.evaluations or [],
+                    }
+                )
+            )
+        yield "".join(parts)
+    yield ("]}" if current is not None else "") + "]}"
+
+
+async def encode_csv(partitions: AsyncIterator[Sequence[Any]]) -> AsyncIterator[str]:
+    """Encode one CSV row per provider response, a batch at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    async for rows in partitions:
+        for row in rows:
+            # The latest evaluation of each provider's response
+            ratings = {item["provider"]: item for item in row.evaluations or []}
+            prefix = [
+                row.session_id,
+                row.session_title,
+                row.id,
+                row.created_at.isoformat(),
+                row.type,
+                row.content,
+            ]
+            for response in row.responses or [{}]:
+                rating = ratings.get(response.get("provider"), {})
+                writer.writerow(
+                    prefix
+                    + [
+                        response.get("provider"),
+                        response.get("model"),
+                        response.get("content"),
+                        response.get("status"),
+                        response.get("error"),
+                        response.get("latency"),
+                        response.get("ttft"),
+                        (response.get("usage") or {}).get("total_tokens"),
+                        response.get("cost"),
+                        rating.get("usefulness_rating"),
+                        rating.get("accuracy_rating"),
+                        rating.get("creativity_rating"),
+                        rating.get("feedback"),
+                    ]
+                )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compress a byte stream as gzip on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def _encode(
+    partitions: AsyncIterator[Sequence[Any]],
+    fmt: str,
+    compress: bool,
+) -> AsyncIterator[bytes]:
+    encoder = encode_json if fmt == "json" else encode_csv
+
+    async def encoded() -> AsyncIterator[bytes]:
+        async for text_chunk in encoder(partitions):
+            if text_chunk:
+                yield text_chunk.encode("utf-8")
+
+    chunks = encoded()
+    if compress:
+        chunks = gzip_chunks(chunks)
+    async for chunk in chunks:
+        yield chunk
+
+
+def export_filename(fmt: str, compress: bool, stem: str) -> str:
+    return f"{stem}.{fmt}" + (".gz" if compress else "")
+
+
+async def stream_export(
+    user_id: UUID,
+    session_id: Optional[UUID],
+    fmt: str,
+    compress: bool = False,
+) -> AsyncIterator[bytes]:
+    """Stream a user's history, or one session of it, as JSON or CSV.
+
+    Only one cursor batch is held in memory; a slow client simply makes
+    the cursor advance more slowly.
+    """
+    async with AsyncSessionLocal() as db:
+        async for chunk in _encode(_partitions(db, user_id, session_id), fmt, compress):
+            yield chunk
+
+
+async def _claim_export(job_id: UUID) -> Optional[ExportJob]:
+    # Pending and failed jobs can start; a running one only once its
+    # worker has stopped sending heartbeats
+    stale = datetime.now(timezone.utc) - timedelta(seconds=settings.EXPORT_STALE_SECONDS)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(ExportJob)
+            .where(
+                ExportJob.id == job_id,
+                or_(
+                    ExportJob.status.in_(("pending", "failed")),
+                    and_(ExportJob.status == "running", ExportJob.heartbeat_at < stale),
+                ),
+            )
+            .values(status="running", error=None, rows_done=0, heartbeat_at=func.now())
+            .returning(ExportJob)
+        )
+        job = result.scalar_one_or_none()
+        await db.commit()
+        return job
+
+
+async def _update_export(job_id: UUID, **values: Any) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(ExportJob).where(ExportJob.id == job_id).values(**values))
+        await db.commit()
+
+
+def export_path(relative: str) -> Path:
+    return Path(settings.UPLOAD_DIR) / relative
+
+
+async def write_export(job_id: UUID) -> Optional[int]:
+    """Write an export job's file under UPLOAD_DIR; returns rows written.
+
+    The file is written under a temporary name and renamed when complete,
+    so a crashed job never leaves a truncated export behind. Progress is
+    saved as a heartbeat; a job whose worker stopped sending them is
+    restarted by the next delivery. Returns None when the job is already
+    running or done.
+    """
+    job = await _claim_export(job_id)
+    if job is None:
+        return None
+
+    relative = os.path.join(
+        "exports", str(job.user_id), export_filename(job.format, job.compress, str(job.id))
+    )
+    path = export_path(relative)
+    # Per process, so a worker taking over never writes into a stalled one's file
+    partial = path.with_name(f"{path.name}.{os.getpid()}.part")
+    rows = 0
+    beat_every = settings.EXPORT_STALE_SECONDS / 3
+    last_beat = time.monotonic()
+
+    async def counted(partitions: AsyncIterator[Sequence[Any]]) -> AsyncIterator[Sequence[Any]]:
+        nonlocal rows, last_beat
+        async for partition in partitions:
+            rows += len(partition)
+            if time.monotonic() - last_beat >= beat_every:
+                await _update_export(job.id, rows_done=rows, heartbeat_at=func.now())
+                last_beat = time.monotonic()
+            yield partition
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        async with AsyncSessionLocal() as db:
+            with partial.open("wb") as handle:
+                partitions = counted(_partitions(db, job.user_id, job.session_id))
+                async for chunk in _encode(partitions, job.format, job.compress):
+                    handle.write(chunk)
+        os.replace(partial, path)
+    except Exception as exc:
+        logger.exception("Export %s failed", job_id)
+        partial.unlink(missing_ok=True)
+        await _update_export(job.id, status="failed", error=str(exc) or exc.__class__.__name__)
+        raise
+
+    await _update_export(
+        job.id,
+        status="completed",
+        path=relative,
+        rows_done=rows,
+        size_bytes=path.stat().st_size,
+        finished_at=func.now(),
+    )
+    return rows
@@ -0,0 +1,62 @@
+import importlib
+import logging
+from typing import Dict, Optional, Tuple, Type
+
+from src.services.llm.anthropic_service import AnthropicProvider
+from src.services.llm.base import LLMProvider, LLMResult
+from src.services.llm.google_service import GoogleProvider
+from src.services.llm.openai_service import OpenAIProvider
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS: Dict[str, Type[LLMProvider]] = {
+    OpenAIProvider.name: OpenAIProvider,
+    GoogleProvider.name: GoogleProvider,
+    AnthropicProvider.name: AnthropicProvider,
+}
+
+
+def get_provider(name: str, api_key: Optional[str] = None) -> LLMProvider:
+    """Instantiate the adapter registered under ``name``."""
+    try:
+        provider_class = PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown LLM provider '{name}'")
+    return provider_class(api_key=api_key)
+
+
+def known_target(provider: str, model: str) -> Tuple[str, str]:
+    """``(provider, model)``, with names missing from the registry replaced by "other".
+
+    Models are free-form in requests, so anything kept per target, such as
+    breakers and metric labels, is keyed by this to stay bounded.
+    """
+    provider_class = PROVIDERS.get(provider)
+    if provider_class is None:
+        return "other", "other"
+    return provider, model if model in provider_class.models else "other"
+
+
+def preload_sdks() -> None:
+    """Import every provider SDK ahead of its first call.
+
+    Meant to run in a thread once the app is serving, so neither boot nor
+    the first request on a new worker waits for the imports.
+    """
+    for provider_class in PROVIDERS.values():
+        if not provider_class.sdk:
+            continue
+        try:
+            importlib.import_module(provider_class.sdk)
+        except ImportError as exc:
+            logger.warning("Could not preload the %s SDK: %s", provider_class.name, exc)
+
+
+__all__ = [
+    "LLMProvider",
+    "LLMResult",
+    "PROVIDERS",
+    "get_provider",
+    "known_target",
+    "preload_sdks",
+]
@@ -0,0 +1,53 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from src.config.http import get_http_client
+from src.config.settings import settings
+from src.services.llm.base import LLMProvider
+
+DEFAULT_MAX_TOKENS = 1024
+
+
+class AnthropicProvider(LLMProvider):
+    """Anthropic messages API adapter."""
+
+    name = "anthropic"
+    default_model = "claude-3-5-sonnet-latest"
+    models = [
+        "claude-3-5-sonnet-latest",
+        "claude-3-5-haiku-latest",
+        "claude-3-opus-latest",
+    ]
+    sdk = "anthropic"
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        super().__init__(
+            api_key=api_key or settings.ANTHROPIC_API_KEY,
+            base_url=base_url or settings.ANTHROPIC_BASE_URL,
+        )
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **params: Any,
+    ) -> AsyncIterator[str]:
+        """Yield text deltas from a streamed message."""
+        from anthropic import AsyncAnthropic
+
+        # The system prompt is a top-level field rather than a message
+        system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+        chat = [m for m in messages if m["role"] != "system"]
+        if system:
+            params["system"] = system
+        params.setdefault("max_tokens", DEFAULT_MAX_TOKENS)
+
+        # The pooled transport is shared, so the SDK client is never closed
+        client = AsyncAnthropic(
+            api_key=self._require_api_key(),
+            base_url=self.base_url,
+            max_retries=0,
+            http_client=get_http_client(self.name),
+        )
+        async with client.messages.stream(model=model, messages=chat, **params) as response:
+            async for text in response.text_stream:
+                yield text
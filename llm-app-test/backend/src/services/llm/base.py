@@ -0,0 +1,48 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+@dataclass
+class LLMResult:
+    """Outcome of a single provider call within a fan-out."""
+
+    provider: str
+    model: str
+    content: str = ""
+    status: str = "pending"  # 'ok', 'error', 'timeout' or 'cancelled'
+    error: Optional[str] = None
+    ttft: Optional[float] = None  # Seconds until the first token arrived
+    latency: Optional[float] = None  # Seconds until the call finished
+    usage: Dict[str, int] = field(default_factory=dict)
+    cost: Optional[float] = None  # Estimated USD
+    cached: bool = False  # Served from the response cache
+
+
+class LLMProvider(ABC):
+    """Base class for LLM provider adapters."""
+
+    name: str = ""
+    default_model: str = ""
+    models: List[str] = []
+    # SDK module the adapter imports on first use, so it is not paid at boot
+    sdk: str = ""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        self.api_key = api_key
+        self.base_url = base_url
+
+    @abstractmethod
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **params: Any,
+    ) -> AsyncIterator[str]:
+        """Yield text deltas for a chat completion."""
+
+    def _require_api_key(self) -> str:
+        """Return the API key or fail before any network work is done."""
+        if not self.api_key:
+            raise ValueError(f"No API key configured for provider '{self.name}'")
+        return self.api_key
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import logging
+import math
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from redis.exceptions import RedisError
+
+from src.config.redis import redis_client
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+ENTRY_KEY = "llm:cache:entry:{}"
+INDEX_KEY = "llm:cache:index"
+SEMANTIC_KEY = "llm:cache:semantic:{}"
+SAVINGS_KEY = "llm:cache:savings:{}"
+
+EMBEDDING_DIM = 256
+
+NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+
+# Store an entry, record its access time and evict the least recently used
+# entries (and any that have already expired) beyond the configured maximum.
+STORE_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], KEYS[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', tonumber(ARGV[3]) - tonumber(ARGV[2]))
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[4])
+if excess > 0 then
+    local evicted = redis.call('ZRANGE', KEYS[2], 0, excess - 1)
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, excess - 1)
+    redis.call('DEL', unpack(evicted))
+end
+return excess
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different prompts share an entry."""
+    return " ".join(text.split())
+
+
+def embed_text(text: str) -> List[float]:
+    """Hashed character-trigram embedding, L2-normalized.
+
+    Cheap, local and deterministic; good at spotting near-duplicate
+    prompts, which is what the semantic layer is for.
+    """
+    vector = [0.0] * EMBEDDING_DIM
+    text = normalize_text(text).lower()
+    for i in range(max(1, len(text) - 2)):
+        digest = hashlib.blake2b(text[i : i + 3].encode(), digest_size=4).digest()
+        vector[int.from_bytes(digest, "little") % EMBEDDING_DIM] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [round(v / norm, 4) for v in vector]
+
+
+def numbers_in(text: str) -> List[str]:
+    """Numbers in a prompt, in order; a semantic hit must have the same ones.
+
+    Trigram similarity barely moves when "2+2" becomes "2+3", yet the
+    answer does.
+    """
+    return NUMBER.findall(text)
+
+
+class CachedResponse:
+    """A stored completion and what it cost to produce."""
+
+    __slots__ = ("content", "usage", "latency", "cost")
+
+    def __init__(
+        self,
+        content: str,
+        usage: Optional[Dict[str, int]] = None,
+        latency: float = 0.0,
+        cost: Optional[float] = None,
+    ):
+        self.content = content
+        self.usage = usage or {}
+        self.latency = latency
+        self.cost = cost
+
+    def chunks(self, size: Optional[int] = None) -> List[str]:
+        """Split the content into deltas for replay over a stream."""
+        size = size or settings.LLM_CACHE_REPLAY_CHUNK
+        return [self.content[i : i + size] for i in range(0, len(self.content), size)] or [""]
+
+
+class ResponseCache:
+    """Redis-backed response cache in front of the provider adapters.
+
+    The exact layer is keyed on a hash of the normalized (provider, model,
+    params, messages) tuple, scoped per user, with a TTL and LRU eviction
+    past ``LLM_CACHE_MAX_ENTRIES``; a hit renews the entry's TTL. The
+    optional semantic layer compares prompt embeddings against recent
+    entries for the same provider/model/params and reuses the closest one
+    above a strict threshold whose prompt has the same numbers.
+    """
+
+    def __init__(
+        self,
+        redis=redis_client,
+        embed: Callable[[str], List[float]] = embed_text,
+    ):
+        self.redis = redis
+        self.embed = embed
+        self._store = redis.register_script(STORE_SCRIPT)
+
+    @staticmethod
+    def _bucket(user_id: str, provider: str, model: str, params: Dict[str, Any]) -> str:
+        scope = json.dumps([user_id, provider, model, params], sort_keys=True, default=str)
+        return hashlib.sha256(scope.encode()).hexdigest()
+
+    @staticmethod
+    def _prompt_text(messages: List[Dict[str, str]]) -> str:
+        return "\n".join(f"{m['role']}: {normalize_text(m['content'])}" for m in messages)
+
+    def _key(self, bucket: str, prompt: str) -> str:
+        return ENTRY_KEY.format(hashlib.sha256(f"{bucket}:{prompt}".encode()).hexdigest())
+
+    async def get(
+        self,
+        user_id: str,
+        provider: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+    ) -> Optional[CachedResponse]:
+        """Look a request up in the exact layer, then the semantic one."""
+        bucket = self._bucket(user_id, provider, model, params)
+        prompt = self._prompt_text(messages)
+        try:
+            key = self._key(bucket, prompt)
+            raw = await self.redis.get(key)
+            if raw is None and settings.LLM_CACHE_SEMANTIC_ENABLED:
+                key = await self._nearest(bucket, prompt)
+                raw = await self.redis.get(key) if key else None
+            if raw is None:
+                return None
+            # Refresh the entry's position in the LRU index and its TTL
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zadd(INDEX_KEY, {key: time.time()}, xx=True)
+                pipe.expire(key, settings.LLM_CACHE_TTL)
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Response cache read failed: %s", exc)
+            return None
+        return CachedResponse(**json.loads(raw))
+
+    async def _nearest(self, bucket: str, prompt: str) -> Optional[str]:
+        candidates = await self.redis.lrange(
+            SEMANTIC_KEY.format(bucket), 0, settings.LLM_CACHE_SEMANTIC_CANDIDATES - 1
+        )
+        if not candidates:
+            return None
+        query = self.embed(prompt)
+        numbers = numbers_in(prompt)
+        best_key, best_score = None, settings.LLM_CACHE_SEMANTIC_THRESHOLD
+        for raw in candidates:
+            candidate = json.loads(raw)
+            if candidate.get("numbers") != numbers:
+                continue
+            score = sum(a * b for a, b in zip(query, candidate["vector"]))
+            if score >= best_score:
+                best_key, best_score = candidate["key"], score
+        return best_key
+
+    async def set(
+        self,
+        user_id: str,
+        provider: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        response: CachedResponse,
+    ) -> None:
+        """Store a completed response."""
+        bucket = self._bucket(user_id, provider, model, params)
+        prompt = self._prompt_text(messages)
+        key = self._key(bucket, prompt)
+        ttl = settings.LLM_CACHE_TTL
+        value = json.dumps(
+            {
+                "content": response.content,
+                "usage": response.usage,
+                "latency": response.latency,
+                "cost": response.cost,
+            }
+        )
+        try:
+            await self._store(
+                keys=[key, INDEX_KEY],
+                args=[value, ttl, time.time(), settings.LLM_CACHE_MAX_ENTRIES],
+            )
+            if settings.LLM_CACHE_SEMANTIC_ENABLED:
+                semantic_key = SEMANTIC_KEY.format(bucket)
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    candidate = {
+                        "key": key,
+                        "vector": self.embed(prompt),
+                        "numbers": numbers_in(prompt),
+                    }
+                    pipe.lpush(semantic_key, json.dumps(candidate))
+                    pipe.ltrim(semantic_key, 0, settings.LLM_CACHE_SEMANTIC_CANDIDATES - 1)
+                    pipe.expire(semantic_key, ttl)
+                    await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Response cache write failed: %s", exc)
+
+    async def record_savings(self, user_id: str, response: CachedResponse) -> None:
+        """Account the latency, tokens and cost a cache hit avoided."""
+        key = SAVINGS_KEY.format(user_id)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hincrby(key, "hits", 1)
+                pipe.hincrbyfloat(key, "latency_saved", response.latency)
+                pipe.hincrby(key, "tokens_saved", response.usage.get("total_tokens", 0))
+                pipe.hincrbyfloat(key, "cost_saved", response.cost or 0.0)
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Response cache savings update failed: %s", exc)
+
+    async def get_savings(self, user_id: str) -> Dict[str, float]:
+        """Return cumulative cache savings for a user."""
+        try:
+            raw = await self.redis.hgetall(SAVINGS_KEY.format(user_id))
+        except RedisError as exc:
+            logger.warning("Response cache savings read failed: %s", exc)
+            raw = {}
+        return {
+            "hits": int(raw.get("hits", 0)),
+            "latency_saved": float(raw.get("latency_saved", 0.0)),
+            "tokens_saved": int(raw.get("tokens_saved", 0)),
+            "cost_saved": float(raw.get("cost_saved", 0.0)),
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from src.config.settings import settings
+from src.services.llm import get_provider, known_target
+from src.services.llm.base import LLMResult
+from src.services.llm.cache import CachedResponse, ResponseCache, response_cache
+from src.services.llm.resilience import Resilience
+from src.services.llm.resilience import resilience as default_resilience
+from src.services.llm.tokens import fill_usage
+from src.utils.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Called with the owning result and each text delta as it arrives
+DeltaCallback = Callable[[LLMResult, str], Awaitable[None]]
+
+LLM_CALLS = Counter(
+    "llm_calls_total",
+    "Provider calls by outcome; replays from the response cache count as 'cached'",
+    ("provider", "model", "status"),
+)
+LLM_LATENCY_SECONDS = Histogram(
+    "llm_call_duration_seconds",
+    "Provider call time to the last token",
+    ("provider", "model"),
+)
+LLM_TTFT_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds",
+    "Provider call time to the first token",
+    ("provider", "model"),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Billed tokens, reported or estimated",
+    ("provider", "model", "kind"),
+)
+LLM_COST = Counter("llm_cost_usd_total", "Estimated USD cost", ("provider", "model"))
+
+
+def record_metrics(result: LLMResult) -> None:
+    """Count a finished call; cache replays only count as calls."""
+    # Labels stay bounded however many model names clients send
+    provider, model = known_target(result.provider, result.model)
+    if result.cached:
+        LLM_CALLS.inc(provider, model, "cached")
+        return
+    LLM_CALLS.inc(provider, model, result.status)
+    if result.latency is not None:
+        LLM_LATENCY_SECONDS.observe(result.latency, provider, model)
+    if result.ttft is not None:
+        LLM_TTFT_SECONDS.observe(result.ttft, provider, model)
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if result.usage.get(kind):
+            LLM_TOKENS.inc(provider, model, kind[: -len("_tokens")], amount=result.usage[kind])
+    if result.cost:
+        LLM_COST.inc(provider, model, amount=result.cost)
+
+
+def provider_slots(providers: Iterable[str]) -> Dict[str, asyncio.Semaphore]:
+    """Per-provider concurrency caps for background jobs, from settings."""
+    limits = settings.LLM_TASK_PROVIDER_CONCURRENCY
+    return {
+        provider: asyncio.Semaphore(limits.get(provider, settings.LLM_TASK_CONCURRENCY))
+        for provider in set(providers)
+    }
+
+
+class LLMCoordinator:
+    """Fan a single prompt out to several provider/model targets concurrently.
+
+    Every target runs as its own task, so the caller waits for the slowest
+    target it chose to wait for rather than the sum of all of them. Each
+    target has its own timeout, and anything still running when the
+    overall deadline passes is cancelled and reported as timed out.
+    """
+
+    def __init__(
+        self,
+        api_keys: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        user_id: Optional[Any] = None,
+        use_cache: Optional[bool] = None,
+        cache: Optional[ResponseCache] = None,
+        slots: Optional[Dict[str, asyncio.Semaphore]] = None,
+        hedge: Optional[bool] = None,
+        resilience: Optional[Resilience] = None,
+    ):
+        self.api_keys = api_keys or {}
+        self.timeout = timeout or settings.LLM_PROVIDER_TIMEOUT
+        self.deadline = deadline or settings.LLM_QUERY_DEADLINE
+        self.user_id = str(user_id) if user_id is not None else None
+        # Cache entries are scoped per user, so anonymous fan-outs skip it
+        enabled = use_cache is not False and settings.LLM_CACHE_ENABLED and self.user_id is not None
+        self.cache = (cache or response_cache) if enabled else None
+        # Sampled completions are only replayed when the caller opts in;
+        # by default only temperature 0 requests use the cache
+        self.cache_sampled = use_cache is True
+        # Optional per-provider concurrency caps, shared across coordinators
+        self.slots = slots or {}
+        # Breakers and latency windows are shared by every coordinator in
+        # the process; None leaves hedging to LLM_HEDGE_ENABLED
+        self.hedge = hedge
+        self.resilience = resilience or default_resilience
+
+    async def run_one(
+        self,
+        result: LLMResult,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        on_delta: Optional[DeltaCallback] = None,
+    ) -> LLMResult:
+        """Stream one target into ``result``, recording TTFT and latency."""
+        slot = self.slots.get(result.provider)
+        if slot is None:
+            return await self._run_one(result, messages, params, on_delta)
+        # Wait for a slot before the provider's timeout starts counting
+        async with slot:
+            return await self._run_one(result, messages, params, on_delta)
+
+    async def _run_one(
+        self,
+        result: LLMResult,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        on_delta: Optional[DeltaCallback] = None,
+    ) -> LLMResult:
+        chunks: List[str] = []
+        start = time.perf_counter()
+        cache = self.cache
+        if not self.cache_sampled and params.get("temperature") != 0:
+            cache = None
+
+        async def emit(delta: str) -> None:
+            if result.ttft is None:
+                result.ttft = time.perf_counter() - start
+            chunks.append(delta)
+            if on_delta is not None:
+                await on_delta(result, delta)
+
+        async def consume() -> None:
+            if cache is not None:
+                cached = await cache.get(
+                    self.user_id, result.provider, result.model, messages, params
+                )
+                if cached is not None:
+                    # Replay as a stream so callers see the same shape
+                    result.cached = True
+                    result.usage = dict(cached.usage)
+                    result.cost = cached.cost
+                    for delta in cached.chunks():
+                        await emit(delta)
+                    await cache.record_savings(self.user_id, cached)
+                    return
+
+            provider = get_provider(result.provider, api_key=self.api_keys.get(result.provider))
+            await self.resilience.stream(
+                result.provider,
+                result.model,
+                lambda: provider.stream(messages, result.model, **params),
+                emit,
+                hedge=self.hedge,
+            )
+
+        try:
+            await asyncio.wait_for(consume(), timeout=self.timeout)
+            result.status = "ok"
+        except asyncio.TimeoutError as exc:
+            result.status = "timeout"
+            result.error = str(exc) or f"No completion within {self.timeout:.1f}s"
+        except asyncio.CancelledError:
+            # iter_results marks targets it cuts off at the deadline first
+            if result.status != "timeout":
+                result.status = "cancelled"
+                result.error = "Cancelled before completion"
+            raise
+        except Exception as exc:
+            logger.warning("Provider %s/%s failed: %s", result.provider, result.model, exc)
+            result.status = "error"
+            result.error = str(exc) or exc.__class__.__name__
+        finally:
+            # Partial output is kept for timed-out and cancelled calls
+            result.content = "".join(chunks)
+            result.latency = time.perf_counter() - start
+            fill_usage(result, messages)
+            record_metrics(result)
+
+        if cache is not None and result.status == "ok" and not result.cached:
+            await cache.set(
+                self.user_id,
+                result.provider,
+                result.model,
+                messages,
+                params,
+                CachedResponse(result.content, result.usage, result.latency, result.cost),
+            )
+        return result
+
+    async def iter_results(
+        self,
+        targets: Sequence[Tuple[str, str]],
+        prompt: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        messages: Optional[List[Dict[str, str]]] = None,
+        wait_for: Optional[int] = None,
+        on_delta: Optional[DeltaCallback] = None,
+        contexts: Optional[Dict[Tuple[str, str], List[Dict[str, str]]]] = None,
+    ) -> AsyncIterator[LLMResult]:
+        """Yield each target's result as soon as it finishes.
+
+        Stops once ``wait_for`` targets have succeeded or the deadline
+        passes; the remaining targets are cancelled and yielded last, as
+        'timeout' when the deadline cut them off.
+        ``contexts`` gives targets their own messages, e.g. chat history
+        trimmed to each model's window.
+        """
+        if messages is None:
+            messages = [{"role": "user", "content": prompt or ""}]
+        contexts = contexts or {}
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+
+        loop = asyncio.get_running_loop()
+        ends_at = loop.time() + self.deadline
+        tasks: Dict["asyncio.Task[LLMResult]", LLMResult] = {}
+        for provider, model in targets:
+            result = LLMResult(provider=provider, model=model)
+            task = asyncio.ensure_future(
+                self.run_one(
+                    result, contexts.get((provider, model), messages), dict(params), on_delta
+                )
+            )
+            tasks[task] = result
+
+        pending = set(tasks)
+        succeeded = 0
+        try:
+            while pending:
+                if wait_for is not None and succeeded >= wait_for:
+                    break
+                remaining = ends_at - loop.time()
+                if remaining <= 0:
+                    for task in pending:
+                        if task.done():
+                            continue
+                        tasks[task].status = "timeout"
+                        tasks[task].error = f"Deadline of {self.deadline:.1f}s passed"
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    result = tasks[task]
+                    if result.status == "ok":
+                        succeeded += 1
+                    yield result
+        finally:
+            # Also runs when the consumer stops iterating early
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        for task in pending:
+            result = tasks[task]
+            if result.status == "pending":
+                # Cancelled before it ever got to run
+                result.status = "cancelled"
+                result.error = "Cancelled before completion"
+            yield result
+
+    async def query(
+        self,
+        targets: Sequence[Tuple[str, str]],
+        prompt: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        messages: Optional[List[Dict[str, str]]] = None,
+        wait_for: Optional[int] = None,
+    ) -> List[LLMResult]:
+        """Collect all results of a fan-out in completion order."""
+        return [
+            result
+            async for result in self.iter_results(
+                targets, prompt=prompt, params=params, messages=messages, wait_for=wait_for
+            )
+        ]
@@ -0,0 +1,75 @@
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from src.config.http import get_http_client
+from src.config.settings import settings
+from src.services.llm.base import LLMProvider
+
+
+class GoogleProvider(LLMProvider):
+    """Google Gemini adapter.
+
+    Talks to the Generative Language REST API directly: the
+    google-generativeai SDK keeps its API key in process-global state,
+    which does not work with per-user keys.
+    """
+
+    name = "google"
+    default_model = "gemini-1.5-flash"
+    models = ["gemini-1.5-pro", "gemini-1.5-flash", "gemini-2.0-flash"]
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        super().__init__(
+            api_key=api_key or settings.GOOGLE_API_KEY,
+            base_url=(base_url or settings.GOOGLE_BASE_URL).rstrip("/"),
+        )
+
+    @staticmethod
+    def _build_payload(messages: List[Dict[str, str]], params: Dict[str, Any]) -> Dict[str, Any]:
+        """Translate chat messages and common params to a Gemini request body."""
+        payload: Dict[str, Any] = {
+            "contents": [
+                {
+                    "role": "model" if m["role"] == "assistant" else "user",
+                    "parts": [{"text": m["content"]}],
+                }
+                for m in messages
+                if m["role"] != "system"
+            ],
+        }
+        system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+        if system:
+            payload["systemInstruction"] = {"parts": [{"text": system}]}
+
+        config: Dict[str, Any] = {}
+        if "temperature" in params:
+            config["temperature"] = params["temperature"]
+        if "max_tokens" in params:
+            config["maxOutputTokens"] = params["max_tokens"]
+        if config:
+            payload["generationConfig"] = config
+        return payload
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **params: Any,
+    ) -> AsyncIterator[str]:
+        """Yield text deltas from streamGenerateContent over SSE."""
+        url = f"{self.base_url}/v1beta/models/{model}:streamGenerateContent"
+        query = {"alt": "sse", "key": self._require_api_key()}
+
+        client = get_http_client(self.name)
+        async with client.stream(
+            "POST", url, params=query, json=self._build_payload(messages, params)
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = json.loads(line[5:])
+                for candidate in data.get("candidates", []):
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
@@ -0,0 +1,50 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from src.config.http import get_http_client
+from src.config.settings import settings
+from src.services.llm.base import LLMProvider
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions adapter."""
+
+    name = "openai"
+    default_model = "gpt-4o-mini"
+    models = ["gpt-4o", "gpt-4o-mini", "gpt-4-turbo", "gpt-3.5-turbo"]
+    sdk = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        super().__init__(
+            api_key=api_key or settings.OPENAI_API_KEY,
+            base_url=base_url or settings.OPENAI_BASE_URL,
+        )
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **params: Any,
+    ) -> AsyncIterator[str]:
+        """Yield text deltas from a streamed chat completion."""
+        from openai import AsyncOpenAI
+
+        # Retries are left to the coordinator, which owns the deadline.
+        # The pooled transport is shared, so the SDK client is never closed.
+        client = AsyncOpenAI(
+            api_key=self._require_api_key(),
+            base_url=self.base_url,
+            max_retries=0,
+            http_client=get_http_client(self.name),
+        )
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            **params,
+        )
+        # Closing releases the pooled connection when the call is cancelled
+        # or loses a hedge before the stream is drained
+        async with response:
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
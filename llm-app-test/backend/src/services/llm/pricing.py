@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+from src.config.settings import settings
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """List price of a model family, in USD per million tokens."""
+
+    input: float
+    output: float
+    context_window: int  # Prompt plus completion tokens
+
+
+# Published list prices, one table per revision. Old revisions are kept
+# so costs can be recomputed as they were estimated at the time.
+PRICE_TABLES: Dict[str, Dict[str, ModelPrice]] = {
+    "2024-12-01": {
+        "gpt-4o-mini": ModelPrice(0.15, 0.60, 128000),
+        "gpt-4o": ModelPrice(2.50, 10.00, 128000),
+        "gpt-4-turbo": ModelPrice(10.00, 30.00, 128000),
+        "gpt-4": ModelPrice(30.00, 60.00, 8192),
+        "gpt-3.5-turbo": ModelPrice(0.50, 1.50, 16385),
+        "o1": ModelPrice(15.00, 60.00, 200000),
+        "o1-preview": ModelPrice(15.00, 60.00, 128000),
+        "o1-mini": ModelPrice(3.00, 12.00, 128000),
+        "claude-3-5-sonnet": ModelPrice(3.00, 15.00, 200000),
+        "claude-3-5-haiku": ModelPrice(0.80, 4.00, 200000),
+        "claude-3-opus": ModelPrice(15.00, 75.00, 200000),
+        "claude-3-sonnet": ModelPrice(3.00, 15.00, 200000),
+        "claude-3-haiku": ModelPrice(0.25, 1.25, 200000),
+        "gemini-1.5-pro": ModelPrice(1.25, 5.00, 2097152),
+        "gemini-1.5-flash": ModelPrice(0.075, 0.30, 1048576),
+        "gemini-2.0-flash": ModelPrice(0.10, 0.40, 1048576),
+    },
+}
+LATEST_VERSION = max(PRICE_TABLES)
+
+# LLM_PRICE_OVERRIDES as a hashable cache key
+Overrides = Tuple[Tuple[str, Tuple[Tuple[str, float], ...]], ...]
+
+
+@lru_cache(maxsize=32)
+def _merged_table(
+    version: str, overrides: Overrides
+) -> Tuple[Mapping[str, ModelPrice], Tuple[str, ...]]:
+    try:
+        table = dict(PRICE_TABLES[version])
+    except KeyError:
+        raise ValueError(f"Unknown price table version '{version}'")
+    for model, items in overrides:
+        base = table.get(model, ModelPrice(0.0, 0.0, 0))
+        override = dict(items)
+        table[model] = ModelPrice(
+            override.get("input", base.input),
+            override.get("output", base.output),
+            int(override.get("context_window", base.context_window)),
+        )
+    # Longest prefix first, so gpt-4o-mini-2024-07-18 is not priced as gpt-4o
+    families = tuple(sorted(table, key=len, reverse=True))
+    return MappingProxyType(table), families
+
+
+def _lookup(version: Optional[str]) -> Tuple[Mapping[str, ModelPrice], Tuple[str, ...]]:
+    version = version or settings.LLM_PRICE_VERSION or LATEST_VERSION
+    # Keyed on the overrides' contents, so changing the setting is picked up
+    overrides = tuple(
+        (model, tuple(sorted(override.items())))
+        for model, override in sorted(settings.LLM_PRICE_OVERRIDES.items())
+    )
+    return _merged_table(version, overrides)
+
+
+def price_table(version: Optional[str] = None) -> Mapping[str, ModelPrice]:
+    """The price table in effect, with any LLM_PRICE_OVERRIDES applied (read-only)."""
+    return _lookup(version)[0]
+
+
+def model_price(model: str, version: Optional[str] = None) -> Optional[ModelPrice]:
+    """Price of a model, matching dated and '-latest' names to their family."""
+    table, families = _lookup(version)
+    if model in table:
+        return table[model]
+    for family in families:
+        if model.startswith(family):
+            return table[family]
+    return None
+
+
+def estimate_cost(
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    version: Optional[str] = None,
+) -> Optional[float]:
+    """Estimated USD cost of a call; None for models without a known price."""
+    price = model_price(model, version)
+    if price is None:
+        return None
+    return (prompt_tokens * price.input + completion_tokens * price.output) / 1_000_000
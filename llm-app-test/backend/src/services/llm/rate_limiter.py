@@ -0,0 +1,152 @@
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from redis.exceptions import RedisError
+
+from src.config.redis import redis_client
+from src.config.settings import settings
+from src.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# GCRA over a single key holding the theoretical arrival time (TAT) in ms.
+# Takes up to ARGV[3] tokens at once so workers can lease small batches.
+# Returns {granted, remaining, retry_after_ms, reset_ms}.
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+
+local granted = math.min(wanted, math.floor((now + burst - tat) / interval))
+if granted <= 0 then
+    return {0, 0, tat + interval - burst - now, tat - now}
+end
+
+tat = tat + granted * interval
+redis.call('SET', KEYS[1], tat, 'PX', tat - now)
+return {granted, math.floor((now + burst - tat) / interval), 0, tat - now}
+"""
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float  # Seconds until the bucket is full again
+    retry_after: float = 0.0  # Seconds until the next request is allowed
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Standard rate limit response headers."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class _Lease:
+    """Tokens taken from Redis in one round-trip and spent locally."""
+
+    __slots__ = ("tokens", "remaining", "expires_at", "reset_at", "denied")
+
+    def __init__(
+        self,
+        tokens: int,
+        remaining: int,
+        expires_at: float,
+        reset_at: float,
+        denied: bool = False,
+    ):
+        self.tokens = tokens
+        self.remaining = remaining
+        self.expires_at = expires_at
+        self.reset_at = reset_at
+        self.denied = denied
+
+
+class RateLimiter:
+    """Distributed GCRA rate limiter with a per-worker token lease.
+
+    Redis holds the authoritative state for every key, shared by all
+    workers and nodes. Each worker takes up to ``batch`` tokens per
+    round-trip and spends them locally for ``lease_seconds``; denials are
+    also remembered until their retry time, so a bursting tenant costs at
+    most one Redis call per batch.
+    """
+
+    def __init__(
+        self,
+        redis=redis_client,
+        batch: Optional[int] = None,
+        lease_seconds: Optional[float] = None,
+    ):
+        self.batch = batch or settings.RATE_LIMIT_LOCAL_BATCH
+        self.lease_seconds = lease_seconds or settings.RATE_LIMIT_LEASE_SECONDS
+        self._script = redis.register_script(GCRA_SCRIPT)
+        # Entries expire on their own; the TTL only bounds stale ones
+        self._leases = TTLCache(maxsize=settings.RATE_LIMIT_LOCAL_KEYS, ttl=60.0)
+
+    async def hit(self, key: str, limit: int, period: float = 60.0) -> RateLimitResult:
+        """Consume one token from ``key`` allowing ``limit`` per ``period`` seconds."""
+        now = time.monotonic()
+        lease = self._leases.get(key)
+        if lease is not None and lease.expires_at > now:
+            if lease.tokens > 0:
+                lease.tokens -= 1
+                return RateLimitResult(
+                    True, limit, lease.remaining + lease.tokens, lease.reset_at - now
+                )
+            if lease.denied:
+                # Denied recently; wait out the retry time without asking Redis
+                return RateLimitResult(
+                    False, limit, 0, lease.reset_at - now, lease.expires_at - now
+                )
+
+        period_ms = period * 1000
+        interval = max(1, math.ceil(period_ms / limit))
+        try:
+            granted, remaining, retry_ms, reset_ms = await self._script(
+                keys=[f"ratelimit:{key}"],
+                args=[interval, interval * limit, min(self.batch, limit)],
+            )
+        except RedisError as exc:
+            # Fail open: losing Redis must not take the API down with it
+            logger.warning("Rate limiter unavailable, allowing %s: %s", key, exc)
+            return RateLimitResult(True, limit, limit, 0.0)
+
+        reset_at = now + reset_ms / 1000
+        if granted == 0:
+            retry_at = now + retry_ms / 1000
+            self._leases.set(key, _Lease(0, 0, retry_at, reset_at, denied=True))
+            return RateLimitResult(False, limit, 0, reset_ms / 1000, retry_ms / 1000)
+
+        self._leases.set(key, _Lease(granted - 1, remaining, now + self.lease_seconds, reset_at))
+        return RateLimitResult(True, limit, remaining + granted - 1, reset_ms / 1000)
+
+    def refund(self, key: str) -> None:
+        """Give back a token ``hit`` just granted, e.g. when another limit denied the request.
+
+        The token returns to this worker's lease, which every grant leaves
+        behind, so a refund costs no Redis call.
+        """
+        lease = self._leases.get(key)
+        if lease is not None and not lease.denied and lease.expires_at > time.monotonic():
+            lease.tokens += 1
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,420 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import httpx
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+from src.config.settings import settings
+from src.services.llm import known_target
+from src.utils.metrics import Counter, Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+StreamFactory = Callable[[], AsyncIterator[str]]
+Emit = Callable[[str], Awaitable[None]]
+
+COUNTERS = (
+    "calls",  # Guarded calls started
+    "successes",
+    "failures",  # Failed with a provider fault, counted by the breaker
+    "rejected",  # Short-circuited by an open breaker
+    "first_token_timeouts",
+    "retries",
+    "retries_denied",  # Retryable failures the retry budget refused
+    "hedges",
+    "hedge_wins",  # Hedges that produced the first token
+)
+
+
+LLM_RESILIENCE_EVENTS = Counter(
+    "llm_resilience_events_total",
+    "Breaker, retry and hedge events per target (see COUNTERS)",
+    ("provider", "model", "event"),
+)
+LLM_CIRCUIT_OPEN = Gauge(
+    "llm_circuit_open",
+    "1 while a target's breaker is open or half open in any worker",
+    ("provider", "model"),
+    mode="max",
+)
+
+
+class CircuitOpenError(Exception):
+    """The breaker for a provider/model is open; no request was sent."""
+
+
+class FirstTokenTimeout(asyncio.TimeoutError):
+    """No output arrived within the adaptive first-token timeout."""
+
+
+def is_provider_fault(exc: BaseException) -> bool:
+    """Whether a failure says something about the provider's health.
+
+    Timeouts, connection failures and 5xx responses count. Client errors
+    such as a bad API key or an exhausted per-user quota do not, since the
+    breakers are shared by every user of the process.
+    """
+    seen = exc
+    while seen is not None:
+        if isinstance(seen, (asyncio.TimeoutError, httpx.TransportError)):
+            return True
+        response = getattr(seen, "response", None)
+        status = getattr(seen, "status_code", None) or getattr(response, "status_code", None)
+        if isinstance(status, int):
+            return status >= 500
+        seen = seen.__cause__
+    return False
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class CircuitBreaker:
+    """Failure-rate breaker over the last ``window`` calls.
+
+    Opens when at least ``failure_rate`` of the recent calls failed, lets
+    one probe through after ``cooldown`` seconds, and closes again when
+    the probe succeeds.
+    """
+
+    def __init__(
+        self, name: str, window: int, min_calls: int, failure_rate: float, cooldown: float
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self.state = "closed"  # 'closed', 'open' or 'half_open'
+        self.opened_at = 0.0
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+            self._transition("half_open")
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def record(self, ok: bool) -> None:
+        if self.state == "half_open":
+            self._probing = False
+            if ok:
+                self._outcomes.clear()
+                self._transition("closed")
+            else:
+                self._open()
+            return
+
+        self._outcomes.append(ok)
+        failures = self._outcomes.count(False)
+        if (
+            self.state == "closed"
+            and len(self._outcomes) >= self.min_calls
+            and failures >= self.failure_rate * len(self._outcomes)
+        ):
+            self._open()
+
+    def release(self) -> None:
+        """Give back a probe whose outcome said nothing about the provider."""
+        self._probing = False
+
+    def _open(self) -> None:
+        self.opened_at = time.monotonic()
+        self._transition("open")
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("Circuit for %s: %s -> %s", self.name, self.state, state)
+            self.state = state
+
+
+class RetryBudget:
+    """Token bucket limiting retries and hedges to a share of calls.
+
+    Every call deposits ``ratio`` tokens, up to ``burst``; each retry or
+    hedge spends one. During an outage the extra load is therefore
+    capped at ``ratio`` of normal traffic instead of multiplying it.
+    """
+
+    def __init__(self, ratio: float, burst: float):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+
+    def deposit(self) -> None:
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class TargetHealth:
+    """Breaker, first-token latency window and counters of one provider/model."""
+
+    def __init__(self, provider: str, model: str):
+        self.breaker = CircuitBreaker(
+            f"{provider}/{model}",
+            settings.LLM_BREAKER_WINDOW,
+            settings.LLM_BREAKER_MIN_CALLS,
+            settings.LLM_BREAKER_FAILURE_RATE,
+            settings.LLM_BREAKER_COOLDOWN,
+        )
+        self.ttfts: Deque[float] = deque(maxlen=settings.LLM_LATENCY_WINDOW)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def p95(self) -> Optional[float]:
+        """Rolling p95 time to first token, once there are enough samples."""
+        if len(self.ttfts) < settings.LLM_LATENCY_MIN_SAMPLES:
+            return None
+        return percentile(list(self.ttfts), 95)
+
+    def first_token_timeout(self) -> Optional[float]:
+        p95 = self.p95()
+        if p95 is None:
+            return None
+        return max(settings.LLM_ADAPTIVE_TIMEOUT_MIN, p95 * settings.LLM_ADAPTIVE_TIMEOUT_FACTOR)
+
+
+class Resilience:
+    """Circuit breakers, adaptive timeouts, hedging and retry budgets for provider calls.
+
+    State is kept per process: every API worker and Celery worker learns
+    provider health from its own traffic, with no shared store in the hot
+    path.
+    """
+
+    def __init__(self):
+        self._targets: Dict[Tuple[str, str], TargetHealth] = {}
+        self._budgets: Dict[str, RetryBudget] = {}
+
+    def target(self, provider: str, model: str) -> TargetHealth:
+        # Unlisted models share one entry per provider, so arbitrary model
+        # names sent by clients cannot grow this without bound
+        key = known_target(provider, model)
+        if key not in self._targets:
+            self._targets[key] = TargetHealth(*key)
+        return self._targets[key]
+
+    def budget(self, provider: str) -> RetryBudget:
+        if provider not in self._budgets:
+            self._budgets[provider] = RetryBudget(
+                settings.LLM_RETRY_BUDGET_RATIO, settings.LLM_RETRY_BUDGET_BURST
+            )
+        return self._budgets[provider]
+
+    async def stream(
+        self,
+        provider: str,
+        model: str,
+        open_stream: StreamFactory,
+        emit: Emit,
+        hedge: Optional[bool] = None,
+    ) -> None:
+        """Run ``open_stream`` under the breaker, emitting its deltas.
+
+        Failures before any output are retried while the retry budget
+        allows; once a delta has been emitted the call is committed to
+        that stream.
+        """
+        health = self.target(provider, model)
+        budget = self.budget(provider)
+        hedge = settings.LLM_HEDGE_ENABLED if hedge is None else hedge
+        emitted = False
+
+        async def counted(delta: str) -> None:
+            nonlocal emitted
+            emitted = True
+            await emit(delta)
+
+        def should_retry(exc: BaseException) -> bool:
+            if emitted or isinstance(exc, CircuitOpenError) or not is_provider_fault(exc):
+                return False
+            if not budget.withdraw():
+                health.counters["retries_denied"] += 1
+                return False
+            health.counters["retries"] += 1
+            return True
+
+        budget.deposit()
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(settings.LLM_RETRY_ATTEMPTS + 1),
+            wait=wait_exponential_jitter(initial=settings.LLM_RETRY_BACKOFF, max=2.0),
+            retry=retry_if_exception(should_retry),
+            reraise=True,
+        )
+        async for attempt in retrying:
+            with attempt:
+                await self._guarded(health, budget, open_stream, counted, hedge)
+
+    async def _guarded(
+        self,
+        health: TargetHealth,
+        budget: RetryBudget,
+        open_stream: StreamFactory,
+        emit: Emit,
+        hedge: bool,
+    ) -> None:
+        breaker = health.breaker
+        if not breaker.allow():
+            health.counters["rejected"] += 1
+            raise CircuitOpenError(
+                f"Circuit open for {breaker.name}; retry in {breaker.retry_in():.0f}s"
+            )
+
+        health.counters["calls"] += 1
+        try:
+            await self._race(health, budget, open_stream, emit, hedge)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as exc:
+            if is_provider_fault(exc):
+                health.counters["failures"] += 1
+                breaker.record(False)
+            else:
+                breaker.release()
+            raise
+        health.counters["successes"] += 1
+        breaker.record(True)
+
+    async def _race(
+        self,
+        health: TargetHealth,
+        budget: RetryBudget,
+        open_stream: StreamFactory,
+        emit: Emit,
+        hedge: bool,
+    ) -> None:
+        """One call, plus a hedge if the first token is later than p95.
+
+        Whichever stream yields first wins and the other is cancelled; no
+        output from the loser is ever emitted.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        timeout = health.first_token_timeout()
+        hedge_delay = health.p95() if hedge else None
+        winner: List["asyncio.Task[None]"] = []
+        first_token = asyncio.Event()
+        attempts: Dict["asyncio.Task[None]", bool] = {}  # Task -> is a hedge
+
+        async def attempt() -> None:
+            me = asyncio.current_task()
+            attempt_started = loop.time()
+            async for delta in open_stream():
+                if not winner:
+                    winner.append(me)
+                    first_token.set()
+                    health.ttfts.append(loop.time() - attempt_started)
+                elif winner[0] is not me:
+                    return
+                await emit(delta)
+            if not winner:
+                # Finished without any output, which still counts as an answer
+                winner.append(me)
+                first_token.set()
+
+        def launch(is_hedge: bool) -> None:
+            attempts[asyncio.ensure_future(attempt())] = is_hedge
+
+        launch(False)
+        error: Optional[BaseException] = None
+        signal = asyncio.ensure_future(first_token.wait())
+        try:
+            while not first_token.is_set():
+                running = [task for task in attempts if not task.done()]
+                if not running:
+                    break
+                now = loop.time()
+                waits = []
+                if timeout is not None:
+                    waits.append(started + timeout - now)
+                if hedge_delay is not None and len(attempts) == 1:
+                    waits.append(started + hedge_delay - now)
+                done, _ = await asyncio.wait(
+                    [signal, *running],
+                    timeout=max(0.0, min(waits)) if waits else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task is signal or first_token.is_set():
+                        continue
+                    if task.exception() is not None:
+                        error = task.exception()
+                if done:
+                    continue
+
+                now = loop.time()
+                if timeout is not None and now - started >= timeout:
+                    health.counters["first_token_timeouts"] += 1
+                    # Counted as a sample at the timeout, so a provider that
+                    # has become slower for good raises its own timeout
+                    health.ttfts.append(timeout)
+                    raise FirstTokenTimeout(
+                        f"No output within the adaptive first-token timeout of {timeout:.1f}s"
+                    )
+                if hedge_delay is not None and len(attempts) == 1:
+                    hedge_delay = None
+                    if budget.withdraw():
+                        health.counters["hedges"] += 1
+                        launch(True)
+                    else:
+                        health.counters["retries_denied"] += 1
+
+            if not winner:
+                raise error if error is not None else RuntimeError("Provider stream failed")
+            task = winner[0]
+            for other in attempts:
+                if other is not task:
+                    other.cancel()
+            if attempts[task]:
+                health.counters["hedge_wins"] += 1
+            await task
+        finally:
+            signal.cancel()
+            for task in attempts:
+                task.cancel()
+            await asyncio.gather(signal, *attempts, return_exceptions=True)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Breaker state, latency and counters of every target seen by this process."""
+        return [
+            {
+                "provider": provider,
+                "model": model,
+                "state": health.breaker.state,
+                "p95_ttft": health.p95(),
+                "first_token_timeout": health.first_token_timeout(),
+                "retry_budget": round(self.budget(provider).tokens, 2),
+                **health.counters,
+            }
+            for (provider, model), health in sorted(self._targets.items())
+        ]
+
+    def collect_metrics(self) -> None:
+        """Mirror breaker state and counters into the metrics registry."""
+        for (provider, model), health in list(self._targets.items()):
+            LLM_CIRCUIT_OPEN.set(int(health.breaker.state != "closed"), provider, model)
+            for event, count in health.counters.items():
+                LLM_RESILIENCE_EVENTS.set_total(count, provider, model, event)
+
+
+resilience = Resilience()
+registry.add_collector(resilience.collect_metrics)
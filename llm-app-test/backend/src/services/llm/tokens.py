@@ -0,0 +1,244 @@
+import hashlib
+import logging
+import math
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.config.settings import settings
+from src.services.llm.base import LLMResult
+from src.services.llm.pricing import estimate_cost, model_price
+from src.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Model name prefix -> tokenizer, longest prefix first
+TOKENIZER_FAMILIES: List[Tuple[str, str]] = [
+    ("gpt-4o", "o200k_base"),
+    ("o1", "o200k_base"),
+    ("gpt-4", "cl100k_base"),
+    ("gpt-3.5", "cl100k_base"),
+    ("claude", "claude"),
+    ("gemini", "gemini"),
+]
+
+# Average characters per token of word pieces, for tokenizers that are
+# not published and can only be estimated
+ESTIMATE_RATIOS: Dict[str, float] = {"claude": 3.5, "gemini": 4.0, "default": 4.0}
+
+# Tokens of chat formatting added per message and once per reply
+MESSAGE_OVERHEAD = 3
+REPLY_OVERHEAD = 3
+
+_BPE_URLS = {
+    "o200k_base": "https://openaipublic.blob.core.windows.net/encodings/o200k_base.tiktoken",
+    "cl100k_base": "https://openaipublic.blob.core.windows.net/encodings/cl100k_base.tiktoken",
+}
+
+# Letter runs, digit runs, CJK characters, other symbols
+_PIECES = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]|[^\W\d_]+|\d+|[^\w\s]+")
+
+
+class Tokenizer(ABC):
+    """Counts tokens for one model family."""
+
+    name = ""
+    exact = False
+
+    @abstractmethod
+    def count_batch(self, texts: Sequence[str]) -> List[int]:
+        """Token count of each text, in order."""
+
+
+class TiktokenTokenizer(Tokenizer):
+    """Exact counts from a BPE encoding, loaded on first use."""
+
+    exact = True
+
+    def __init__(self, encoding: str):
+        self.name = encoding
+        self._encoding = None
+
+    def _load(self):
+        if self._encoding is None:
+            import tiktoken
+
+            self._encoding = tiktoken.get_encoding(self.name)
+        return self._encoding
+
+    def count_batch(self, texts: Sequence[str]) -> List[int]:
+        encoding = self._load()
+        if len(texts) == 1:
+            return [len(encoding.encode_ordinary(texts[0]))]
+        return [len(tokens) for tokens in encoding.encode_ordinary_batch(list(texts))]
+
+
+class EstimatingTokenizer(Tokenizer):
+    """Estimated counts for tokenizers that cannot be run offline.
+
+    Text is split the way BPE tokenizers pre-tokenize it: long words cost
+    several tokens, digits come in groups of up to three, symbols in
+    pairs, and each CJK character costs about one.
+    """
+
+    def __init__(self, name: str, chars_per_token: float):
+        self.name = f"estimate:{name}"
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        tokens = 0
+        for piece in _PIECES.findall(text):
+            if piece[0].isdigit():
+                tokens += math.ceil(len(piece) / 3)
+            elif piece[0].isalpha():
+                # Common short words are a single token
+                tokens += max(1, round(len(piece) / self.chars_per_token))
+            else:
+                tokens += math.ceil(len(piece) / 2)
+        # Newlines and indentation runs are tokens of their own
+        return tokens + text.count("\n")
+
+    def count_batch(self, texts: Sequence[str]) -> List[int]:
+        return [self.count(text) for text in texts]
+
+
+def _bpe_cached(encoding: str) -> bool:
+    # Mirrors where tiktoken caches downloaded encodings, so a missing file
+    # never turns a token count into a network request
+    cache_dir = (
+        os.environ.get("TIKTOKEN_CACHE_DIR")
+        or os.environ.get("DATA_GYM_CACHE_DIR")
+        or os.path.join(tempfile.gettempdir(), "data-gym-cache")
+    )
+    key = hashlib.sha1(_BPE_URLS[encoding].encode()).hexdigest()
+    return os.path.exists(os.path.join(cache_dir, key))
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(family: str) -> Tokenizer:
+    """The tokenizer of a family, built once per process."""
+    if family in _BPE_URLS:
+        try:
+            if _bpe_cached(family):
+                tokenizer = TiktokenTokenizer(family)
+                tokenizer._load()
+                return tokenizer
+            logger.warning("Encoding %s is not cached; token counts will be estimated", family)
+        except Exception as exc:
+            logger.warning("Could not load encoding %s, estimating counts: %s", family, exc)
+    ratio = ESTIMATE_RATIOS.get(family, ESTIMATE_RATIOS["default"])
+    return EstimatingTokenizer(family, ratio)
+
+
+def tokenizer_for(model: str) -> Tokenizer:
+    for prefix, family in TOKENIZER_FAMILIES:
+        if model.startswith(prefix):
+            return get_tokenizer(family)
+    return get_tokenizer("default")
+
+
+class TokenCounter:
+    """Token counts memoized by content hash.
+
+    Chat history is re-sent on every turn, so each earlier message is
+    tokenized once and then served from the cache.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self._cache = TTLCache(maxsize=maxsize or settings.TOKEN_COUNT_CACHE_SIZE, ttl=86400.0)
+
+    def count_batch(self, model: str, texts: Sequence[str]) -> List[int]:
+        """Count tokens of many texts at once, tokenizing only cache misses."""
+        tokenizer = tokenizer_for(model)
+        counts: List[Optional[int]] = []
+        misses: Dict[bytes, List[int]] = {}
+        for index, text in enumerate(texts):
+            key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+            cached = self._cache.get((tokenizer.name, key))
+            counts.append(cached)
+            if cached is None:
+                misses.setdefault(key, []).append(index)
+
+        if misses:
+            indexes = list(misses.values())
+            fresh = tokenizer.count_batch([texts[positions[0]] for positions in indexes])
+            for (key, positions), count in zip(misses.items(), fresh):
+                self._cache.set((tokenizer.name, key), count)
+                for index in positions:
+                    counts[index] = count
+        return counts  # type: ignore[return-value]
+
+    def count(self, model: str, text: str) -> int:
+        return self.count_batch(model, [text])[0]
+
+    def count_messages(self, model: str, messages: Sequence[Dict[str, str]]) -> int:
+        """Prompt tokens of a chat request, including message formatting."""
+        contents = self.count_batch(model, [message.get("content") or "" for message in messages])
+        return sum(contents) + MESSAGE_OVERHEAD * len(messages) + REPLY_OVERHEAD
+
+
+token_counter = TokenCounter()
+
+
+def fill_usage(result: LLMResult, messages: Sequence[Dict[str, str]]) -> None:
+    """Fill a result's token usage and cost where the provider reported none.
+
+    Partial output of timed-out and cancelled calls is still billed, so
+    it is counted too; a call that never produced anything is not.
+    """
+    if result.cached or (result.status != "ok" and not result.content):
+        return
+    if not result.usage:
+        prompt_tokens = token_counter.count_messages(result.model, messages)
+        completion_tokens = token_counter.count(result.model, result.content)
+        result.usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+    if result.cost is None:
+        result.cost = estimate_cost(
+            result.model,
+            result.usage.get("prompt_tokens", 0),
+            result.usage.get("completion_tokens", 0),
+        )
+
+
+def check_budget(
+    targets: Sequence[Tuple[str, str]],
+    messages: Sequence[Dict[str, str]],
+    max_tokens: Optional[int] = None,
+    contexts: Optional[Dict[Tuple[str, str], Sequence[Dict[str, str]]]] = None,
+) -> float:
+    """Refuse a request before any provider is called; returns its worst-case cost.
+
+    Raises ValueError when the prompt and ``max_tokens`` do not fit a
+    target's context window, or when the estimated cost of the whole
+    fan-out exceeds ``LLM_MAX_REQUEST_COST``. Targets found in
+    ``contexts`` are checked against their own messages.
+    """
+    completion = max_tokens or settings.LLM_PREFLIGHT_COMPLETION_TOKENS
+    contexts = contexts or {}
+    total = 0.0
+    for provider, model in targets:
+        prompt_tokens = token_counter.count_messages(
+            model, contexts.get((provider, model), messages)
+        )
+        price = model_price(model)
+        if price is None:
+            continue
+        if price.context_window and prompt_tokens + (max_tokens or 0) > price.context_window:
+            raise ValueError(
+                f"Prompt of {prompt_tokens} tokens"
+                + (f" plus max_tokens {max_tokens}" if max_tokens else "")
+                + f" exceeds the {price.context_window}-token context window of {model}"
+            )
+        total += estimate_cost(model, prompt_tokens, completion) or 0.0
+
+    limit = settings.LLM_MAX_REQUEST_COST
+    if limit is not None and total > limit:
+        raise ValueError(f"Estimated cost ${total:.4f} exceeds the ${limit:.4f} per-request limit")
+    return total
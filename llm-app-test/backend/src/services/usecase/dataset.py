@@ -0,0 +1,40 @@
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from src.config.settings import settings
+
+FORMATS = (".csv", ".jsonl")
+
+
+def resolve_dataset(name: str) -> Path:
+    """Locate an uploaded dataset, refusing paths that escape UPLOAD_DIR."""
+    root = Path(settings.UPLOAD_DIR).resolve()
+    path = (root / name).resolve()
+    if root not in path.parents:
+        raise ValueError("Dataset must be inside the upload directory")
+    if path.suffix.lower() not in FORMATS:
+        raise ValueError(f"Dataset must be one of: {', '.join(FORMATS)}")
+    if not path.is_file():
+        raise ValueError(f"Dataset '{name}' not found")
+    return path
+
+
+def iter_rows(path: Path, start: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield dataset rows one at a time, skipping the first ``start``."""
+    with path.open(newline="", encoding="utf-8") as handle:
+        if path.suffix.lower() == ".csv":
+            rows: Iterator[Dict[str, Any]] = csv.DictReader(handle)
+        else:
+            rows = (json.loads(line) for line in handle if line.strip())
+        yield from islice(rows, start, None)
+
+
+def count_rows(path: Path) -> int:
+    """Count rows with one streaming pass over the file."""
+    if path.suffix.lower() == ".jsonl":
+        with path.open(encoding="utf-8") as handle:
+            return sum(1 for line in handle if line.strip())
+    return sum(1 for _ in iter_rows(path))
@@ -0,0 +1,274 @@
+import asyncio
+import logging
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, func, insert, or_, select, update
+
+from src.config.database import AsyncSessionLocal
+from src.config.settings import settings
+from src.models.usecase import UseCase, UseCaseJob, UseCaseRun
+from src.models.user import User
+from src.services.llm.base import LLMResult
+from src.services.llm.coordinator import LLMCoordinator, provider_slots
+from src.services.usecase.dataset import count_rows, iter_rows, resolve_dataset
+from src.services.usecase.manager import build_run, record_runs
+from src.services.usecase.template import render
+
+logger = logging.getLogger(__name__)
+
+
+async def execute_batch(provider: str, model: str, runs: List[Dict[str, Any]]) -> int:
+    """Execute a batch of scheduled runs that share one provider/model.
+
+    Identical prompts from the same user are sent once and the result is
+    recorded on every use case that asked for it. Calls run concurrently,
+    capped per provider like other worker jobs. Returns runs recorded.
+    """
+    use_case_ids = {UUID(run["use_case_id"]) for run in runs}
+    user_ids = {UUID(run["user_id"]) for run in runs}
+    async with AsyncSessionLocal() as db:
+        expected = dict(
+            (
+                await db.execute(
+                    select(UseCase.id, UseCase.expected_output).filter(
+                        UseCase.id.in_(use_case_ids), UseCase.is_active.is_(True)
+                    )
+                )
+            ).all()
+        )
+        api_keys = dict(
+            (await db.execute(select(User.id, User.api_keys).filter(User.id.in_(user_ids)))).all()
+        )
+    # Deleted or deactivated since the scheduler last polled
+    runs = [run for run in runs if UUID(run["use_case_id"]) in expected]
+
+    calls: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for run in runs:
+        calls.setdefault((run["user_id"], run["prompt"]), []).append(run)
+
+    slots = provider_slots([provider])
+
+    async def call(user_id: str, prompt: str) -> LLMResult:
+        coordinator = LLMCoordinator(
+            api_keys=api_keys.get(UUID(user_id)) or {},
+            user_id=user_id,
+            slots=slots,
+        )
+        return await coordinator.run_one(
+            LLMResult(provider=provider, model=model),
+            [{"role": "user", "content": prompt}],
+            {},
+        )
+
+    results = await asyncio.gather(*(call(user_id, prompt) for user_id, prompt in calls))
+
+    async with AsyncSessionLocal() as db:
+        await record_runs(
+            db,
+            [
+                build_run(
+                    UUID(run["use_case_id"]),
+                    asdict(result),
+                    expected[UUID(run["use_case_id"])],
+                    datetime.fromisoformat(run["fired_at"]),
+                )
+                for result, grouped in zip(results, calls.values())
+                for run in grouped
+            ],
+        )
+        await db.commit()
+    return len(runs)
+
+
+async def execute_once(
+    use_case: UseCase,
+    api_keys: Dict[str, str],
+    targets: List[Tuple[str, str]],
+    values: Dict[str, Any],
+    params: Dict[str, Any],
+) -> List[UseCaseRun]:
+    """Render the template once, query every target and record the runs."""
+    prompt = render(use_case.prompt_template, values)
+    coordinator = LLMCoordinator(api_keys=api_keys, user_id=use_case.user_id)
+    results = await coordinator.query(targets, prompt=prompt, params=params)
+    runs = [build_run(use_case.id, asdict(result), use_case.expected_output) for result in results]
+    async with AsyncSessionLocal() as db:
+        stored = (await db.scalars(insert(UseCaseRun).returning(UseCaseRun), runs)).all()
+        await db.commit()
+    return list(stored)
+
+
+async def _claim_job(job_id: UUID) -> Optional[UseCaseJob]:
+    # Pending and failed jobs can start; a running one only once its
+    # worker has stopped sending heartbeats
+    stale = datetime.now(timezone.utc) - timedelta(seconds=settings.USECASE_JOB_STALE_SECONDS)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(UseCaseJob)
+            .where(
+                UseCaseJob.id == job_id,
+                or_(
+                    UseCaseJob.status.in_(("pending", "failed")),
+                    and_(UseCaseJob.status == "running", UseCaseJob.heartbeat_at < stale),
+                ),
+            )
+            .values(status="running", error=None, heartbeat_at=func.now())
+            .returning(UseCaseJob)
+        )
+        job = result.scalar_one_or_none()
+        await db.commit()
+        return job
+
+
+async def run_dataset_job(job_id: UUID) -> Optional[int]:
+    """Run a use case over a dataset, resuming from the job's checkpoint.
+
+    Rows are read and rendered lazily, with at most
+    ``USECASE_BATCH_WINDOW`` rows in flight and provider calls capped per
+    provider. Results are written in chunks together with the checkpoint,
+    always for a contiguous prefix of rows, so a crashed job resumes at
+    exactly the first row without stored runs. Returns rows done, or
+    None when another worker owns the job.
+    """
+    job = await _claim_job(job_id)
+    if job is None:
+        return None
+
+    try:
+        async with AsyncSessionLocal() as db:
+            use_case = await db.get(UseCase, job.use_case_id)
+            api_keys = (
+                await db.execute(select(User.api_keys).filter(User.id == use_case.user_id))
+            ).scalar_one()
+            path = resolve_dataset(job.dataset)
+            if job.rows_total is None:
+                job.rows_total = await asyncio.to_thread(count_rows, path)
+            if job.started_at is None:
+                job.started_at = datetime.now(timezone.utc)
+            await db.execute(
+                update(UseCaseJob)
+                .where(UseCaseJob.id == job.id)
+                .values(rows_total=job.rows_total, started_at=job.started_at)
+            )
+            await db.commit()
+
+        done = await _process_rows(job, use_case, api_keys or {}, path)
+    except Exception as exc:
+        logger.exception("Dataset job %s failed", job_id)
+        await _update_job(job.id, status="failed", error=str(exc) or exc.__class__.__name__)
+        raise
+
+    await _update_job(job.id, status="completed", eta_seconds=0.0, finished_at=func.now())
+    return done
+
+
+async def _update_job(job_id: UUID, **values: Any) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(UseCaseJob).where(UseCaseJob.id == job_id).values(**values))
+        await db.commit()
+
+
+async def _process_rows(
+    job: UseCaseJob,
+    use_case: UseCase,
+    api_keys: Dict[str, str],
+    path: Path,
+) -> int:
+    targets = [(target["provider"], target["model"]) for target in job.targets]
+    coordinator = LLMCoordinator(
+        api_keys=api_keys,
+        user_id=use_case.user_id,
+        slots=provider_slots(provider for provider, _ in targets),
+    )
+    params = {k: v for k, v in (job.params or {}).items() if v is not None}
+
+    async def run_row(index: int, row: Dict[str, Any]) -> Tuple[int, List[Dict[str, Any]]]:
+        try:
+            prompt = render(use_case.prompt_template, row)
+        except ValueError as exc:
+            results = [
+                {"provider": provider, "model": model, "status": "error", "error": str(exc)}
+                for provider, model in targets
+            ]
+        else:
+            messages = [{"role": "user", "content": prompt}]
+            results = [
+                asdict(result)
+                for result in await asyncio.gather(
+                    *(
+                        coordinator.run_one(LLMResult(provider, model), messages, params)
+                        for provider, model in targets
+                    )
+                )
+            ]
+        runs = [
+            dict(
+                build_run(use_case.id, result, use_case.expected_output),
+                job_id=job.id,
+                row_index=index,
+            )
+            for result in results
+        ]
+        return index, runs
+
+    loop = asyncio.get_running_loop()
+    first = checkpoint = buffered = job.rows_done
+    attempt_started = last_beat = loop.time()
+    beat_every = settings.USECASE_JOB_STALE_SECONDS / 3
+    finished: Dict[int, List[Dict[str, Any]]] = {}
+    buffer: List[Dict[str, Any]] = []
+    pending: Set["asyncio.Future[Tuple[int, List[Dict[str, Any]]]]"] = set()
+
+    async def collect(force: bool = False) -> None:
+        nonlocal pending, checkpoint, buffered, last_beat
+        if pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=beat_every, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                index, runs = future.result()
+                finished[index] = runs
+
+        # Only a contiguous prefix of rows is written, so rows_done is exact
+        while buffered in finished:
+            buffer.extend(finished.pop(buffered))
+            buffered += 1
+        due = buffered - checkpoint >= settings.USECASE_BATCH_CHECKPOINT
+        if not (force or due or loop.time() - last_beat >= beat_every):
+            return
+
+        rate = (buffered - first) / max(loop.time() - attempt_started, 1e-9)
+        async with AsyncSessionLocal() as db:
+            await record_runs(db, buffer)
+            await db.execute(
+                update(UseCaseJob)
+                .where(UseCaseJob.id == job.id)
+                .values(
+                    rows_done=buffered,
+                    rows_per_second=rate,
+                    eta_seconds=(job.rows_total - buffered) / rate if rate else None,
+                    heartbeat_at=func.now(),
+                )
+            )
+            await db.commit()
+        buffer.clear()
+        checkpoint = buffered
+        last_beat = loop.time()
+
+    try:
+        for index, row in enumerate(iter_rows(path, start=job.rows_done), start=job.rows_done):
+            while len(pending) >= settings.USECASE_BATCH_WINDOW:
+                await collect()
+            pending.add(asyncio.ensure_future(run_row(index, row)))
+        while pending:
+            await collect()
+        await collect(force=True)
+    finally:
+        for future in pending:
+            future.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    return checkpoint
@@ -0,0 +1,94 @@
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.settings import settings
+from src.models.usecase import UseCase, UseCaseRun
+from src.schemas.usecase import UseCaseRun as UseCaseRunSchema
+from src.services.evaluation.auto_evaluation import term_overlap
+from src.utils.pagination import decode_cursor, encode_cursor
+
+
+def build_run(
+    use_case_id: UUID,
+    result: Dict[str, Any],
+    expected_output: Optional[str] = None,
+    fired_at: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Map a provider result (``asdict(LLMResult)``) onto a use_case_runs row."""
+    output = result.get("content") or ""
+    usage = result.get("usage") or {}
+    status = result.get("status") or "ok"
+    return {
+        "use_case_id": use_case_id,
+        "provider": result["provider"],
+        "model": result["model"],
+        "status": status,
+        "error": result.get("error"),
+        "fired_at": fired_at,
+        "latency": result.get("latency"),
+        "ttft": result.get("ttft"),
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "total_tokens": usage.get("total_tokens"),
+        "cost": result.get("cost"),
+        "output": output,
+        "output_hash": hashlib.sha256(output.encode()).hexdigest(),
+        "score": (
+            term_overlap(output, expected_output) if expected_output and status == "ok" else None
+        ),
+    }
+
+
+async def record_runs(db: AsyncSession, runs: Sequence[Dict[str, Any]]) -> None:
+    """Append runs with one multi-row INSERT; the caller commits."""
+    if runs:
+        await db.execute(insert(UseCaseRun), list(runs))
+
+
+async def get_owned_use_case(
+    db: AsyncSession, use_case_id: UUID, user_id: UUID
+) -> Optional[UseCase]:
+    """The use case, if it exists and belongs to the user."""
+    result = await db.execute(
+        select(UseCase).filter(UseCase.id == use_case_id, UseCase.user_id == user_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def list_runs(
+    db: AsyncSession,
+    use_case_id: UUID,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    since: Optional[datetime] = None,
+) -> Tuple[List[UseCaseRunSchema], Optional[str]]:
+    """Return one page of runs, newest first, and the cursor for the next."""
+    limit = min(limit or settings.USECASE_RUN_PAGE_SIZE, settings.USECASE_RUN_PAGE_MAX)
+
+    # (use_case_id, created_at, id) is the index order, walked backwards
+    query = select(UseCaseRun).filter(UseCaseRun.use_case_id == use_case_id)
+    if cursor:
+        query = query.filter(
+            tuple_(UseCaseRun.created_at, UseCaseRun.id) < tuple_(*decode_cursor(cursor))
+        )
+    if since is not None:
+        query = query.filter(UseCaseRun.created_at >= since)
+    if provider is not None:
+        query = query.filter(UseCaseRun.provider == provider)
+    if model is not None:
+        query = query.filter(UseCaseRun.model == model)
+    query = query.order_by(UseCaseRun.created_at.desc(), UseCaseRun.id.desc()).limit(limit + 1)
+
+    rows = (await db.execute(query)).scalars().all()
+    items = [UseCaseRunSchema.model_validate(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return items, next_cursor
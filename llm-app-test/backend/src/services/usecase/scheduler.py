@@ -0,0 +1,349 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlalchemy import select, tuple_
+
+from src.config.database import AsyncSessionLocal
+from src.config.redis import redis_client
+from src.config.settings import settings
+from src.models.usecase import UseCase
+
+logger = logging.getLogger(__name__)
+
+LAST_FIRED_KEY = "usecase:schedule:last:{}"
+FIRED_KEY = "usecase:schedule:fired:{}:{}"
+
+_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+_MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+_WEEKDAYS = ["sun", "mon", "tue", "wed", "thu", "fri", "sat"]
+
+# Called with (provider, model, runs) for each batch of due runs
+Dispatch = Callable[[str, str, List[Dict[str, Any]]], Any]
+
+
+def _parse_field(text: str, low: int, high: int, names: Optional[List[str]] = None) -> Set[int]:
+    def value(token: str) -> int:
+        if names and token.lower() in names:
+            return names.index(token.lower()) + low
+        return int(token)
+
+    values: Set[int] = set()
+    for part in text.split(","):
+        body, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if body == "*":
+            start, end = low, high
+        elif "-" in body:
+            start, end = (value(token) for token in body.split("-", 1))
+        else:
+            start = value(body)
+            end = high if step_text else start
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"Invalid cron field '{text}'")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Standard five-field cron expression, evaluated in UTC."""
+
+    def __init__(self, expression: str):
+        fields = _ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected five cron fields in '{expression}'")
+        self.expression = expression
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12, _MONTHS)
+        # 0 and 7 are both Sunday
+        self.weekdays = {day % 7 for day in _parse_field(fields[4], 0, 7, _WEEKDAYS)}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, at: datetime) -> bool:
+        day = at.day in self.days
+        weekday = at.isoweekday() % 7 in self.weekdays
+        # Cron ORs the two day fields when both are restricted
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, after: datetime) -> datetime:
+        """First firing time strictly after ``after``."""
+        at = after.astimezone(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        give_up = at + timedelta(days=366 * 5)
+        while at < give_up:
+            if at.month not in self.months:
+                at = (at.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(at):
+                at = (at + timedelta(days=1)).replace(hour=0, minute=0)
+            elif at.hour not in self.hours:
+                at = (at + timedelta(hours=1)).replace(minute=0)
+            elif at.minute not in self.minutes:
+                at += timedelta(minutes=1)
+            else:
+                return at
+        raise ValueError(f"Cron expression '{self.expression}' never fires")
+
+
+def jitter(use_case_id: UUID) -> timedelta:
+    """Stable per-use-case offset that spreads identical schedules apart."""
+    spread = settings.USECASE_SCHEDULER_JITTER
+    if spread <= 0:
+        return timedelta(0)
+    digest = hashlib.blake2b(use_case_id.bytes, digest_size=4).digest()
+    return timedelta(seconds=int.from_bytes(digest, "little") % (spread + 1))
+
+
+@dataclass
+class _Entry:
+    schedule: CronSchedule
+    fingerprint: str
+    user_id: UUID
+    prompt: str
+    targets: List[Dict[str, str]]
+    nominal: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = 0
+
+
+def _dispatch_to_celery(provider: str, model: str, runs: List[Dict[str, Any]]) -> None:
+    from src.tasks.usecase_tasks import run_scheduled_batch
+
+    run_scheduled_batch.delay(provider, model, runs)
+
+
+class UseCaseScheduler:
+    """Fire active use cases on their cron schedules.
+
+    Next-fire times live in a min-heap, so each wake-up only looks at what
+    is due. Changed use cases are picked up incrementally by polling
+    ``updated_at``; superseded heap entries are skipped lazily by version.
+    Due runs are grouped by (provider, model) and handed to ``dispatch``
+    as one batch per group; use cases deleted since they were loaded are
+    dropped instead. A Redis ``SET NX`` per (use case, window) makes a
+    second scheduler instance harmless.
+    """
+
+    def __init__(self, dispatch: Optional[Dispatch] = None, redis=redis_client):
+        self.dispatch = dispatch or _dispatch_to_celery
+        self.redis = redis
+        self._heap: List[Tuple[datetime, int, UUID]] = []
+        self._entries: Dict[UUID, _Entry] = {}
+        self._versions = itertools.count(1)
+        self._cursor: Optional[Tuple[datetime, UUID]] = None
+        # Deactivated while tracked; on re-activation they start from now
+        self._paused: Set[UUID] = set()
+
+    def _push(self, use_case_id: UUID, entry: _Entry, nominal: datetime) -> None:
+        entry.nominal = nominal
+        entry.version = next(self._versions)
+        heapq.heappush(self._heap, (nominal + jitter(use_case_id), entry.version, use_case_id))
+
+    async def _last_fired(self, use_case_id: UUID) -> Optional[datetime]:
+        try:
+            raw = await self.redis.get(LAST_FIRED_KEY.format(use_case_id))
+        except RedisError as exc:
+            logger.warning("Scheduler state read failed: %s", exc)
+            return None
+        return datetime.fromisoformat(raw) if raw else None
+
+    async def _apply(self, row: Any, now: datetime) -> None:
+        if not row.is_active or not row.schedule or not row.targets:
+            if self._entries.pop(row.id, None) is not None:
+                self._paused.add(row.id)
+            return
+        fingerprint = json.dumps(
+            [row.schedule, row.prompt_template, row.targets, str(row.user_id)], sort_keys=True
+        )
+        current = self._entries.get(row.id)
+        if current is not None and current.fingerprint == fingerprint:
+            return
+        try:
+            schedule = CronSchedule(row.schedule)
+        except ValueError as exc:
+            logger.warning("Ignoring schedule of use case %s: %s", row.id, exc)
+            self._entries.pop(row.id, None)
+            return
+
+        entry = _Entry(schedule, fingerprint, row.user_id, row.prompt_template, row.targets)
+        if current is not None and current.schedule.expression == schedule.expression:
+            # Only the prompt or targets changed: keep the pending fire time
+            entry.nominal, entry.version = current.nominal, current.version
+            self._entries[row.id] = entry
+            return
+        self._entries[row.id] = entry
+
+        # New to this process: resume from the last fire so missed windows
+        # are caught up; a changed schedule or a re-activated use case
+        # starts from now
+        after = None
+        if current is None and row.id not in self._paused:
+            after = await self._last_fired(row.id)
+        self._paused.discard(row.id)
+        self._push(row.id, entry, schedule.next_after(after or now))
+
+    async def load_changes(self, now: Optional[datetime] = None) -> int:
+        """Apply use cases changed since the last poll; returns rows read."""
+        now = now or datetime.now(timezone.utc)
+        # Re-read a short overlap: a slow transaction may commit an
+        # updated_at older than rows already seen
+        overlap = timedelta(seconds=settings.USECASE_SCHEDULER_POLL * 2)
+        cursor = None
+        if self._cursor is not None:
+            cursor = (self._cursor[0] - overlap, self._cursor[1])
+
+        read = 0
+        while True:
+            query = select(
+                UseCase.id,
+                UseCase.user_id,
+                UseCase.schedule,
+                UseCase.is_active,
+                UseCase.prompt_template,
+                UseCase.targets,
+                UseCase.updated_at,
+            )
+            if cursor is not None:
+                query = query.filter(tuple_(UseCase.updated_at, UseCase.id) > cursor)
+            query = query.order_by(UseCase.updated_at, UseCase.id)
+            query = query.limit(settings.USECASE_SCHEDULER_PAGE)
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(query)).all()
+            for row in rows:
+                await self._apply(row, now)
+            read += len(rows)
+            if rows:
+                cursor = (rows[-1].updated_at, rows[-1].id)
+                if self._cursor is None or cursor > self._cursor:
+                    self._cursor = cursor
+            if len(rows) < settings.USECASE_SCHEDULER_PAGE:
+                return read
+
+    def _windows(self, entry: _Entry, now: datetime) -> List[datetime]:
+        """Windows to run for an entry that is due, per the catch-up policy."""
+        horizon = now - timedelta(seconds=settings.USECASE_MISFIRE_GRACE)
+        if entry.nominal >= horizon:
+            at = entry.nominal
+        else:
+            at = entry.schedule.next_after(horizon - timedelta(minutes=1))
+        windows = []
+        while at <= now:
+            windows.append(at)
+            at = entry.schedule.next_after(at)
+        if settings.USECASE_CATCHUP == "all":
+            return windows[-settings.USECASE_CATCHUP_LIMIT :]
+        return windows[-1:]
+
+    async def _claim(self, use_case_id: UUID, window: datetime) -> bool:
+        stamp = window.isoformat()
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.set(FIRED_KEY.format(use_case_id, stamp), 1, nx=True, ex=86400)
+                pipe.set(LAST_FIRED_KEY.format(use_case_id), stamp, ex=86400 * 30)
+                claimed, _ = await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Scheduler claim failed, running anyway: %s", exc)
+            return True
+        return bool(claimed)
+
+    async def _forget_deleted(self, use_case_ids: List[UUID]) -> None:
+        # Hard deletes leave no updated_at for load_changes to see
+        query = select(UseCase.id).filter(UseCase.id.in_(use_case_ids))
+        try:
+            async with AsyncSessionLocal() as db:
+                existing = set((await db.execute(query)).scalars())
+        except Exception as exc:
+            logger.warning("Scheduler could not check for deleted use cases: %s", exc)
+            return
+        for use_case_id in use_case_ids:
+            if use_case_id not in existing:
+                self._entries.pop(use_case_id, None)
+                self._paused.discard(use_case_id)
+
+    async def fire_due(self, now: Optional[datetime] = None) -> int:
+        """Dispatch every run that is due; returns how many were dispatched."""
+        now = now or datetime.now(timezone.utc)
+        due: List[UUID] = []
+        while self._heap and self._heap[0][0] <= now:
+            _, version, use_case_id = heapq.heappop(self._heap)
+            entry = self._entries.get(use_case_id)
+            if entry is not None and entry.version == version:
+                due.append(use_case_id)
+        if due:
+            await self._forget_deleted(due)
+
+        batches: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for use_case_id in due:
+            entry = self._entries.get(use_case_id)
+            if entry is None:
+                continue
+            windows = self._windows(entry, now)
+            for window in windows:
+                if not await self._claim(use_case_id, window):
+                    continue
+                for target in entry.targets:
+                    batches.setdefault((target["provider"], target["model"]), []).append(
+                        {
+                            "use_case_id": str(use_case_id),
+                            "user_id": str(entry.user_id),
+                            "fired_at": window.isoformat(),
+                            "prompt": entry.prompt,
+                        }
+                    )
+            # Windows past the grace horizon are dropped, not retried
+            after = windows[-1] if windows else now
+            self._push(use_case_id, entry, entry.schedule.next_after(after))
+
+        for (provider, model), runs in batches.items():
+            self.dispatch(provider, model, runs)
+        return sum(len(runs) for runs in batches.values())
+
+    def _seconds_until_due(self, now: datetime) -> float:
+        if not self._heap:
+            return settings.USECASE_SCHEDULER_POLL
+        return max(0.0, (self._heap[0][0] - now).total_seconds())
+
+    async def run(self) -> None:
+        """Poll for changes and fire due runs until cancelled."""
+        loop = asyncio.get_running_loop()
+        await self.load_changes()
+        logger.info("Scheduler tracking %d use cases", len(self._entries))
+        next_poll = loop.time() + settings.USECASE_SCHEDULER_POLL
+        while True:
+            try:
+                await self.fire_due()
+                if loop.time() >= next_poll:
+                    await self.load_changes()
+                    next_poll = loop.time() + settings.USECASE_SCHEDULER_POLL
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            now = datetime.now(timezone.utc)
+            await asyncio.sleep(
+                min(self._seconds_until_due(now), max(0.0, next_poll - loop.time()))
+            )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=settings.LOG_LEVEL,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    asyncio.run(UseCaseScheduler().run())
@@ -0,0 +1,23 @@
+import re
+from typing import Any, List, Mapping
+
+# {{ name }} placeholders; single braces are left alone for JSON examples
+_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+def variables(template: str) -> List[str]:
+    """Names of the placeholders a template uses, in order of appearance."""
+    return list(dict.fromkeys(_PLACEHOLDER.findall(template)))
+
+
+def render(template: str, values: Mapping[str, Any]) -> str:
+    """Fill a prompt template; raises ValueError on a missing variable."""
+
+    def replace(match: "re.Match[str]") -> str:
+        name = match.group(1)
+        if name not in values:
+            raise ValueError(f"Missing template variable '{name}'")
+        value = values[name]
+        return "" if value is None else str(value)
+
+    return _PLACEHOLDER.sub(replace, template)
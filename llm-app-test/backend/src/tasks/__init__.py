@@ -0,0 +1,3 @@
+from src.tasks.celery_app import celery_app
+
+__all__ = ["celery_app"]
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine, TypeVar
+
+from celery import Celery
+from kombu import Queue
+
+from src.config.database import engine
+from src.config.http import scoped_http_clients
+from src.config.redis import redis_client, scoped_redis
+from src.config.settings import settings
+from src.utils.metrics import write_snapshot
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Drained in this order by a worker listening on all of them, so
+# interactive fan-outs never wait behind a large batch
+QUEUES = ("llm.interactive", "persistence", "evaluation", "llm.batch")
+
+celery_app = Celery(
+    "llm_chat",
+    include=["src.tasks.chat_tasks", "src.tasks.evaluation_tasks", "src.tasks.usecase_tasks"],
+)
+
+if settings.CELERY_TASK_ALWAYS_EAGER:
+    # Tests: run inline with an in-memory broker, no Redis required
+    broker_url, result_backend = "memory://", "cache+memory://"
+else:
+    broker_url, result_backend = settings.CELERY_BROKER_URL, settings.CELERY_RESULT_BACKEND
+
+celery_app.conf.update(
+    broker_url=broker_url,
+    result_backend=result_backend,
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
+    task_eager_propagates=True,
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_queues=[Queue(name) for name in QUEUES],
+    task_default_queue="llm.interactive",
+    broker_transport_options={
+        "queue_order_strategy": "priority",
+        # Must outlast the longest job, or Redis hands it to a second worker
+        "visibility_timeout": settings.CELERY_VISIBILITY_TIMEOUT,
+    },
+    # LLM jobs are long and uneven: hand them out one at a time and only
+    # acknowledge once done, so a crashed worker's job is redelivered
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    result_expires=settings.CELERY_RESULT_EXPIRES,
+)
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion from a synchronous task body.
+
+    Each job gets a fresh event loop and its own provider HTTP clients.
+    Database and Redis connections are loop-bound too, so they are
+    released when the job ends; workers should run with
+    ``DATABASE_POOL_MODE=null``. A worker publishes its metrics after
+    every job, for the API's /metrics to include from METRICS_DIR.
+    """
+
+    async def job() -> T:
+        try:
+            async with scoped_http_clients():
+                return await coro
+        finally:
+            await engine.dispose()
+            await redis_client.connection_pool.disconnect()
+            if settings.METRICS_ENABLED and not settings.CELERY_TASK_ALWAYS_EAGER:
+                try:
+                    write_snapshot()
+                except OSError as exc:
+                    logger.warning("Could not write metrics snapshot: %s", exc)
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(job())
+
+    async def inline() -> T:
+        async with scoped_http_clients(), scoped_redis():
+            return await coro
+
+    # Eager call from async code (tests through the API): the caller's loop
+    # owns the shared pools, so run on a private loop in a helper thread
+    # with clients of its own. Such tests need DATABASE_POOL_MODE=null too.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, inline()).result()
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from celery import group
+from celery.result import GroupResult
+from sqlalchemy import insert, select
+
+from src.config.database import AsyncSessionLocal
+from src.config.settings import settings
+from src.models.chat import ChatSession, Message
+from src.models.user import User
+from src.services.chat_context import count_message_tokens, release_summary, summarize_thread
+from src.services.dashboard.rollup import record_results
+from src.services.export_service import write_export
+from src.services.llm.base import LLMResult
+from src.services.llm.coordinator import LLMCoordinator, provider_slots
+from src.tasks.celery_app import celery_app, run_async
+
+logger = logging.getLogger(__name__)
+
+
+def _chunks(items: Sequence[Any], size: int) -> List[Sequence[Any]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+async def _load_api_keys(user_id: str) -> Dict[str, str]:
+    # Keys are looked up by the worker rather than travelling through the broker
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User.api_keys).filter(User.id == UUID(user_id)))
+        return result.scalar_one_or_none() or {}
+
+
+async def _fanout(
+    user_id: str,
+    targets: Sequence[Sequence[str]],
+    prompts: Sequence[str],
+    params: Optional[Dict[str, Any]],
+    timeout: Optional[float],
+    deadline: Optional[float],
+    use_cache: Optional[bool],
+) -> List[List[Dict[str, Any]]]:
+    # One coordinator per prompt, all sharing the per-provider slots
+    api_keys = await _load_api_keys(user_id)
+    slots = provider_slots(target[0] for target in targets)
+    coordinators = [
+        LLMCoordinator(
+            api_keys=api_keys,
+            timeout=timeout,
+            deadline=deadline,
+            user_id=user_id,
+            use_cache=use_cache,
+            slots=slots,
+        )
+        for _ in prompts
+    ]
+    batches = await asyncio.gather(
+        *(
+            coordinator.query([tuple(t) for t in targets], prompt=prompt, params=params)
+            for coordinator, prompt in zip(coordinators, prompts)
+        )
+    )
+    return [[asdict(result) for result in results] for results in batches]
+
+
+@celery_app.task(queue="llm.interactive")
+def run_fanout(
+    user_id: str,
+    targets: List[List[str]],
+    prompt: str,
+    params: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    use_cache: Optional[bool] = None,
+) -> List[Dict[str, Any]]:
+    """Query several provider/model targets with one prompt."""
+    return run_async(_fanout(user_id, targets, [prompt], params, timeout, deadline, use_cache))[0]
+
+
+@celery_app.task(queue="llm.batch")
+def run_prompt_batch(
+    user_id: str,
+    targets: List[List[str]],
+    prompts: List[str],
+    params: Optional[Dict[str, Any]] = None,
+    session_id: Optional[str] = None,
+    use_cache: Optional[bool] = None,
+) -> List[List[Dict[str, Any]]]:
+    """Run one chunk of prompts against every target.
+
+    Per-provider concurrency is capped by ``LLM_TASK_PROVIDER_CONCURRENCY``.
+    With a ``session_id`` the turns are handed to ``persist_messages``.
+    """
+    # Prompts wait for provider slots inside their deadline, so allow each
+    # one a full deadline as if the whole chunk ran one prompt at a time
+    deadline = settings.LLM_QUERY_DEADLINE * len(prompts)
+    batches = run_async(_fanout(user_id, targets, prompts, params, None, deadline, use_cache))
+    if session_id is not None:
+        persist_messages.delay(
+            [
+                {
+                    "session_id": session_id,
+                    "user_id": user_id,
+                    "content": prompt,
+                    "responses": results,
+                }
+                for prompt, results in zip(prompts, batches)
+            ]
+        )
+    return batches
+
+
+def submit_batch(
+    user_id: str,
+    targets: List[List[str]],
+    prompts: List[str],
+    params: Optional[Dict[str, Any]] = None,
+    session_id: Optional[str] = None,
+    chunk_size: Optional[int] = None,
+) -> GroupResult:
+    """Split a prompt list into chunked batch tasks and enqueue them together.
+
+    Each chunk's results are stored separately, so no single result
+    payload grows with the size of the batch.
+    """
+    size = chunk_size or settings.CELERY_BATCH_CHUNK_SIZE
+    return group(
+        run_prompt_batch.s(user_id, targets, list(chunk), params, session_id)
+        for chunk in _chunks(prompts, size)
+    ).apply_async()
+
+
+async def _persist(rows: List[Dict[str, Any]]) -> int:
+    now = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as db:
+        # Messages carry their session's owner; look up any not given
+        unknown = {UUID(row["session_id"]) for row in rows if not row.get("user_id")}
+        owners: Dict[UUID, UUID] = {}
+        if unknown:
+            owners = dict(
+                (
+                    await db.execute(
+                        select(ChatSession.id, ChatSession.user_id).filter(
+                            ChatSession.id.in_(unknown)
+                        )
+                    )
+                ).all()
+            )
+
+        owned = []
+        for row in rows:
+            session_id = UUID(row["session_id"])
+            user_id = UUID(row["user_id"]) if row.get("user_id") else owners.get(session_id)
+            if user_id is None:
+                # The session was deleted after the turn was queued
+                logger.warning("Dropping a message for missing session %s", session_id)
+                continue
+            owned.append((session_id, user_id, row))
+
+        for chunk in _chunks(owned, settings.CELERY_PERSIST_CHUNK_SIZE):
+            await db.execute(
+                insert(Message),
+                [
+                    {
+                        "session_id": session_id,
+                        "user_id": user_id,
+                        "content": row["content"],
+                        "type": row.get("type", "user"),
+                        "responses": row["responses"],
+                        "token_counts": count_message_tokens(
+                            row["content"],
+                            row["responses"],
+                            {response["model"] for response in row["responses"]},
+                        ),
+                        "created_at": now,
+                    }
+                    for session_id, user_id, row in chunk
+                ],
+            )
+
+        # One rollup upsert per user for the whole batch
+        by_user: Dict[UUID, List[LLMResult]] = {}
+        for _, user_id, row in owned:
+            by_user.setdefault(user_id, []).extend(
+                LLMResult(**response) for response in row["responses"]
+            )
+        for user_id, results in by_user.items():
+            await record_results(db, user_id, results, now)
+        await db.commit()
+    return len(owned)
+
+
+@celery_app.task(queue="persistence")
+def persist_messages(rows: List[Dict[str, Any]]) -> int:
+    """Bulk-insert chat turns and their usage rollups in one transaction.
+
+    Returns the number of turns stored; those of deleted sessions are dropped.
+    """
+    return run_async(_persist(rows))
+
+
+async def _summarize(
+    session_id: str, provider: str, model: str, through_message_id: str, user_id: str
+) -> bool:
+    try:
+        return await summarize_thread(
+            UUID(session_id),
+            provider,
+            model,
+            UUID(through_message_id),
+            UUID(user_id),
+            api_keys=await _load_api_keys(user_id),
+        )
+    finally:
+        await release_summary(UUID(session_id), provider, model)
+
+
+@celery_app.task(queue="llm.batch")
+def summarize_context(
+    session_id: str,
+    provider: str,
+    model: str,
+    through_message_id: str,
+    user_id: str,
+) -> bool:
+    """Fold a chat thread's overflowing turns into its context checkpoint."""
+    return run_async(_summarize(session_id, provider, model, through_message_id, user_id))
+
+
+@celery_app.task(queue="persistence")
+def export_history(job_id: str) -> Optional[int]:
+    """Write a chat history export to UPLOAD_DIR."""
+    return run_async(write_export(UUID(job_id)))
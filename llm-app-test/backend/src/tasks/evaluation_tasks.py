@@ -0,0 +1,19 @@
+from typing import List
+from uuid import UUID
+
+from src.config.database import AsyncSessionLocal
+from src.services.evaluation import auto_evaluation
+from src.tasks.celery_app import celery_app, run_async
+
+
+async def _score(message_ids: List[str]) -> int:
+    async with AsyncSessionLocal() as db:
+        return await auto_evaluation.score_messages(
+            db, [UUID(message_id) for message_id in message_ids]
+        )
+
+
+@celery_app.task(queue="evaluation")
+def score_messages(message_ids: List[str]) -> int:
+    """Compute automatic metrics for each message's responses."""
+    return run_async(_score(message_ids))
@@ -0,0 +1,17 @@
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from src.services.usecase.executor import execute_batch, run_dataset_job
+from src.tasks.celery_app import celery_app, run_async
+
+
+@celery_app.task(queue="llm.batch")
+def run_scheduled_batch(provider: str, model: str, runs: List[Dict[str, Any]]) -> int:
+    """Execute scheduled use case runs that share one provider/model."""
+    return run_async(execute_batch(provider, model, runs))
+
+
+@celery_app.task(queue="llm.batch")
+def run_dataset(job_id: str) -> Optional[int]:
+    """Run a use case over a dataset, resuming from its last checkpoint."""
+    return run_async(run_dataset_job(UUID(job_id)))
@@ -0,0 +1,309 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import socket
+import tempfile
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[str, ...]
+
+# Seconds; covers Redis round-trips through slow provider calls
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class Metric:
+    """A named family of series, one per combination of label values.
+
+    Recording is a dict lookup and an in-place add, with no lock: metrics
+    are only recorded from the event loop thread of the process.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, Any] = {}
+        registry.register(self)
+
+
+class Counter(Metric):
+    """Monotonic total, summed across processes, including exited ones."""
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        values = self._values
+        values[labels] = values.get(labels, 0.0) + amount
+
+    def set_total(self, value: float, *labels: str) -> None:
+        """For collectors mirroring a total the process already keeps."""
+        self._values[labels] = value
+
+
+class Gauge(Metric):
+    """Current value, combined over live processes only by ``mode`` ('sum' or 'max')."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        mode: str = "sum",
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.mode = mode
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    """Bucketed observations, summed across processes.
+
+    Each series is a flat list of per-bucket counts followed by the sum,
+    so an observation is one bisect and two list updates.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        # Buckets are upper bounds inclusive ("le"); the last count is +Inf
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+
+class Registry:
+    """Every metric of the process, plus callbacks that refresh gauges before export."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self.metrics[metric.name] = metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self.collectors.append(collector)
+
+    def collect(self) -> None:
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception:
+                logger.exception("Metrics collector %r failed", collector)
+
+    def snapshot(self) -> Dict[str, List[Tuple[Labels, Any]]]:
+        """JSON-friendly values of every series, after running the collectors."""
+        self.collect()
+        return {
+            name: [(labels, value) for labels, value in list(metric._values.items())]
+            for name, metric in self.metrics.items()
+        }
+
+
+registry = Registry()
+
+
+def metrics_dir() -> str:
+    # Workers of one server share a parent, so by default each server run
+    # gets its own directory and never sums a previous run's counters
+    path = settings.METRICS_DIR or os.path.join(
+        tempfile.gettempdir(), f"app-metrics-{os.getppid()}"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def write_snapshot() -> None:
+    """Publish this process's values for the other workers to aggregate."""
+    # Containers sharing METRICS_DIR reuse pids, so the hostname tells them apart
+    path = os.path.join(metrics_dir(), f"{socket.gethostname()}-{os.getpid()}.json")
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as handle:
+        json.dump(registry.snapshot(), handle, separators=(",", ":"))
+    os.replace(temporary, path)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _snapshots() -> Iterable[Tuple[bool, Dict[str, List[Tuple[Labels, Any]]]]]:
+    # This process is read live; the others from their last flush
+    yield True, registry.snapshot()
+    directory = metrics_dir()
+    hostname = socket.gethostname()
+    for filename in os.listdir(directory):
+        name, extension = os.path.splitext(filename)
+        host, _, pid = name.rpartition("-")
+        if extension != ".json" or not host or not pid.isdigit():
+            continue
+        local = host == hostname
+        if local and int(pid) == os.getpid():
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as handle:
+                snapshot = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        # Only pids of this host can be checked; gauges of other hosts'
+        # processes keep their last flushed values
+        yield not local or _alive(int(pid)), snapshot
+
+
+def aggregate() -> Dict[str, Dict[Labels, Any]]:
+    """Values of every metric, combined across every process writing to METRICS_DIR."""
+    merged: Dict[str, Dict[Labels, Any]] = {name: {} for name in registry.metrics}
+    for alive, snapshot in _snapshots():
+        for name, series in snapshot.items():
+            metric = registry.metrics.get(name)
+            if metric is None or (metric.kind == "gauge" and not alive):
+                continue
+            values = merged[name]
+            for labels, value in series:
+                labels = tuple(labels)
+                current = values.get(labels)
+                if current is None:
+                    values[labels] = list(value) if metric.kind == "histogram" else value
+                elif metric.kind == "histogram":
+                    values[labels] = [a + b for a, b in zip(current, value)]
+                elif metric.kind == "gauge" and metric.mode == "max":
+                    values[labels] = max(current, value)
+                else:
+                    values[labels] = current + value
+    return merged
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = (
+        '{}="{}"'.format(
+            name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for name, values in aggregate().items():
+        metric = registry.metrics[name]
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for labels, value in sorted(values.items()):
+            if metric.kind != "histogram":
+                lines.append(
+                    f"{name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}"
+                )
+                continue
+            names = metric.labelnames + ("le",)
+            cumulative = 0
+            for bound, count in zip(metric.buckets + (math.inf,), value[:-1]):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket{_format_labels(names, labels + (_format_value(bound),))} "
+                    f"{cumulative}"
+                )
+            suffix = _format_labels(metric.labelnames, labels)
+            lines.append(f"{name}_sum{suffix} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{suffix} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a timer that was due",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+EVENT_LOOP_LAG_LAST = Gauge(
+    "event_loop_lag_last_seconds",
+    "Latest event loop lag, worst worker",
+    mode="max",
+)
+
+
+async def monitor_event_loop(interval: Optional[float] = None) -> None:
+    """Sample event loop lag until cancelled."""
+    interval = interval or settings.METRICS_LOOP_INTERVAL
+    loop = asyncio.get_running_loop()
+    while True:
+        due = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(loop.time() - due, 0.0)
+        EVENT_LOOP_LAG.observe(lag)
+        EVENT_LOOP_LAG_LAST.set(lag)
+
+
+async def publish_metrics(interval: Optional[float] = None) -> None:
+    """Flush this worker's snapshot every ``interval`` seconds until cancelled."""
+    interval = interval or settings.METRICS_FLUSH_INTERVAL
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                write_snapshot()
+            except OSError as exc:
+                logger.warning("Could not write metrics snapshot: %s", exc)
+    finally:
+        # Last values of an exiting worker, so its counters are not lost
+        try:
+            write_snapshot()
+        except OSError:
+            pass
@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Opaque keyset cursor pointing just past a (created_at, id) row."""
+    raw = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Inverse of ``encode_cursor``; raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def encode_rank_cursor(rank: float, created_at: datetime, row_id: UUID) -> str:
+    """Keyset cursor for results ordered by (rank, created_at, id)."""
+    raw = json.dumps([rank, created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, datetime, UUID]:
+    """Inverse of ``encode_rank_cursor``; raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(rank), datetime.fromisoformat(created_at), UUID(row_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
@@ -0,0 +1,100 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Type
+
+import pytest
+
+# Before anything reads settings: Celery runs inline, connections are not
+# pooled across the short-lived loops of task bodies, and database tests
+# only run against a database named for them
+os.environ.setdefault("CELERY_TASK_ALWAYS_EAGER", "true")
+os.environ.setdefault("DATABASE_POOL_MODE", "null")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+if os.environ.get("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+
+from src.config.database import Base, engine  # noqa: E402
+from src.services.llm import PROVIDERS  # noqa: E402
+from src.services.llm.base import LLMProvider  # noqa: E402
+from src.services.llm.resilience import Resilience  # noqa: E402
+
+
+class FakeProvider(LLMProvider):
+    """In-process provider streaming canned words after a delay.
+
+    ``delays`` and ``errors`` are consumed one per call, so a test can
+    script a slow first attempt followed by a fast retry or hedge.
+    """
+
+    name = "fake"
+    default_model = "fake-model"
+    models = ["fake-model"]
+    words: List[str] = ["Hello", " world"]
+    delays: List[float] = []
+    errors: List[Optional[BaseException]] = []
+    calls = 0
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        **params: Any,
+    ) -> AsyncIterator[str]:
+        cls = type(self)
+        cls.calls += 1
+        delay = cls.delays.pop(0) if cls.delays else 0.0
+        error = cls.errors.pop(0) if cls.errors else None
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        for word in cls.words:
+            yield word
+
+
+@pytest.fixture
+def fake_provider(monkeypatch: pytest.MonkeyPatch) -> Callable[..., Type[FakeProvider]]:
+    """Register a scripted provider under ``name`` for the test."""
+
+    def register(
+        name: str = "fake",
+        delays: Optional[List[float]] = None,
+        errors: Optional[List[Optional[BaseException]]] = None,
+        words: Optional[List[str]] = None,
+    ) -> Type[FakeProvider]:
+        provider = type(
+            f"FakeProvider_{name}",
+            (FakeProvider,),
+            {
+                "name": name,
+                "delays": list(delays or []),
+                "errors": list(errors or []),
+                "words": list(words or FakeProvider.words),
+                "calls": 0,
+            },
+        )
+        monkeypatch.setitem(PROVIDERS, name, provider)
+        return provider
+
+    return register
+
+
+@pytest.fixture
+def resilience() -> Resilience:
+    """Breakers and budgets of the test only, not the process-wide ones."""
+    return Resilience()
+
+
+@pytest.fixture
+def database() -> None:
+    """Empty tables in TEST_DATABASE_URL; the test is skipped without one."""
+    if not os.environ.get("TEST_DATABASE_URL"):
+        pytest.skip("TEST_DATABASE_URL is not set")
+    import src.models  # noqa: F401
+
+    async def reset() -> None:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+            await connection.run_sync(Base.metadata.create_all)
+        await engine.dispose()
+
+    asyncio.run(reset())
@@ -0,0 +1,89 @@
+import time
+
+from src.services.llm.coordinator import LLMCoordinator
+
+
+def coordinator(resilience, **kwargs) -> LLMCoordinator:
+    return LLMCoordinator(use_cache=False, hedge=False, resilience=resilience, **kwargs)
+
+
+async def test_all_targets_answer(fake_provider, resilience):
+    fake_provider("fast-a")
+    fake_provider("fast-b", words=["Hi"])
+
+    results = await coordinator(resilience).query([("fast-a", "m"), ("fast-b", "m")], "Hi")
+
+    by_provider = {result.provider: result for result in results}
+    assert by_provider["fast-a"].status == "ok"
+    assert by_provider["fast-a"].content == "Hello world"
+    assert by_provider["fast-b"].content == "Hi"
+    assert all(result.ttft is not None and result.latency is not None for result in results)
+
+
+async def test_provider_timeout_is_per_target(fake_provider, resilience):
+    fake_provider("slow", delays=[5.0])
+    fake_provider("fast")
+
+    started = time.perf_counter()
+    results = await coordinator(resilience, timeout=0.1, deadline=10).query(
+        [("slow", "m"), ("fast", "m")], "Hi"
+    )
+
+    assert time.perf_counter() - started < 1.0
+    by_provider = {result.provider: result for result in results}
+    assert by_provider["fast"].status == "ok"
+    assert by_provider["slow"].status == "timeout"
+    assert by_provider["slow"].content == ""
+
+
+async def test_partial_results_when_a_provider_fails(fake_provider, resilience):
+    fake_provider("broken", errors=[ValueError("Invalid API key")])
+    fake_provider("healthy")
+
+    results = await coordinator(resilience).query([("broken", "m"), ("healthy", "m")], "Hi")
+
+    by_provider = {result.provider: result for result in results}
+    assert by_provider["healthy"].status == "ok"
+    assert by_provider["healthy"].content == "Hello world"
+    assert by_provider["broken"].status == "error"
+    assert by_provider["broken"].error == "Invalid API key"
+
+
+async def test_deadline_cuts_off_slow_targets_as_timeout(fake_provider, resilience):
+    fake_provider("slow", delays=[5.0])
+    fake_provider("fast")
+
+    started = time.perf_counter()
+    results = await coordinator(resilience, timeout=10, deadline=0.2).query(
+        [("slow", "m"), ("fast", "m")], "Hi"
+    )
+
+    assert time.perf_counter() - started < 1.0
+    assert [result.provider for result in results] == ["fast", "slow"]
+    assert results[0].status == "ok"
+    assert results[1].status == "timeout"
+    assert "Deadline" in results[1].error
+
+
+async def test_wait_for_cancels_the_remaining_targets(fake_provider, resilience):
+    fake_provider("slow", delays=[5.0])
+    fake_provider("fast")
+
+    results = await coordinator(resilience, deadline=10).query(
+        [("slow", "m"), ("fast", "m")], "Hi", wait_for=1
+    )
+
+    by_provider = {result.provider: result for result in results}
+    assert by_provider["fast"].status == "ok"
+    assert by_provider["slow"].status == "cancelled"
+
+
+async def test_every_target_cut_off_by_the_deadline_times_out(fake_provider, resilience):
+    provider = fake_provider("slow", delays=[5.0, 5.0])
+
+    results = await coordinator(resilience, deadline=0.05).query(
+        [("slow", "a"), ("slow", "b")], "Hi"
+    )
+
+    assert provider.calls == 2
+    assert {result.status for result in results} == {"timeout"}
@@ -0,0 +1,188 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pytest
+
+from src.services.evaluation.metrics import score_batch, score_responses, similarity_matrix
+
+
+def response(
+    provider: str,
+    content: str,
+    latency: Optional[float] = 1.0,
+    completion_tokens: Optional[int] = None,
+    status: str = "ok",
+    **extra: Any,
+) -> Dict[str, Any]:
+    result = {
+        "provider": provider,
+        "model": f"{provider}-model",
+        "content": content,
+        "status": status,
+        "latency": latency,
+        **extra,
+    }
+    if completion_tokens is not None:
+        result["usage"] = {"completion_tokens": completion_tokens}
+    return result
+
+
+@pytest.mark.parametrize(
+    "texts, expected",
+    [
+        (["same answer", "same answer"], [[1, 1], [1, 1]]),
+        # Case and whitespace are normalized away
+        (["Hello   World", "hello world"], [[1, 1], [1, 1]]),
+        (["aaaa", "zzzz"], [[1, 0], [0, 1]]),
+        # Shorter than a trigram still compares
+        (["a", "a"], [[1, 1], [1, 1]]),
+        (["", "text"], [[0, 0], [0, 1]]),
+        (["", ""], [[0, 0], [0, 0]]),
+    ],
+)
+def test_similarity_matrix(texts, expected):
+    assert similarity_matrix(texts) == pytest.approx(np.array(expected, dtype=float))
+
+
+def test_similarity_matrix_is_symmetric_and_bounded():
+    matrix = similarity_matrix(
+        ["The capital of France is Paris.", "Paris is the capital of France.", "42", "東京です"]
+    )
+
+    assert matrix == pytest.approx(matrix.T)
+    assert ((matrix >= 0) & (matrix <= 1)).all()
+    assert 0 < matrix[0, 1] < 1
+    assert matrix[0, 2] == 0
+
+
+def test_single_response_has_no_agreement():
+    scores = score_responses([response("openai", "Only answer")])
+
+    score = scores[("openai", "openai-model")]
+    assert score["agreement"] is None
+    assert score["similarity"] == {}
+    assert score["length_z"] == 0
+    assert score["latency_ratio"] == 1
+
+
+def test_exact_metrics():
+    scores = score_responses(
+        [
+            response("openai", "a" * 10, latency=1.0, completion_tokens=5, ttft=0.25),
+            response("anthropic", "a" * 30, latency=2.0, completion_tokens=10),
+        ]
+    )
+
+    fast, slow = scores[("openai", "openai-model")], scores[("anthropic", "anthropic-model")]
+    assert (fast["length"], slow["length"]) == (10, 30)
+    assert (fast["chars_per_second"], slow["chars_per_second"]) == (10.0, 15.0)
+    assert (fast["tokens_per_second"], slow["tokens_per_second"]) == (5.0, 5.0)
+    assert (fast["chars_per_token"], slow["chars_per_token"]) == (2.0, 3.0)
+    # Population standard deviation of 10 and 30 is 10
+    assert (fast["length_z"], slow["length_z"]) == (-1.0, 1.0)
+    assert (fast["latency_ratio"], slow["latency_ratio"]) == (1.0, 2.0)
+    assert (fast["ttft"], slow["ttft"]) == (0.25, None)
+    assert fast["agreement"] == slow["agreement"] == fast["similarity"]["anthropic/anthropic-model"]
+
+
+@pytest.mark.parametrize(
+    "latency, completion_tokens, expected",
+    [
+        (
+            0.0,
+            5,
+            {
+                "chars_per_second": None,
+                "tokens_per_second": None,
+                "chars_per_token": 2.0,
+                "latency_ratio": None,
+            },
+        ),
+        (
+            None,
+            5,
+            {
+                "chars_per_second": None,
+                "tokens_per_second": None,
+                "chars_per_token": 2.0,
+                "latency_ratio": None,
+            },
+        ),
+        (
+            2.0,
+            None,
+            {
+                "chars_per_second": 5.0,
+                "tokens_per_second": None,
+                "chars_per_token": None,
+                "completion_tokens": None,
+            },
+        ),
+        (
+            2.0,
+            0,
+            {
+                "chars_per_second": 5.0,
+                "tokens_per_second": None,
+                "chars_per_token": None,
+                "completion_tokens": None,
+            },
+        ),
+    ],
+)
+def test_missing_inputs_give_null_metrics(latency, completion_tokens, expected):
+    scores = score_responses(
+        [response("openai", "a" * 10, latency=latency, completion_tokens=completion_tokens)]
+    )
+
+    score = scores[("openai", "openai-model")]
+    assert {name: score[name] for name in expected} == expected
+
+
+def test_latency_ratio_ignores_unknown_latencies():
+    scores = score_responses(
+        [response("openai", "one", latency=0.0), response("anthropic", "two", latency=3.0)]
+    )
+
+    assert scores[("openai", "openai-model")]["latency_ratio"] is None
+    assert scores[("anthropic", "anthropic-model")]["latency_ratio"] == 1.0
+
+
+def test_agreement_is_the_mean_similarity_to_the_others():
+    scores = score_responses(
+        [
+            response("a", "The sky is blue today"),
+            response("b", "The sky is blue today"),
+            response("c", "Bananas are yellow"),
+        ]
+    )
+
+    a = scores[("a", "a-model")]
+    assert a["similarity"]["b/b-model"] == 1.0
+    assert a["agreement"] == pytest.approx((1.0 + a["similarity"]["c/c-model"]) / 2, abs=1e-4)
+    assert scores[("c", "c-model")]["agreement"] < a["agreement"]
+
+
+def test_unanswered_responses_are_not_scored():
+    scores = score_responses(
+        [
+            response("openai", "Answer"),
+            response("anthropic", "", status="ok"),
+            response("google", "Partial", status="timeout"),
+            response("mistral", "", status="error"),
+        ]
+    )
+
+    assert list(scores) == [("openai", "openai-model")]
+    assert scores[("openai", "openai-model")]["agreement"] is None
+
+
+def test_nothing_to_score():
+    assert score_responses([]) == {}
+    assert score_responses([response("openai", "", status="error")]) == {}
+
+
+def test_score_batch():
+    batches = score_batch([[response("openai", "Answer")], [], None])  # type: ignore[list-item]
+
+    assert [list(scores) for scores in batches] == [[("openai", "openai-model")], [], []]
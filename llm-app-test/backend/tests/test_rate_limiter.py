@@ -0,0 +1,191 @@
+from typing import Any
+from uuid import uuid4
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from fastapi import HTTPException
+
+from src.config.settings import settings
+from src.core import deps
+from src.services.llm.rate_limiter import RateLimiter
+
+
+class CountingRateLimiter(RateLimiter):
+    """Counts the GCRA script calls, i.e. the Redis round-trips."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+        script = self._script
+
+        async def counted(**kwargs: Any) -> Any:
+            self.calls += 1
+            return await script(**kwargs)
+
+        self._script = counted
+
+
+@pytest.fixture
+def redis() -> FakeAsyncRedis:
+    return FakeAsyncRedis(server=FakeServer())
+
+
+@pytest.fixture
+def limiter(redis: FakeAsyncRedis) -> CountingRateLimiter:
+    """One token per round-trip, so every hit reaches Redis."""
+    return CountingRateLimiter(redis=redis, batch=1)
+
+
+async def test_allows_up_to_the_limit_then_denies(limiter):
+    results = [await limiter.hit("k", 3, period=60) for _ in range(4)]
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results] == [2, 1, 0, 0]
+    # One token is 20s of a 3-per-minute bucket, and the bucket is 60s from full
+    denied = results[-1]
+    assert denied.retry_after == pytest.approx(20, abs=0.5)
+    assert denied.reset == pytest.approx(60, abs=0.5)
+
+
+async def test_keys_are_limited_separately(limiter):
+    assert (await limiter.hit("a", 1)).allowed
+    assert not (await limiter.hit("a", 1)).allowed
+    assert (await limiter.hit("b", 1)).allowed
+
+
+async def test_state_is_shared_between_workers(redis):
+    first = RateLimiter(redis=redis, batch=1)
+    second = RateLimiter(redis=redis, batch=1)
+
+    assert (await first.hit("k", 2)).allowed
+    assert (await second.hit("k", 2)).allowed
+    assert not (await first.hit("k", 2)).allowed
+    assert not (await second.hit("k", 2)).allowed
+
+
+@pytest.mark.parametrize(
+    "hits, expected",
+    [
+        (
+            1,
+            {"RateLimit-Limit": "3", "RateLimit-Remaining": "2", "RateLimit-Reset": "20"},
+        ),
+        (
+            4,
+            {
+                "RateLimit-Limit": "3",
+                "RateLimit-Remaining": "0",
+                "RateLimit-Reset": "60",
+                "Retry-After": "20",
+            },
+        ),
+    ],
+)
+async def test_headers(limiter, hits, expected):
+    for _ in range(hits):
+        result = await limiter.hit("k", 3, period=60)
+
+    assert result.headers == expected
+
+
+async def test_retry_after_is_at_least_one_second(limiter):
+    for _ in range(3):
+        result = await limiter.hit("k", 2, period=1)
+
+    assert not result.allowed
+    assert result.retry_after < 1
+    assert result.headers["Retry-After"] == "1"
+
+
+async def test_lease_spends_a_batch_locally(redis):
+    limiter = CountingRateLimiter(redis=redis, batch=5, lease_seconds=60)
+
+    results = [await limiter.hit("k", 10) for _ in range(6)]
+
+    assert all(result.allowed for result in results)
+    assert [result.remaining for result in results] == [9, 8, 7, 6, 5, 4]
+    assert limiter.calls == 2
+
+
+async def test_lease_never_exceeds_the_limit(redis):
+    limiter = CountingRateLimiter(redis=redis, batch=5, lease_seconds=60)
+
+    results = [await limiter.hit("k", 2) for _ in range(4)]
+
+    assert [result.allowed for result in results] == [True, True, False, False]
+    # The first denial is remembered until its retry time
+    assert limiter.calls == 2
+
+
+async def test_refund_returns_the_token_to_the_lease(limiter):
+    assert (await limiter.hit("k", 1)).allowed
+    limiter.refund("k")
+
+    result = await limiter.hit("k", 1)
+
+    assert result.allowed
+    assert limiter.calls == 1
+
+
+async def test_refund_after_a_denial_grants_nothing(limiter):
+    await limiter.hit("k", 1)
+    assert not (await limiter.hit("k", 1)).allowed
+
+    limiter.refund("k")
+
+    assert not (await limiter.hit("k", 1)).allowed
+
+
+async def test_fails_open_without_redis():
+    server = FakeServer()
+    server.connected = False
+    limiter = RateLimiter(redis=FakeAsyncRedis(server=server), batch=1)
+
+    result = await limiter.hit("k", 1)
+
+    assert result.allowed
+    assert result.remaining == 1
+
+
+@pytest.fixture
+def enforced(monkeypatch: pytest.MonkeyPatch, redis: FakeAsyncRedis) -> CountingRateLimiter:
+    limiter = CountingRateLimiter(redis=redis, batch=5, lease_seconds=60)
+    monkeypatch.setattr(deps, "rate_limiter", limiter)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_MINUTE", 5)
+    monkeypatch.setattr(settings, "RATE_LIMIT_PROVIDER_PER_MINUTE", {})
+    monkeypatch.setattr(settings, "RATE_LIMIT_PROVIDER_GLOBAL_PER_MINUTE", {"openai": 1})
+    return limiter
+
+
+async def test_global_provider_bucket_is_shared_by_users(enforced):
+    await deps.enforce_rate_limits(uuid4(), ["openai"])
+
+    with pytest.raises(HTTPException) as denied:
+        await deps.enforce_rate_limits(uuid4(), ["openai"])
+
+    assert denied.value.status_code == 429
+    assert denied.value.headers["Retry-After"] == "60"
+    # Other providers have no global limit
+    await deps.enforce_rate_limits(uuid4(), ["anthropic"])
+
+
+async def test_denied_request_spends_no_other_limit(enforced):
+    user_id = uuid4()
+    await deps.enforce_rate_limits(user_id, ["openai"])
+    with pytest.raises(HTTPException):
+        await deps.enforce_rate_limits(user_id, ["openai"])
+
+    headers = await deps.enforce_rate_limits(user_id)
+
+    # Only the first and the last request count against the user's limit
+    assert headers["RateLimit-Remaining"] == "3"
+
+
+async def test_headers_are_the_tightest_limit(enforced, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_PROVIDER_PER_MINUTE", {"anthropic": 2})
+
+    headers = await deps.enforce_rate_limits(uuid4(), ["anthropic"])
+
+    assert headers["RateLimit-Limit"] == "2"
+    assert headers["RateLimit-Remaining"] == "1"
@@ -0,0 +1,135 @@
+import math
+import statistics
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import pytest
+
+from src.services.evaluation.ratings import (
+    ALL_TIME,
+    LEVELS,
+    PERCENTILES,
+    Deltas,
+    count_ratings,
+    summarize,
+)
+
+DAY_ONE = datetime(2026, 10, 17, 9, 30, tzinfo=timezone.utc)
+DAY_TWO = datetime(2026, 10, 18, 23, 59, tzinfo=timezone.utc)
+
+
+def ratings_of(histogram: List[int]) -> List[int]:
+    return [level for level, n in zip(range(1, 6), histogram) for _ in range(n)]
+
+
+def nearest_rank(values: List[int], p: int) -> int:
+    return sorted(values)[max(1, math.ceil(p / 100 * len(values))) - 1]
+
+
+def test_empty_histogram():
+    summary = summarize([0, 0, 0, 0, 0])
+
+    assert summary["count"] == 0
+    assert summary["mean"] is summary["variance"] is summary["stddev"] is None
+    assert summary["percentiles"] == {f"p{p}": None for p in PERCENTILES}
+
+
+def test_single_rating_has_no_variance():
+    summary = summarize([0, 0, 0, 1, 0])
+
+    assert summary["mean"] == 4
+    assert summary["variance"] is None
+    assert summary["stddev"] is None
+    assert summary["percentiles"] == {"p25": 4, "p50": 4, "p75": 4, "p90": 4}
+
+
+@pytest.mark.parametrize(
+    "histogram, mean, variance, percentiles",
+    [
+        ([1, 0, 0, 0, 1], 3.0, 8.0, {"p25": 1, "p50": 1, "p75": 5, "p90": 5}),
+        ([0, 0, 4, 0, 0], 3.0, 0.0, {"p25": 3, "p50": 3, "p75": 3, "p90": 3}),
+        ([2, 3, 0, 4, 1], 2.9, 2.1, {"p25": 2, "p50": 2, "p75": 4, "p90": 4}),
+        ([0, 0, 0, 9, 1], 4.1, 0.1, {"p25": 4, "p50": 4, "p75": 4, "p90": 4}),
+        ([0, 0, 0, 0, 10], 5.0, 0.0, {"p25": 5, "p50": 5, "p75": 5, "p90": 5}),
+    ],
+)
+def test_summary_statistics(histogram, mean, variance, percentiles):
+    summary = summarize(histogram)
+
+    assert summary["count"] == sum(histogram)
+    assert summary["mean"] == pytest.approx(mean)
+    assert summary["variance"] == pytest.approx(variance)
+    assert summary["stddev"] == pytest.approx(math.sqrt(variance))
+    assert summary["percentiles"] == percentiles
+    assert summary["histogram"] == histogram
+
+
+@pytest.mark.parametrize(
+    "histogram",
+    [[3, 1, 4, 1, 5], [0, 7, 0, 0, 2], [10, 0, 0, 0, 0], [1, 1, 1, 1, 1], [12, 40, 3, 97, 250]],
+)
+def test_summary_matches_the_individual_ratings(histogram):
+    values = ratings_of(histogram)
+
+    summary = summarize(histogram)
+
+    assert summary["mean"] == pytest.approx(statistics.mean(values))
+    assert summary["variance"] == pytest.approx(statistics.variance(values))
+    assert summary["percentiles"] == {f"p{p}": nearest_rank(values, p) for p in PERCENTILES}
+
+
+def levels(**counts: int) -> Dict[str, int]:
+    return {level: counts.get(level, 0) for level in LEVELS}
+
+
+def test_count_ratings_fills_day_and_all_time_buckets():
+    deltas: Deltas = {}
+
+    count_ratings(deltas, "openai", {"usefulness": 4, "accuracy": None}, DAY_ONE, 1)
+
+    day = datetime(2026, 10, 17, tzinfo=timezone.utc)
+    assert deltas == {
+        ("openai", "day", day, "usefulness"): levels(rated_4=1),
+        ("openai", "all", ALL_TIME, "usefulness"): levels(rated_4=1),
+    }
+
+
+def test_rerating_moves_the_rating():
+    deltas: Deltas = {}
+
+    # Rated 3 on day one, changed to 5 on day two
+    count_ratings(deltas, "openai", {"usefulness": 3}, DAY_ONE, -1)
+    count_ratings(deltas, "openai", {"usefulness": 5}, DAY_TWO, 1)
+
+    day_one = datetime(2026, 10, 17, tzinfo=timezone.utc)
+    day_two = datetime(2026, 10, 18, tzinfo=timezone.utc)
+    assert deltas == {
+        ("openai", "day", day_one, "usefulness"): levels(rated_3=-1),
+        ("openai", "day", day_two, "usefulness"): levels(rated_5=1),
+        ("openai", "all", ALL_TIME, "usefulness"): levels(rated_3=-1, rated_5=1),
+    }
+
+
+def test_unchanged_rerating_nets_to_zero():
+    deltas: Deltas = {}
+    ratings = {"usefulness": 2, "accuracy": 5, "creativity": None}
+
+    count_ratings(deltas, "openai", ratings, DAY_ONE, -1)
+    count_ratings(deltas, "openai", ratings, DAY_ONE.replace(hour=23), 1)
+
+    assert len(deltas) == 4
+    assert all(not any(delta.values()) for delta in deltas.values())
+
+
+def test_deltas_add_up_per_provider():
+    deltas: Deltas = {}
+
+    for rating in (1, 1, 5):
+        count_ratings(deltas, "openai", {"accuracy": rating}, DAY_ONE, 1)
+    count_ratings(deltas, "anthropic", {"accuracy": 1}, DAY_ONE, 1)
+
+    assert deltas[("openai", "all", ALL_TIME, "accuracy")] == levels(rated_1=2, rated_5=1)
+    assert deltas[("anthropic", "all", ALL_TIME, "accuracy")] == levels(rated_1=1)
+    # Applied to a rollup, the deltas give the provider's histogram
+    histogram = [deltas[("openai", "all", ALL_TIME, "accuracy")][level] for level in LEVELS]
+    assert summarize(histogram)["mean"] == pytest.approx(7 / 3)
@@ -0,0 +1,130 @@
+import asyncio
+import time
+from typing import List
+
+import httpx
+import pytest
+
+from src.config.settings import settings
+from src.services.llm import get_provider
+from src.services.llm.resilience import CircuitOpenError
+
+
+async def stream(resilience, provider: str = "fake", hedge: bool = False) -> str:
+    deltas: List[str] = []
+
+    async def emit(delta: str) -> None:
+        deltas.append(delta)
+
+    llm = get_provider(provider)
+    await resilience.stream(
+        provider, "fake-model", lambda: llm.stream([], "fake-model"), emit, hedge=hedge
+    )
+    return "".join(deltas)
+
+
+def outage() -> httpx.ConnectError:
+    return httpx.ConnectError("Connection refused")
+
+
+async def test_breaker_opens_then_closes_after_a_probe(fake_provider, resilience, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_ATTEMPTS", 0)
+    monkeypatch.setattr(settings, "LLM_BREAKER_WINDOW", 2)
+    monkeypatch.setattr(settings, "LLM_BREAKER_MIN_CALLS", 2)
+    monkeypatch.setattr(settings, "LLM_BREAKER_COOLDOWN", 0.05)
+    provider = fake_provider(errors=[outage(), outage()])
+    breaker = resilience.target("fake", "fake-model").breaker
+
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            await stream(resilience)
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        await stream(resilience)
+    assert provider.calls == 2
+
+    await asyncio.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # One probe at a time
+    breaker.release()
+
+    assert await stream(resilience) == "Hello world"
+    assert breaker.state == "closed"
+    assert provider.calls == 3
+
+
+async def test_failed_probe_reopens_the_breaker(fake_provider, resilience, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_ATTEMPTS", 0)
+    monkeypatch.setattr(settings, "LLM_BREAKER_WINDOW", 1)
+    monkeypatch.setattr(settings, "LLM_BREAKER_MIN_CALLS", 1)
+    monkeypatch.setattr(settings, "LLM_BREAKER_COOLDOWN", 0.05)
+    fake_provider(errors=[outage(), outage()])
+    breaker = resilience.target("fake", "fake-model").breaker
+
+    with pytest.raises(httpx.ConnectError):
+        await stream(resilience)
+    await asyncio.sleep(0.06)
+    with pytest.raises(httpx.ConnectError):
+        await stream(resilience)
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        await stream(resilience)
+
+
+async def test_retries_stop_when_the_budget_runs_out(fake_provider, resilience, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "LLM_RETRY_BACKOFF", 0.001)
+    monkeypatch.setattr(settings, "LLM_RETRY_BUDGET_RATIO", 0.0)
+    monkeypatch.setattr(settings, "LLM_RETRY_BUDGET_BURST", 1.0)
+    provider = fake_provider(errors=[outage(), outage(), outage()])
+
+    with pytest.raises(httpx.ConnectError):
+        await stream(resilience)
+
+    counters = resilience.target("fake", "fake-model").counters
+    assert provider.calls == 2
+    assert counters["retries"] == 1
+    assert counters["retries_denied"] == 1
+
+
+async def test_client_errors_are_not_retried(fake_provider, resilience, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_ATTEMPTS", 3)
+    provider = fake_provider(errors=[ValueError("Invalid API key")])
+
+    with pytest.raises(ValueError):
+        await stream(resilience)
+
+    health = resilience.target("fake", "fake-model")
+    assert provider.calls == 1
+    assert health.counters["failures"] == 0
+    assert health.breaker.state == "closed"
+
+
+async def test_hedge_wins_over_a_slow_first_call(fake_provider, resilience, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_LATENCY_MIN_SAMPLES", 1)
+    provider = fake_provider(delays=[2.0, 0.0])
+    health = resilience.target("fake", "fake-model")
+    health.ttfts.append(0.01)
+
+    started = time.perf_counter()
+    content = await stream(resilience, hedge=True)
+
+    assert time.perf_counter() - started < 1.0
+    assert content == "Hello world"
+    assert provider.calls == 2
+    assert health.counters["hedges"] == 1
+    assert health.counters["hedge_wins"] == 1
+
+
+def test_unlisted_models_share_one_target(fake_provider, resilience):
+    fake_provider()
+
+    assert resilience.target("fake", "made-up-1") is resilience.target("fake", "made-up-2")
+    assert resilience.target("fake", "fake-model") is not resilience.target("fake", "made-up-1")
+    assert [(t["provider"], t["model"]) for t in resilience.snapshot()] == [
+        ("fake", "fake-model"),
+        ("fake", "other"),
+    ]
@@ -0,0 +1,194 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+from uuid import uuid4
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from src.config.settings import settings
+from src.services.usecase.scheduler import (
+    LAST_FIRED_KEY,
+    CronSchedule,
+    UseCaseScheduler,
+    _Entry,
+    jitter,
+)
+
+
+def utc(text: str) -> datetime:
+    return datetime.fromisoformat(text).replace(tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "expression, after, expected",
+    [
+        ("*/15 * * * *", "2026-10-17 10:07", "2026-10-17 10:15"),
+        # Strictly after, even on a firing time
+        ("0 * * * *", "2026-10-17 10:00", "2026-10-17 11:00"),
+        ("0 * * * *", "2026-10-17 10:00:59", "2026-10-17 11:00"),
+        ("5,35 9-10 * * *", "2026-10-17 10:35", "2026-10-18 09:05"),
+        ("@daily", "2026-01-31 23:59:30", "2026-02-01 00:00"),
+        ("@weekly", "2026-10-17 12:00", "2026-10-18 00:00"),
+        ("30 9 * * mon-fri", "2026-10-17 08:00", "2026-10-19 09:30"),
+        ("0 12 * jun-aug *", "2026-09-01 00:00", "2027-06-01 12:00"),
+        # Month rollover skips months without the day
+        ("0 0 31 * *", "2026-04-01 00:00", "2026-05-31 00:00"),
+        ("0 0 30 * *", "2026-01-30 00:00", "2026-03-30 00:00"),
+        ("0 0 1 * *", "2026-12-15 00:00", "2027-01-01 00:00"),
+        ("@yearly", "2026-06-01 00:00", "2027-01-01 00:00"),
+        ("0 0 29 2 *", "2026-03-01 00:00", "2028-02-29 00:00"),
+    ],
+)
+def test_next_after(expression, after, expected):
+    assert CronSchedule(expression).next_after(utc(after)) == utc(expected)
+
+
+def test_next_after_is_in_utc():
+    after = datetime(2026, 10, 17, 23, 30, tzinfo=timezone(timedelta(hours=2)))
+
+    assert CronSchedule("0 22 * * *").next_after(after) == utc("2026-10-17 22:00")
+
+
+@pytest.mark.parametrize(
+    "expression, after, expected",
+    [
+        # Both day fields restricted: the 13th or any Friday
+        ("0 0 13 * fri", "2026-10-01 00:00", "2026-10-02 00:00"),
+        ("0 0 13 * fri", "2026-10-09 00:00", "2026-10-13 00:00"),
+        ("0 0 13 * fri", "2026-10-13 00:00", "2026-10-16 00:00"),
+        # Only one restricted: that one alone decides
+        ("0 0 13 * *", "2026-10-01 00:00", "2026-10-13 00:00"),
+        ("0 0 * * fri", "2026-10-09 00:00", "2026-10-16 00:00"),
+        ("0 0 1 * sun", "2026-10-02 00:00", "2026-10-04 00:00"),
+        # 0 and 7 are both Sunday
+        ("0 0 * * 7", "2026-10-17 00:00", "2026-10-18 00:00"),
+        ("0 0 * * 0", "2026-10-17 00:00", "2026-10-18 00:00"),
+    ],
+)
+def test_day_of_month_or_day_of_week(expression, after, expected):
+    assert CronSchedule(expression).next_after(utc(after)) == utc(expected)
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["* * * *", "60 * * * *", "* 24 * * *", "0 0 0 * *", "0 0 * 13 *", "*/0 * * * *", "x * * * *"],
+)
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_schedule_that_never_fires():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 31 2 *").next_after(utc("2026-01-01 00:00"))
+
+
+def test_jitter_is_stable_and_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "USECASE_SCHEDULER_JITTER", 300)
+    use_case_ids = [uuid4() for _ in range(50)]
+
+    offsets = [jitter(use_case_id) for use_case_id in use_case_ids]
+
+    assert offsets == [jitter(use_case_id) for use_case_id in use_case_ids]
+    assert all(timedelta(0) <= offset <= timedelta(seconds=300) for offset in offsets)
+    assert len(set(offsets)) > 1
+
+
+def test_no_jitter(monkeypatch):
+    monkeypatch.setattr(settings, "USECASE_SCHEDULER_JITTER", 0)
+
+    assert jitter(uuid4()) == timedelta(0)
+
+
+@pytest.mark.parametrize(
+    "policy, limit, grace, nominal, expected",
+    [
+        ("latest", 10, 3600, "12:00", ["12:30"]),
+        ("all", 10, 3600, "12:00", ["12:00", "12:10", "12:20", "12:30"]),
+        ("all", 2, 3600, "12:00", ["12:20", "12:30"]),
+        # Windows older than the grace period are dropped
+        ("all", 10, 900, "12:00", ["12:20", "12:30"]),
+        ("latest", 10, 900, "12:00", ["12:30"]),
+        # On time: just the nominal window
+        ("all", 10, 3600, "12:30", ["12:30"]),
+        ("latest", 10, 3600, "12:30", ["12:30"]),
+    ],
+)
+def test_windows(monkeypatch, policy, limit, grace, nominal, expected):
+    monkeypatch.setattr(settings, "USECASE_CATCHUP", policy)
+    monkeypatch.setattr(settings, "USECASE_CATCHUP_LIMIT", limit)
+    monkeypatch.setattr(settings, "USECASE_MISFIRE_GRACE", grace)
+    entry = _Entry(
+        CronSchedule("*/10 * * * *"), "", uuid4(), "Hi", [], utc(f"2026-10-17 {nominal}")
+    )
+
+    windows = UseCaseScheduler(redis=FakeAsyncRedis())._windows(entry, utc("2026-10-17 12:35"))
+
+    assert windows == [utc(f"2026-10-17 {window}") for window in expected]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.batches: List[Tuple[str, str, List[Dict[str, Any]]]] = []
+
+    def __call__(self, provider: str, model: str, runs: List[Dict[str, Any]]) -> None:
+        self.batches.append((provider, model, runs))
+
+    @property
+    def fired(self) -> List[str]:
+        return [run["fired_at"] for _, _, runs in self.batches for run in runs]
+
+
+def scheduler(redis: FakeAsyncRedis, dispatch: Recorder) -> UseCaseScheduler:
+    instance = UseCaseScheduler(dispatch=dispatch, redis=redis)
+
+    async def forget_deleted(use_case_ids: Any) -> None:
+        return None
+
+    instance._forget_deleted = forget_deleted
+    return instance
+
+
+@pytest.mark.parametrize(
+    "policy, expected",
+    [
+        ("latest", ["12:30"]),
+        ("all", ["12:10", "12:20", "12:30"]),
+    ],
+)
+async def test_restart_catches_up_missed_windows(monkeypatch, policy, expected):
+    monkeypatch.setattr(settings, "USECASE_CATCHUP", policy)
+    monkeypatch.setattr(settings, "USECASE_SCHEDULER_JITTER", 0)
+    redis = FakeAsyncRedis(server=FakeServer(), decode_responses=True)
+    row = SimpleNamespace(
+        id=uuid4(),
+        user_id=uuid4(),
+        schedule="*/10 * * * *",
+        is_active=True,
+        prompt_template="Hi",
+        targets=[{"provider": "openai", "model": "gpt-4o"}],
+    )
+    # The previous process last fired at 12:00, then was down until 12:35
+    await redis.set(LAST_FIRED_KEY.format(row.id), utc("2026-10-17 12:00").isoformat())
+    now = utc("2026-10-17 12:35")
+    dispatch = Recorder()
+    restarted = scheduler(redis, dispatch)
+
+    await restarted._apply(row, now)
+    fired = await restarted.fire_due(now)
+
+    assert dispatch.fired == [utc(f"2026-10-17 {window}").isoformat() for window in expected]
+    assert fired == len(expected)
+    assert {(provider, model) for provider, model, _ in dispatch.batches} == {("openai", "gpt-4o")}
+
+    # A second instance finds every window already claimed
+    other = Recorder()
+    second = scheduler(redis, other)
+    await second._apply(row, now)
+    assert await second.fire_due(now) == 0
+    assert other.batches == []
+
+    # The next window is the first after the caught-up ones
+    assert await restarted.fire_due(utc("2026-10-17 12:39")) == 0
+    assert await restarted.fire_due(utc("2026-10-17 12:40")) == 1
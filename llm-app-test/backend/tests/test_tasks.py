@@ -0,0 +1,190 @@
+import asyncio
+import uuid
+from typing import Any, Dict, List
+
+import pytest
+from sqlalchemy import func, select
+
+from src.config.database import AsyncSessionLocal, engine
+from src.models.chat import ChatSession, Message
+from src.models.evaluation import Evaluation
+from src.models.usage import UsageRollup
+from src.models.user import User
+from src.tasks import chat_tasks
+from src.tasks.chat_tasks import persist_messages, run_fanout, run_prompt_batch
+from src.tasks.evaluation_tasks import score_messages
+
+
+def run(coro: Any) -> Any:
+    async def job() -> Any:
+        try:
+            return await coro
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(job())
+
+
+def response(provider: str, content: str, status: str = "ok") -> Dict[str, Any]:
+    return {
+        "provider": provider,
+        "model": "m",
+        "content": content,
+        "status": status,
+        "latency": 0.5,
+        "ttft": 0.1,
+        "usage": {"prompt_tokens": 3, "completion_tokens": 5, "total_tokens": 8},
+        "cost": 0.001,
+        "cached": False,
+    }
+
+
+@pytest.fixture
+def no_stored_keys(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def load_api_keys(user_id: str) -> Dict[str, str]:
+        return {}
+
+    monkeypatch.setattr(chat_tasks, "_load_api_keys", load_api_keys)
+
+
+@pytest.fixture
+def chat_session(database) -> Dict[str, str]:
+    async def create() -> Dict[str, str]:
+        async with AsyncSessionLocal() as db:
+            user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="x", name="Test")
+            db.add(user)
+            await db.flush()
+            session = ChatSession(user_id=user.id, title="Test")
+            db.add(session)
+            await db.commit()
+            return {"user_id": str(user.id), "session_id": str(session.id)}
+
+    return run(create())
+
+
+def test_run_fanout_returns_every_target(fake_provider, no_stored_keys):
+    fake_provider("fake-a")
+    fake_provider("fake-b", errors=[ValueError("Invalid API key")])
+
+    results = run_fanout.delay(str(uuid.uuid4()), [["fake-a", "m"], ["fake-b", "m"]], "Hi").get()
+
+    by_provider = {result["provider"]: result for result in results}
+    assert by_provider["fake-a"]["status"] == "ok"
+    assert by_provider["fake-a"]["content"] == "Hello world"
+    assert by_provider["fake-b"]["status"] == "error"
+
+
+async def test_run_fanout_from_a_running_loop(fake_provider, no_stored_keys):
+    fake_provider("fake-a")
+
+    # Eager calls from async code run on a private loop in a helper thread
+    results = run_fanout.delay(str(uuid.uuid4()), [["fake-a", "m"]], "Hi").get()
+
+    assert [result["status"] for result in results] == ["ok"]
+
+
+def test_run_prompt_batch_answers_every_prompt(fake_provider, no_stored_keys):
+    provider = fake_provider("fake-a")
+
+    batches = run_prompt_batch.delay(
+        str(uuid.uuid4()), [["fake-a", "m"]], ["One", "Two", "Three"]
+    ).get()
+
+    assert len(batches) == 3
+    assert all(results[0]["status"] == "ok" for results in batches)
+    assert provider.calls == 3
+
+
+def test_persist_messages_writes_turns_and_rollups(chat_session):
+    rows: List[Dict[str, Any]] = [
+        dict(chat_session, content="First", responses=[response("openai", "An answer")]),
+        {
+            "session_id": chat_session["session_id"],
+            "content": "Second",
+            "responses": [response("openai", "Another answer")],
+        },
+        {"session_id": str(uuid.uuid4()), "content": "Orphan", "responses": []},
+    ]
+
+    # The turn of a session that no longer exists is dropped, not the batch
+    assert persist_messages.delay(rows).get() == 2
+
+    async def stored() -> Any:
+        async with AsyncSessionLocal() as db:
+            messages = (
+                await db.execute(
+                    select(Message.user_id, Message.content, Message.token_counts).order_by(
+                        Message.content
+                    )
+                )
+            ).all()
+            rollups = (
+                await db.execute(select(UsageRollup.granularity, UsageRollup.requests))
+            ).all()
+            return messages, rollups
+
+    messages, rollups = run(stored())
+    assert [message.content for message in messages] == ["First", "Second"]
+    # The owner of a row given without one is looked up from its session
+    assert {str(message.user_id) for message in messages} == {chat_session["user_id"]}
+    assert messages[0].token_counts
+    # Both turns count towards the owner's usage, looked up or not
+    assert sorted(rollups) == [("day", 2), ("hour", 2)]
+
+
+def test_score_messages_stores_metrics(chat_session):
+    rows = [
+        dict(
+            chat_session,
+            content="Question",
+            responses=[
+                response("openai", "Paris is the capital of France"),
+                response("anthropic", "The capital of France is Paris"),
+                response("google", "", status="error"),
+            ],
+        )
+    ]
+    persist_messages.delay(rows).get()
+
+    async def message_ids() -> List[str]:
+        async with AsyncSessionLocal() as db:
+            return [
+                str(message_id) for message_id in (await db.execute(select(Message.id))).scalars()
+            ]
+
+    assert score_messages.delay(run(message_ids())).get() == 2
+
+    async def evaluations() -> List[Evaluation]:
+        async with AsyncSessionLocal() as db:
+            return list(
+                (await db.execute(select(Evaluation).order_by(Evaluation.provider))).scalars()
+            )
+
+    stored = run(evaluations())
+    assert [evaluation.provider for evaluation in stored] == ["anthropic", "openai"]
+    assert all(0 < evaluation.auto_metrics["agreement"] <= 1 for evaluation in stored)
+
+
+def test_score_messages_skips_turns_without_answers(chat_session):
+    rows = [
+        dict(
+            chat_session,
+            content="Question",
+            responses=[response("openai", "", status="timeout"), response("anthropic", "")],
+        )
+    ]
+    persist_messages.delay(rows).get()
+
+    async def message_ids() -> List[str]:
+        async with AsyncSessionLocal() as db:
+            return [
+                str(message_id) for message_id in (await db.execute(select(Message.id))).scalars()
+            ]
+
+    assert score_messages.delay(run(message_ids())).get() == 0
+
+    async def count() -> int:
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(select(func.count()).select_from(Evaluation))
+
+    assert run(count()) == 0
@@ -0,0 +1,262 @@
+from typing import List, Sequence
+
+import pytest
+
+from src.config.settings import settings
+from src.services.llm import tokens
+from src.services.llm.base import LLMResult
+from src.services.llm.pricing import (
+    LATEST_VERSION,
+    PRICE_TABLES,
+    ModelPrice,
+    estimate_cost,
+    model_price,
+    price_table,
+)
+from src.services.llm.tokens import (
+    EstimatingTokenizer,
+    TokenCounter,
+    Tokenizer,
+    check_budget,
+    fill_usage,
+    tokenizer_for,
+)
+
+PRICES = PRICE_TABLES[LATEST_VERSION]
+
+
+@pytest.fixture(autouse=True)
+def list_prices(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "LLM_PRICE_VERSION", None)
+    monkeypatch.setattr(settings, "LLM_PRICE_OVERRIDES", {})
+    monkeypatch.setattr(settings, "LLM_MAX_REQUEST_COST", None)
+    monkeypatch.setattr(settings, "LLM_PREFLIGHT_COMPLETION_TOKENS", 1000)
+
+
+@pytest.mark.parametrize(
+    "model, family",
+    [
+        ("gpt-4o", "gpt-4o"),
+        ("gpt-4o-2024-08-06", "gpt-4o"),
+        # The longest matching family wins
+        ("gpt-4o-mini-2024-07-18", "gpt-4o-mini"),
+        ("gpt-4-turbo-2024-04-09", "gpt-4-turbo"),
+        ("gpt-4-0613", "gpt-4"),
+        ("gpt-3.5-turbo-0125", "gpt-3.5-turbo"),
+        ("o1", "o1"),
+        ("o1-2024-12-17", "o1"),
+        ("o1-mini-2024-09-12", "o1-mini"),
+        ("o1-preview-2024-09-12", "o1-preview"),
+        ("claude-3-5-sonnet-20241022", "claude-3-5-sonnet"),
+        ("claude-3-5-haiku-latest", "claude-3-5-haiku"),
+        ("claude-3-haiku-20240307", "claude-3-haiku"),
+        ("gemini-1.5-flash-8b", "gemini-1.5-flash"),
+        ("gemini-2.0-flash-exp", "gemini-2.0-flash"),
+    ],
+)
+def test_model_price_matches_the_family(model, family):
+    assert model_price(model) == PRICES[family]
+
+
+@pytest.mark.parametrize("model", ["llama-3-70b", "mistral-large", "", "4o", "claude-2.1"])
+def test_unknown_models_have_no_price(model):
+    assert model_price(model) is None
+    assert estimate_cost(model, 1000, 1000) is None
+
+
+def test_unknown_price_version():
+    with pytest.raises(ValueError):
+        model_price("gpt-4o", version="1999-01-01")
+
+
+def test_estimate_cost():
+    # USD per million tokens: 2.50 in, 10.00 out
+    assert estimate_cost("gpt-4o-2024-08-06", 1000, 500) == pytest.approx(0.0075)
+
+
+@pytest.mark.parametrize(
+    "overrides, model, expected",
+    [
+        # Only the given fields change
+        ({"gpt-4o": {"input": 1.0}}, "gpt-4o", ModelPrice(1.0, 10.0, 128000)),
+        # Dated names follow their overridden family
+        ({"gpt-4o": {"output": 5.0}}, "gpt-4o-2024-08-06", ModelPrice(2.5, 5.0, 128000)),
+        # ...but not a longer family that is not overridden
+        ({"gpt-4o": {"output": 5.0}}, "gpt-4o-mini", PRICES["gpt-4o-mini"]),
+        # New models, matched by prefix too
+        (
+            {"llama-3": {"input": 0.5, "output": 0.7, "context_window": 8192}},
+            "llama-3-70b",
+            ModelPrice(0.5, 0.7, 8192),
+        ),
+        ({"llama-3": {"input": 0.5}}, "llama-3", ModelPrice(0.5, 0.0, 0)),
+    ],
+)
+def test_overrides(monkeypatch, overrides, model, expected):
+    monkeypatch.setattr(settings, "LLM_PRICE_OVERRIDES", overrides)
+
+    assert model_price(model) == expected
+
+
+def test_changed_overrides_take_effect(monkeypatch):
+    assert model_price("gpt-4o").input == 2.5
+
+    monkeypatch.setattr(settings, "LLM_PRICE_OVERRIDES", {"gpt-4o": {"input": 1.0}})
+    assert model_price("gpt-4o").input == 1.0
+
+    monkeypatch.setattr(settings, "LLM_PRICE_OVERRIDES", {})
+    assert model_price("gpt-4o").input == 2.5
+
+
+def test_price_table_is_read_only():
+    with pytest.raises(TypeError):
+        price_table()["gpt-4o"] = ModelPrice(0.0, 0.0, 0)  # type: ignore[index]
+
+
+@pytest.mark.parametrize(
+    "model, family",
+    [
+        ("gpt-4o-mini", "o200k_base"),
+        ("o1-mini", "o200k_base"),
+        ("gpt-4-turbo", "cl100k_base"),
+        ("gpt-3.5-turbo", "cl100k_base"),
+        ("claude-3-5-sonnet-20241022", "claude"),
+        ("gemini-1.5-pro", "gemini"),
+        ("llama-3-70b", "default"),
+    ],
+)
+def test_tokenizer_for(model, family):
+    # BPE encodings are estimated where they are not cached locally
+    assert tokenizer_for(model).name in (family, f"estimate:{family}")
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("", 0),
+        ("Hello world", 2),
+        ("internationalization", 5),
+        ("12345", 2),
+        ("!!!", 2),
+        ("a\nb", 3),
+        ("你好", 2),
+    ],
+)
+def test_estimated_counts(text, expected):
+    assert EstimatingTokenizer("default", 4.0).count(text) == expected
+
+
+class RecordingTokenizer(Tokenizer):
+    name = "recording"
+
+    def __init__(self) -> None:
+        self.batches: List[List[str]] = []
+
+    def count_batch(self, texts: Sequence[str]) -> List[int]:
+        self.batches.append(list(texts))
+        return [len(text) for text in texts]
+
+
+def test_counts_are_memoized(monkeypatch):
+    tokenizer = RecordingTokenizer()
+    monkeypatch.setattr(tokens, "tokenizer_for", lambda model: tokenizer)
+    counter = TokenCounter(maxsize=100)
+
+    assert counter.count_batch("m", ["one", "three", "one"]) == [3, 5, 3]
+    assert counter.count_batch("m", ["three", "fourteen"]) == [5, 8]
+
+    # Duplicates and cached texts are never tokenized again
+    assert tokenizer.batches == [["one", "three"], ["fourteen"]]
+
+
+def test_count_messages_adds_formatting():
+    counter = TokenCounter(maxsize=100)
+    messages = [{"role": "system", "content": "Hello world"}, {"role": "user", "content": ""}]
+
+    # 2 tokens of content, 3 per message and 3 for the reply
+    assert counter.count_messages("claude-3-haiku", messages) == 2 + 3 * 2 + 3
+
+
+MESSAGES = [{"role": "user", "content": "Hello world"}]
+PROMPT_TOKENS = 2 + 3 + 3
+
+
+def test_fill_usage_counts_and_prices_the_call():
+    result = LLMResult("anthropic", "claude-3-haiku", content="Hello world", status="ok")
+
+    fill_usage(result, MESSAGES)
+
+    assert result.usage == {
+        "prompt_tokens": PROMPT_TOKENS,
+        "completion_tokens": 2,
+        "total_tokens": PROMPT_TOKENS + 2,
+    }
+    assert result.cost == pytest.approx((PROMPT_TOKENS * 0.25 + 2 * 1.25) / 1_000_000)
+
+
+def test_fill_usage_keeps_reported_usage():
+    usage = {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110}
+    result = LLMResult("anthropic", "claude-3-haiku", content="Hi", status="ok", usage=dict(usage))
+
+    fill_usage(result, MESSAGES)
+
+    assert result.usage == usage
+    assert result.cost == pytest.approx((100 * 0.25 + 10 * 1.25) / 1_000_000)
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        LLMResult("anthropic", "claude-3-haiku", content="Hi", status="ok", cached=True),
+        LLMResult("anthropic", "claude-3-haiku", status="error", error="Invalid API key"),
+    ],
+)
+def test_fill_usage_skips_unbilled_calls(result):
+    fill_usage(result, MESSAGES)
+
+    assert result.usage == {}
+    assert result.cost is None
+
+
+def test_check_budget_returns_the_worst_case_cost():
+    cost = check_budget([("anthropic", "claude-3-haiku"), ("custom", "llama-3")], MESSAGES)
+
+    # 1000 assumed completion tokens; the unpriced model adds nothing
+    assert cost == pytest.approx((PROMPT_TOKENS * 0.25 + 1000 * 1.25) / 1_000_000)
+
+
+def test_check_budget_uses_max_tokens():
+    cost = check_budget([("anthropic", "claude-3-haiku")], MESSAGES, max_tokens=10)
+
+    assert cost == pytest.approx((PROMPT_TOKENS * 0.25 + 10 * 1.25) / 1_000_000)
+
+
+def test_check_budget_refuses_an_expensive_fanout(monkeypatch):
+    one = check_budget([("anthropic", "claude-3-opus")], MESSAGES)
+    monkeypatch.setattr(settings, "LLM_MAX_REQUEST_COST", one * 1.5)
+
+    assert check_budget([("anthropic", "claude-3-opus")], MESSAGES) == pytest.approx(one)
+    # Each target is under the limit, the whole fan-out is not
+    with pytest.raises(ValueError, match="per-request limit"):
+        check_budget(
+            [("anthropic", "claude-3-opus"), ("anthropic", "claude-3-opus-latest")], MESSAGES
+        )
+
+
+def test_check_budget_refuses_a_prompt_over_the_context_window():
+    with pytest.raises(ValueError, match="context window of claude-3-haiku"):
+        check_budget([("anthropic", "claude-3-haiku")], MESSAGES, max_tokens=200000)
+
+    # Unknown models have no known window
+    check_budget([("custom", "llama-3")], MESSAGES, max_tokens=10_000_000)
+
+
+def test_check_budget_uses_per_target_contexts():
+    long_history = [{"role": "user", "content": "word " * 9000}]
+
+    with pytest.raises(ValueError, match="context window of gpt-4"):
+        check_budget(
+            [("anthropic", "claude-3-haiku"), ("openai", "gpt-4")],
+            MESSAGES,
+            contexts={("openai", "gpt-4"): long_history},
+        )